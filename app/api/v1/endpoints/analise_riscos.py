@@ -1,9 +1,8 @@
 from fastapi import APIRouter, HTTPException
-from app.services.financial_risk_service import FinancialRiskService
+from app.services.analysis_graph import get_analysis_graph
 from typing import Dict, Any
 
 router = APIRouter()
-financial_risk_service = FinancialRiskService()
 
 @router.get("/analise-riscos", response_model=Dict[str, Any], tags=["Análise de Risco"])
 async def get_risk_analysis():
@@ -17,8 +16,7 @@ async def get_risk_analysis():
     """
     try:
         # Obter dados de risco financeiro
-        financial_data = await financial_risk_service.fetch_financial_data()
-        financial_risk = financial_risk_service.calculate_financial_risk(financial_data)
+        financial_risk = await get_analysis_graph().avaliar_no("risco-financeiro")
         
         # Simular riscos de outras categorias (a serem implementados no futuro)
         technical_risk = {
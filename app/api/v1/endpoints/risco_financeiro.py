@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from app.services.financial_risk_service import FinancialRiskService
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Response
+from app.services.financial_risk_service import get_financial_risk_service
+from app.services.snapshot_scheduler import get_snapshot_scheduler
+from app.utils.http_cache import aplicar_cache
+from typing import Dict, Any, Optional
 
 router = APIRouter()
-financial_risk_service = FinancialRiskService()
+financial_risk_service = get_financial_risk_service()
 
 @router.get("/risco-financeiro", response_model=Dict[str, Any], tags=["Análise de Risco"])
-async def get_financial_risk_analysis():
+async def get_financial_risk_analysis(response: Response):
     """
     Análise detalhada do risco financeiro baseado em Health Factor e Alavancagem.
     
@@ -17,15 +19,33 @@ async def get_financial_risk_analysis():
     - Principais alertas
     """
     try:
-        # Busca os dados financeiros via scraping
-        financial_data = await financial_risk_service.fetch_financial_data()
-        
-        # Calcula o risco financeiro
-        risk_analysis = financial_risk_service.calculate_financial_risk(financial_data)
-        
-        return risk_analysis
+        # Snapshot atualizado em segundo plano a cada bloco novo (ETag = hash do resultado)
+        snapshot = await get_snapshot_scheduler().obter_snapshot("risco-financeiro")
+        aplicar_cache(response, snapshot.hash_valor, snapshot.valido_ate)
+        return snapshot.valor
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao analisar risco financeiro: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/risco-financeiro/carteiras", response_model=Dict[str, Any], tags=["Análise de Risco"])
+async def get_portfolio_financial_risk(
+    enderecos: Optional[str] = Query(None, description="Carteiras separadas por vírgula (padrão: WALLET_ADDRESSES)")
+):
+    """
+    Health Factor, alavancagem e score de risco de várias carteiras AAVE v3.
+    
+    Todas as carteiras e os preços das reservas são lidos em uma única chamada
+    Multicall3, no mesmo bloco; o resultado é reaproveitado até o próximo bloco.
+    """
+    try:
+        carteiras = [e.strip() for e in enderecos.split(",") if e.strip()] if enderecos else None
+        return await financial_risk_service.fetch_portfolio_data(carteiras)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao analisar risco das carteiras: {str(e)}"
+        )
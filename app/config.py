@@ -20,10 +20,22 @@ class Settings(BaseSettings):
     NOTION_TOKEN: str = Field(..., env="NOTION_TOKEN")
     NOTION_DATABASE_ID_EMA: str = Field(..., env="NOTION_DATABASE_ID_EMA")
     NOTION_DATABASE_ID_MACRO: str = Field(..., env="NOTION_DATABASE_ID_MACRO")
+    NOTION_CACHE_TTL_SECONDS: int = Field(300, description="Tempo de reaproveitamento do índice de indicadores do Notion")
 
     # Google Cloud BigQuery (NOVOS CAMPOS)
     GOOGLE_APPLICATION_CREDENTIALS_JSON: str = Field(..., env="GOOGLE_APPLICATION_CREDENTIALS_JSON")
     GOOGLE_CLOUD_PROJECT: str = Field(..., env="GOOGLE_CLOUD_PROJECT")
+    BIGQUERY_USE_STORAGE_API: bool = Field(False, description="Baixar resultados pela BigQuery Storage Read API (requer google-cloud-bigquery-storage)")
+
+    # Cache local de resultados do BigQuery (Parquet)
+    BIGQUERY_CACHE_TTL_SECONDS: int = Field(86400, description="Validade de um resultado de query em cache (limitada ao dia UTC)")
+
+    # Realized Price (agregado local de UTXOs)
+    REALIZED_PRICE_FONTE: str = Field("bigquery", description="Fonte dos UTXOs: 'bigquery' ou 'local' (dataset offline em CSV)")
+    REALIZED_PRICE_DADOS_LOCAIS: str = Field("data/utxos_local", description="Diretório com outputs.csv e inputs.csv da fonte local")
+
+    # Dados locais persistidos (SQLite, caches)
+    LOCAL_DATA_DIR: str = Field("data", description="Diretório dos bancos e arquivos locais da aplicação")
 
     # Indicator weights and thresholds
     WEIGHT_EMA_200: float = Field(0.25, description="Peso para BTC vs 200D EMA")
@@ -34,11 +46,57 @@ class Settings(BaseSettings):
     WEIGHT_MACRO_US10Y: float = Field(0.40, description="Peso para Macro US10Y yield")
 
     # Cache settings
-    CACHE_EXPIRATION_SECONDS: int = Field(300, description="Tempo de expiração do cache em segundos")
+    CACHE_EXPIRATION_SECONDS: int = Field(300, description="Cache HTTP: max-age quando a próxima mudança dos dados é desconhecida e janela de stale-while-revalidate")
 
     # TradingView default symbol
     TV_SYMBOL: str = Field("BTCUSDT", description="Símbolo usado nas chamadas ao TradingView")
     TV_EXCHANGE: str = Field("BINANCE", description="Exchange para consulta de dados")
+    TV_CANDLE_MAX_AGE_SECONDS: int = Field(60, description="Idade máxima dos candles em cache antes de novo download (limita a barra em formação)")
+    TV_MAX_CONCURRENCY: int = Field(3, description="Máximo de downloads simultâneos no TradingView (websockets abertos em paralelo)")
+    TV_POOL_SIZE: int = Field(3, description="Quantidade de sessões TradingView autenticadas no pool")
+    TV_POOL_CHECKOUT_TIMEOUT_SECONDS: float = Field(30.0, description="Espera máxima por uma sessão livre do pool")
+    TV_POOL_PROBE_INTERVAL_SECONDS: float = Field(300.0, description="Ociosidade após a qual a sessão passa por prova de vida antes do uso")
+    TV_POOL_MAX_BACKOFF_SECONDS: float = Field(300.0, description="Intervalo máximo entre tentativas de novo login")
+
+    # Prazos por indicador na análise de ciclos (coleta paralela)
+    CICLOS_TIMEOUT_EMA_200D_SECONDS: float = Field(15.0, description="Prazo da coleta BTC vs EMA 200D")
+    CICLOS_TIMEOUT_REALIZED_PRICE_SECONDS: float = Field(45.0, description="Prazo da coleta BTC vs Realized Price (BigQuery)")
+    CICLOS_TIMEOUT_PUELL_SECONDS: float = Field(45.0, description="Prazo da coleta do Puell Multiple (BigQuery)")
+    CICLOS_TIMEOUT_M2_SECONDS: float = Field(30.0, description="Prazo da coleta do M2 Global Momentum")
+    CICLOS_TIMEOUT_FUNDING_SECONDS: float = Field(12.0, description="Prazo da coleta das Funding Rates (Binance)")
+
+    # Cliente HTTP compartilhado (APIs REST externas)
+    HTTP_TIMEOUT_SECONDS: float = Field(10.0, description="Timeout padrão das chamadas HTTP externas")
+    HTTP_MAX_RETRIES: int = Field(2, description="Novas tentativas em erro de conexão, 429 ou 5xx")
+    HTTP_MAX_CONCURRENCY_PER_HOST: int = Field(4, description="Máximo de requisições simultâneas por host")
+    HTTP_MAX_CONNECTIONS: int = Field(20, description="Tamanho do pool de conexões keep-alive")
+    HTTP_HTTP2: bool = Field(True, description="Usar HTTP/2 quando o servidor suportar (requer h2)")
+
+    # RPCs Arbitrum (AAVE v3)
+    ARBITRUM_RPC_URLS: str = Field(
+        "https://arb1.arbitrum.io/rpc,https://arbitrum-one.public.blastapi.io,"
+        "https://endpoints.omniatech.io/v1/arbitrum/one/public,https://arbitrum.blockpi.network/v1/rpc/public",
+        description="Endpoints JSON-RPC da Arbitrum separados por vírgula"
+    )
+    ARBITRUM_RPC_TIMEOUT_SECONDS: float = Field(10.0, description="Prazo de cada chamada a um endpoint RPC")
+    ARBITRUM_RPC_HEDGE: int = Field(2, description="Quantos endpoints (os mais rápidos) recebem cada chamada em paralelo")
+    WALLET_ADDRESSES: str = Field("", description="Carteiras AAVE do portfólio separadas por vírgula (vazio: usa WALLET_ADDRESS)")
+
+    # Agendador de snapshots das análises
+    AGENDADOR_ATIVO: bool = Field(True, description="Recalcular as análises em segundo plano a partir do startup")
+    AGENDADOR_ATRASO_FECHAMENTO_SECONDS: float = Field(5.0, description="Espera após o fechamento da barra antes de recalcular")
+    AGENDADOR_ATRASO_DIARIO_SECONDS: float = Field(600.0, description="Espera após a virada do dia UTC para as análises diárias")
+    AGENDADOR_AAVE_INTERVALO_SECONDS: float = Field(15.0, description="Intervalo de verificação de bloco novo para o risco financeiro")
+    SNAPSHOT_RETENCAO_DIAS: int = Field(365, description="Dias de histórico de snapshots mantidos no banco local")
+
+    # Coalescência de GETs idênticos simultâneos (single-flight)
+    COALESCER_ATIVO: bool = Field(True, description="Requisições iguais em andamento compartilham um único processamento")
+    COALESCER_ROTAS: str = Field(
+        "/api/v1/analise-riscos,/api/v1/analise-ciclos,/api/v1/analise-tecnica-emas,/api/v1/analise-fundamentos,"
+        "/api/v1/analise-tecnica-rsi,/api/v1/analise-divergencia-rsi,/api/v1/analise-tendencia-risco,"
+        "/api/v1/risco-financeiro,/api/v1/risco-financeiro/carteiras",
+        description="Caminhos com coalescência, separados por vírgula"
+    )
 
     class Config:
         env_file = ".env"
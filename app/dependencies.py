@@ -1,7 +1,6 @@
-from app.services.tv_session_manager import get_tv_instance
 # app/dependencies.py
 from fastapi import Depends
-from tvDatafeed import TvDatafeed
+from app.services.tv_session_manager import get_tv_instance, PooledTvDatafeed
 from notion_client import Client as NotionClient
 from google.cloud import bigquery
 from google.oauth2 import service_account
@@ -10,14 +9,11 @@ from google.oauth2 import service_account
 from app.config import get_settings, Settings
 
 
-def get_tv_client(settings: Settings = Depends(get_settings)) -> TvDatafeed:
+def get_tv_client() -> PooledTvDatafeed:
     """
-    Dependency that provides an authenticated TvDatafeed client using credentials from settings.
+    Dependency that provides the shared TradingView client backed by the session pool.
     """
-    return TvDatafeed(
-        username=settings.TV_USERNAME,
-        password=settings.TV_PASSWORD
-    )
+    return get_tv_instance()
 
 
 def get_notion_client(settings: Settings = Depends(get_settings)) -> NotionClient:
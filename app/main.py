@@ -4,8 +4,15 @@ import logging
 from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from app.config import get_settings, Settings
-from app.routers import analise_ciclos, analise_tecnica_emas, analise_fundamentos, analise_riscos, analise_tecnica_rsi, analise_divergencia_rsi, analise_tendencia_risco
+from app.routers import analise_ciclos, analise_tecnica_emas, analise_fundamentos, analise_riscos, analise_tecnica_rsi, analise_divergencia_rsi, analise_tendencia_risco, historico
 from app.api.v1.endpoints import risco_financeiro
+from app.services.tv_session_manager import get_tv_session_pool, get_candle_store
+from app.utils.bigquery_cache import get_bigquery_cache
+from app.utils.http_client import get_http_client
+from app.services.snapshot_scheduler import get_snapshot_scheduler
+from app.services.analysis_graph import get_analysis_graph
+from app.utils.single_flight import CoalescedorMiddleware, get_coalescedor
+from app.utils.http_cache import RespostaCondicionalMiddleware
 
 # ⍥ Ativar logs nível INFO
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +28,12 @@ app = FastAPI(
     contact={"name": "Equipe BTC Turbo", "email": "contato@btcturbo.com"},
 )
 
+# GETs idênticos simultâneos nas rotas pesadas compartilham um único processamento
+app.add_middleware(CoalescedorMiddleware)
+
+# If-None-Match igual à ETag da resposta vira 304 (por fora da coalescência: vale por cliente)
+app.add_middleware(RespostaCondicionalMiddleware)
+
 # Tratamento genérico de exceções
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
@@ -31,6 +44,51 @@ async def generic_exception_handler(request: Request, exc: Exception):
 async def health():
     return {"status": "ok"}
 
+# Métricas do pool de sessões TradingView e do repositório de candles
+@app.get("/tv-sessoes", summary="Pool de Sessões TradingView", tags=["Debug"])
+async def tv_sessoes():
+    return {
+        "pool": get_tv_session_pool().stats(),
+        "candles": get_candle_store().stats()
+    }
+
+# Hits/misses e bytes faturados do cache local de queries BigQuery
+@app.get("/bigquery-cache", summary="Cache de Queries BigQuery", tags=["Debug"])
+async def bigquery_cache():
+    return get_bigquery_cache().stats()
+
+# Requisições e retentativas do cliente HTTP compartilhado
+@app.get("/http-cliente", summary="Cliente HTTP Compartilhado", tags=["Debug"])
+async def http_cliente():
+    return get_http_client().stats()
+
+# Idade, duração e falhas dos snapshots das análises
+@app.get("/snapshots", summary="Snapshots das Análises", tags=["Debug"])
+async def snapshots():
+    return get_snapshot_scheduler().stats()
+
+# Dependências, execuções e duração média de cada nó do grafo de indicadores
+@app.get("/grafo-analises", summary="Grafo de Indicadores", tags=["Debug"])
+async def grafo_analises():
+    return get_analysis_graph().stats()
+
+# Processamentos e requisições coalescidas por rota
+@app.get("/coalescer", summary="Coalescência de Requisições", tags=["Debug"])
+async def coalescer():
+    return get_coalescedor().stats()
+
+# Pré-cálculo das análises em segundo plano
+@app.on_event("startup")
+async def iniciar_agendador():
+    if settings.AGENDADOR_ATIVO:
+        await get_snapshot_scheduler().iniciar()
+
+# Para o agendador e fecha as conexões keep-alive do cliente HTTP compartilhado
+@app.on_event("shutdown")
+async def encerrar():
+    await get_snapshot_scheduler().parar()
+    await get_http_client().aclose()
+
 # Endpoint para exibir configurações carregadas
 @app.get("/config", summary="Configurações Ativas", tags=["Debug"])
 async def get_config(settings: Settings = Depends(get_settings)):
@@ -51,4 +109,5 @@ app.include_router(analise_riscos.router, prefix="/api/v1")
 app.include_router(analise_tecnica_rsi.router, prefix="/api/v1")
 app.include_router(analise_divergencia_rsi.router, prefix="/api/v1")
 app.include_router(analise_tendencia_risco.router, prefix="/api/v1")
-app.include_router(risco_financeiro.router, prefix="/api/v1")
\ No newline at end of file
+app.include_router(risco_financeiro.router, prefix="/api/v1")
+app.include_router(historico.router, prefix="/api/v1")
\ No newline at end of file
@@ -1,19 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
-from app.services.btc_analysis import analyze_btc_cycles
-from app.dependencies import get_tv_client
-from tvDatafeed import TvDatafeed
+from fastapi import APIRouter, HTTPException, Response
+from app.services.snapshot_scheduler import get_snapshot_scheduler
+from app.utils.http_cache import aplicar_cache
 
 router = APIRouter()
 
 @router.get("/analise-ciclos", 
             summary="Análise de Ciclos do BTC", 
             tags=["Ciclos"])
-async def analise_ciclos(
-    username: Optional[str] = Query(None, description="TradingView username"),
-    password: Optional[str] = Query(None, description="TradingView password"),
-    tv: TvDatafeed = Depends(get_tv_client)
-):
+async def analise_ciclos(response: Response):
     """
     Análise quantitativa de ciclos do BTC v2.0
     
@@ -24,11 +18,15 @@ async def analise_ciclos(
     - M2 Growth (15%)
     - Funding Rates 7D (5%)
     
-    Retorna score 0-10 com classificação Bull/Bear.
+    Retorna score 0-10 com classificação Bull/Bear. Indicadores que excedem o
+    prazo entram como indisponíveis (campo "parcial"). Recalculada a cada hora em
+    segundo plano; a resposta é o último snapshot, com ETag do resultado e cache
+    até o próximo recálculo.
     """
     try:
-        resultado = analyze_btc_cycles(tv)
-        return resultado
+        snapshot = await get_snapshot_scheduler().obter_snapshot("analise-ciclos")
+        aplicar_cache(response, snapshot.hash_valor, snapshot.valido_ate)
+        return snapshot.valor
         
     except Exception as e:
         raise HTTPException(
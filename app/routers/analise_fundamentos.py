@@ -1,7 +1,8 @@
 # app/routers/analise_fundamentos.py
 
-from fastapi import APIRouter, HTTPException
-from app.services.fundamentals import get_all_fundamentals
+from fastapi import APIRouter, HTTPException, Response
+from app.services.snapshot_scheduler import get_snapshot_scheduler
+from app.utils.http_cache import aplicar_cache
 
 router = APIRouter()
 
@@ -10,15 +11,20 @@ router = APIRouter()
     summary="Análise Fundamentalista On-Chain do BTC",
     tags=["Fundamentos On-Chain"]
 )
-def analise_fundamentos():
+async def analise_fundamentos(response: Response):
     """
     Retorna a análise fundamentalista completa de indicadores on-chain:
     - Model Variance (S2F)
     - MVRV Z-Score
     - VDD Multiple
     - Expansão Global M2 (6m)
+
+    Recalculada uma vez por dia em segundo plano; a resposta é o último snapshot,
+    com ETag do resultado e cache até o próximo recálculo.
     """
     try:
-        return get_all_fundamentals()
+        snapshot = await get_snapshot_scheduler().obter_snapshot("analise-fundamentos")
+        aplicar_cache(response, snapshot.hash_valor, snapshot.valido_ate)
+        return snapshot.valor
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na análise de fundamentos: {str(e)}")
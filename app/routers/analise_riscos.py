@@ -1,7 +1,8 @@
 # app/routers/analise_riscos.py
 
-from fastapi import APIRouter, HTTPException
-from app.services.risk_analysis import get_consolidated_risk_analysis
+from fastapi import APIRouter, HTTPException, Response
+from app.services.snapshot_scheduler import get_snapshot_scheduler
+from app.utils.http_cache import aplicar_cache
 
 router = APIRouter()
 
@@ -10,7 +11,7 @@ router = APIRouter()
     summary="Análise de Risco Consolidada para BTC",
     tags=["Análise de Risco"]
 )
-def analise_riscos():
+async def analise_riscos(response: Response):
     """
     Retorna a análise de risco consolidada para operações de hold alavancado de Bitcoin:
     
@@ -26,8 +27,13 @@ def analise_riscos():
     - Score de risco
     - Peso na análise final
     - Alertas principais identificados
+
+    Recalculada a cada fechamento de barra de 15m; a resposta é o último snapshot,
+    com ETag do resultado e cache até o próximo recálculo.
     """
     try:
-        return get_consolidated_risk_analysis()
+        snapshot = await get_snapshot_scheduler().obter_snapshot("analise-riscos")
+        aplicar_cache(response, snapshot.hash_valor, snapshot.valido_ate)
+        return snapshot.valor
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na análise de risco: {str(e)}")
\ No newline at end of file
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.services.risk_analysis_trend import calculate_trend_risk
+from fastapi import APIRouter, HTTPException, Depends, Response
+from app.services.analysis_graph import get_analysis_graph, ultimas_barras
+from app.services.snapshot_scheduler import fingerprint
+from app.services.tv_session_manager import get_candle_store
+from app.utils.http_cache import aplicar_cache
 from app.config import Settings, get_settings
 from typing import Dict, Any
 
@@ -8,7 +11,7 @@ router = APIRouter()
 @router.get("/analise-tendencia-risco", 
               summary="Análise de Risco de Tendência", 
               tags=["Análise Técnica"])
-def get_trend_risk_analysis(settings: Settings = Depends(get_settings)) -> Dict[str, Any]:
+async def get_trend_risk_analysis(response: Response, settings: Settings = Depends(get_settings)) -> Dict[str, Any]:
     """
     Retorna análise de risco baseada na força da tendência.
     
@@ -23,7 +26,9 @@ def get_trend_risk_analysis(settings: Settings = Depends(get_settings)) -> Dict[
         Dict: Análise detalhada do risco de tendência com classificação e alertas
     """
     try:
-        result = calculate_trend_risk()
+        # Nó "risco-tendencia" do grafo: candles → EMAs → score de risco
+        nos = await get_analysis_graph().avaliar("candles", "risco-tendencia")
+        result = nos["risco-tendencia"]
         
         # Adicionar explicação da classificação de risco baseada na pontuação
         risk_level = result.get("pontuacao", 0)
@@ -58,7 +63,9 @@ def get_trend_risk_analysis(settings: Settings = Depends(get_settings)) -> Dict[
                     "recomendacao": nivel["recomendacao"]
                 }
                 break
-                
+
+        # ETag das últimas barras consumidas nesta avaliação; válido até a próxima atualização dos candles
+        aplicar_cache(response, fingerprint(ultimas_barras(nos["candles"])), get_candle_store().proxima_expiracao())
         return result
         
     except Exception as e:
@@ -0,0 +1,63 @@
+# app/routers/historico.py
+
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.services.snapshot_scheduler import get_snapshot_scheduler
+from app.utils.snapshot_store import get_snapshot_store
+
+router = APIRouter()
+
+
+def _epoch(dt: Optional[datetime]) -> Optional[float]:
+    if dt is None:
+        return None
+    # Datas sem fuso são interpretadas como UTC
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+@router.get("/historico",
+            summary="Análises com Histórico",
+            tags=["Histórico"])
+def historico():
+    """
+    Lista as análises com histórico gravado: quantidade de registros e o período coberto.
+    """
+    try:
+        return get_snapshot_store().resumo()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar histórico: {str(e)}")
+
+
+@router.get("/historico/{analise}",
+            summary="Histórico de uma Análise",
+            tags=["Histórico"])
+def historico_analise(
+    analise: str,
+    desde: Optional[datetime] = Query(None, description="Início do intervalo (ISO 8601, UTC se sem fuso)"),
+    ate: Optional[datetime] = Query(None, description="Fim do intervalo (ISO 8601, UTC se sem fuso)"),
+    limite: int = Query(500, ge=1, le=5000, description="Máximo de registros (os mais recentes do intervalo)"),
+    incluir_valor: bool = Query(True, description="False devolve só instante, fingerprint e entradas")
+):
+    """
+    Resultados já calculados da análise no intervalo, em ordem cronológica.
+
+    Cada registro traz o instante do cálculo, as entradas usadas (última barra de cada
+    timeframe, bloco, dia UTC...), o fingerprint dessas entradas e o resultado completo.
+    Só entram resultados que mudaram em relação ao registro anterior.
+
+    Análises: analise-tecnica-emas, analise-riscos, analise-ciclos, analise-fundamentos,
+    risco-financeiro.
+    """
+    if analise not in get_snapshot_scheduler().nomes():
+        raise HTTPException(status_code=404, detail=f"Análise '{analise}' não possui histórico")
+    if desde and ate and _epoch(desde) > _epoch(ate):
+        raise HTTPException(status_code=400, detail="'desde' deve ser anterior a 'ate'")
+
+    try:
+        registros = get_snapshot_store().consultar(
+            analise, desde=_epoch(desde), ate=_epoch(ate), limite=limite, incluir_valor=incluir_valor
+        )
+        return {"analise": analise, "total": len(registros), "registros": registros}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar histórico: {str(e)}")
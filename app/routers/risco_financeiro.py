@@ -1,9 +1,7 @@
 from fastapi import APIRouter, HTTPException
-from app.services.financial_risk_service import FinancialRiskService
-import asyncio
+from app.services.analysis_graph import get_analysis_graph
 
 router = APIRouter()
-financial_risk_service = FinancialRiskService()
 
 @router.get(
     "/risco-financeiro", 
@@ -29,13 +27,8 @@ async def get_financial_risk_analysis():
     Valores acima de 3.0 são considerados elevados.
     """
     try:
-        # Busca os dados financeiros via scraping
-        financial_data = await financial_risk_service.fetch_financial_data()
-        
-        # Calcula o risco financeiro
-        risk_analysis = financial_risk_service.calculate_financial_risk(financial_data)
-        
-        return risk_analysis
+        # Nó "risco-financeiro" do grafo: dados da AAVE → cálculo do risco
+        return await get_analysis_graph().avaliar_no("risco-financeiro")
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,246 @@
+# app/services/aave_portfolio.py
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from eth_abi import decode, encode
+from web3 import Web3
+from app.config import get_settings
+from app.services.arbitrum_rpc import MultiRpcProvider, get_arbitrum_rpc
+
+logger = logging.getLogger(__name__)
+
+# Contratos na Arbitrum
+MULTICALL3_ADDRESS = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+AAVE_POOL_ADDRESS = Web3.to_checksum_address("0x794a61358D6845594F94dc1DB02A252b5b4814aD")
+AAVE_ORACLE_ADDRESS = Web3.to_checksum_address("0xb56c2F0B653B2e0b10C9b928C8580Ac5Df02C7C7")
+
+# A lista de reservas da AAVE muda raramente: redescoberta a cada hora
+_RESERVAS_TTL_SECONDS = 3600
+
+# AAVE v3: valores em USD com 8 casas, percentuais em bps, health factor com 18 casas
+_DECIMAIS_BASE = 10**8
+_DECIMAIS_HF = 10**18
+
+_TIPOS_ACCOUNT_DATA = ["uint256"] * 6
+
+_MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+
+def _calldata(assinatura: str, tipos: Sequence[str] = (), args: Sequence[Any] = ()) -> bytes:
+    """Seletor da função + argumentos codificados em ABI"""
+    return Web3.keccak(text=assinatura)[:4] + encode(list(tipos), list(args))
+
+
+def decodificar_account_data(valores: Sequence[int]) -> Dict[str, Any]:
+    """
+    Converte o retorno bruto de Pool.getUserAccountData em valores USD/percentuais
+
+    Returns:
+        Dict com health_factor (inf sem dívida), total_collateral_usd, total_debt_usd,
+        net_asset_value_usd, available_borrows_usd, ltv e liquidation_threshold (em %)
+    """
+    colateral = valores[0] / _DECIMAIS_BASE
+    divida = valores[1] / _DECIMAIS_BASE
+    hf_bruto = valores[5] / _DECIMAIS_HF
+
+    # Sem dívida o contrato devolve uint256 máximo
+    health_factor = float("inf") if divida == 0 or hf_bruto > 10**10 else hf_bruto
+
+    return {
+        "health_factor": health_factor,
+        "total_collateral_usd": colateral,
+        "total_debt_usd": divida,
+        "net_asset_value_usd": colateral - divida,
+        "available_borrows_usd": valores[2] / _DECIMAIS_BASE,
+        "liquidation_threshold": valores[3] / 100,
+        "ltv": valores[4] / 100
+    }
+
+
+def alavancagem(colateral: float, nav: float) -> float:
+    return colateral / nav if nav > 0 and colateral > 0 else 1.0
+
+
+class AavePortfolioService:
+    """
+    Posições AAVE v3 de várias carteiras em uma única chamada eth_call (Multicall3.aggregate3).
+
+    - Um aggregate3 leva getUserAccountData de todas as carteiras e os preços de todas as
+      reservas no AaveOracle, fixado no bloco L2 lido em eth_blockNumber (block.number
+      dentro da Arbitrum é o bloco L1, por isso não vem do Multicall3)
+    - O resultado fica em cache por bloco: enquanto eth_blockNumber não avança, a mesma
+      consulta não volta à rede
+    - Lista de reservas e símbolos descobertos em um aggregate3 à parte, renovado a cada hora
+    """
+
+    def __init__(self, rpc: MultiRpcProvider, carteiras: List[str]):
+        self.rpc = rpc
+        self.carteiras = [Web3.to_checksum_address(c) for c in carteiras]
+        self._lock = asyncio.Lock()
+        self._reservas: List[Tuple[str, str]] = []
+        self._reservas_expiram = 0.0
+        self._cache: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    async def consultar(self, carteiras: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Posição de cada carteira e preços das reservas
+
+        Args:
+            carteiras: Endereços a consultar (padrão: WALLET_ADDRESSES)
+
+        Returns:
+            Dict com bloco, timestamp, carteiras (HF, alavancagem, colateral, dívida, NAV...)
+            e precos_usd por símbolo
+        """
+        enderecos = tuple(Web3.to_checksum_address(c) for c in (carteiras or self.carteiras))
+        if not enderecos:
+            raise ValueError("Nenhuma carteira configurada (WALLET_ADDRESSES)")
+
+        bloco_atual = await self.rpc.block_number()
+        anterior = self._cache.get(enderecos)
+        if anterior is not None and anterior["bloco"] >= bloco_atual:
+            return anterior
+
+        async with self._lock:
+            # Outra requisição pode ter atualizado enquanto esperávamos
+            anterior = self._cache.get(enderecos)
+            if anterior is not None and anterior["bloco"] >= bloco_atual:
+                return anterior
+
+            reservas = await self._get_reservas()
+            resultado = await self._ler(enderecos, reservas, bloco_atual)
+            # Só o bloco mais recente interessa: descarta entradas antigas de outras listas
+            self._cache = {
+                k: v for k, v in self._cache.items() if v["bloco"] >= resultado["bloco"]
+            }
+            self._cache[enderecos] = resultado
+            return resultado
+
+    async def _aggregate3(self, chamadas: List[Tuple[str, bytes]],
+                          bloco: Optional[int] = None) -> List[Tuple[bool, bytes]]:
+        """Resultados (sucesso, retorno) de cada chamada, no bloco dado (padrão: latest)"""
+        calls = [(alvo, True, dados) for alvo, dados in chamadas]
+        return await self.rpc.executar(
+            lambda w3: w3.eth.contract(address=MULTICALL3_ADDRESS, abi=_MULTICALL3_ABI)
+            .functions.aggregate3(calls).call(block_identifier=bloco)
+        )
+
+    async def _get_reservas(self) -> List[Tuple[str, str]]:
+        """(endereço, símbolo) de cada reserva do Pool"""
+        if self._reservas and time.time() < self._reservas_expiram:
+            return self._reservas
+
+        [(ok, dados)] = await self._aggregate3([(AAVE_POOL_ADDRESS, _calldata("getReservesList()"))])
+        if not ok:
+            raise ValueError("Falha ao ler a lista de reservas da AAVE")
+        ativos = [Web3.to_checksum_address(a) for a in decode(["address[]"], dados)[0]]
+
+        simbolos = await self._aggregate3([(a, _calldata("symbol()")) for a in ativos])
+        self._reservas = [
+            (ativo, decode(["string"], dados)[0] if ok else ativo)
+            for ativo, (ok, dados) in zip(ativos, simbolos)
+        ]
+        self._reservas_expiram = time.time() + _RESERVAS_TTL_SECONDS
+        logger.info(f"📚 Reservas AAVE descobertas: {len(self._reservas)}")
+        return self._reservas
+
+    async def _ler(self, enderecos: Tuple[str, ...], reservas: List[Tuple[str, str]],
+                   bloco: int) -> Dict[str, Any]:
+        ativos = [ativo for ativo, _ in reservas]
+        chamadas = [(AAVE_ORACLE_ADDRESS, _calldata("getAssetsPrices(address[])", ["address[]"], [ativos]))]
+        chamadas += [
+            (AAVE_POOL_ADDRESS, _calldata("getUserAccountData(address)", ["address"], [c]))
+            for c in enderecos
+        ]
+
+        inicio = time.monotonic()
+        respostas = await self._aggregate3(chamadas, bloco)
+        (ok_precos, dados_precos), *contas = respostas
+
+        precos = {}
+        if ok_precos:
+            (valores,) = decode(["uint256[]"], dados_precos)
+            precos = {simbolo: v / _DECIMAIS_BASE for (_, simbolo), v in zip(reservas, valores)}
+        else:
+            logger.warning("⚠️ AaveOracle não respondeu no multicall, seguindo sem preços")
+
+        carteiras = []
+        for endereco, (ok, dados) in zip(enderecos, contas):
+            if not ok:
+                carteiras.append({"endereco": endereco, "error": "getUserAccountData falhou"})
+                continue
+            conta = decodificar_account_data(decode(_TIPOS_ACCOUNT_DATA, dados))
+            hf = conta["health_factor"]
+            carteiras.append({
+                "endereco": endereco,
+                # JSON não representa infinito: sem dívida o HF vem como null
+                "health_factor": None if hf == float("inf") else round(hf, 4),
+                "alavancagem": round(alavancagem(conta["total_collateral_usd"], conta["net_asset_value_usd"]), 4),
+                "total_collateral_usd": conta["total_collateral_usd"],
+                "total_debt_usd": conta["total_debt_usd"],
+                "net_asset_value_usd": conta["net_asset_value_usd"],
+                "available_borrows_usd": conta["available_borrows_usd"],
+                "ltv": conta["ltv"],
+                "liquidation_threshold": conta["liquidation_threshold"]
+            })
+
+        logger.info(
+            f"📦 Multicall AAVE: {len(enderecos)} carteira(s), {len(precos)} preço(s) "
+            f"no bloco {bloco} em {time.monotonic() - inicio:.2f}s"
+        )
+        return {
+            "bloco": bloco,
+            "timestamp": datetime.now().isoformat(),
+            "carteiras": carteiras,
+            "precos_usd": precos
+        }
+
+
+_service: Optional[AavePortfolioService] = None
+_service_lock = threading.Lock()
+
+
+def get_aave_portfolio() -> AavePortfolioService:
+    """Serviço compartilhado das carteiras em WALLET_ADDRESSES (ou WALLET_ADDRESS)"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                lista = get_settings().WALLET_ADDRESSES or os.getenv("WALLET_ADDRESS", "")
+                carteiras = [c.strip() for c in lista.split(",") if c.strip()]
+                _service = AavePortfolioService(get_arbitrum_rpc(), carteiras)
+    return _service
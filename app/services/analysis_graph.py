@@ -0,0 +1,212 @@
+# app/services/analysis_graph.py
+
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from tvDatafeed import Interval
+
+logger = logging.getLogger(__name__)
+
+# Timeframes baixados pelo nó de candles (união dos usados por RSI, divergências e EMAs)
+interval_map = {
+    "15m": Interval.in_15_minute,
+    "30m": Interval.in_30_minute,
+    "1h": Interval.in_1_hour,
+    "4h": Interval.in_4_hour,
+    "1d": Interval.in_daily,
+    "1w": Interval.in_weekly
+}
+
+
+def ultimas_barras(frames: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    Timestamp e fechamento da última barra de cada timeframe do nó "candles" (entrada
+    das análises); timeframe com falha ou vazio fica None
+    """
+    return {
+        chave: f"{df.index[-1].isoformat()} {df['close'].iloc[-1]}"
+        if isinstance(df, pd.DataFrame) and not df.empty else None
+        for chave, df in frames.items()
+    }
+
+
+@dataclass
+class _No:
+    nome: str
+    funcao: Callable[..., Any]
+    dependencias: Tuple[str, ...]
+    assincrona: bool
+    tolera_falhas: bool
+    execucoes: int = 0
+    falhas: int = 0
+    duracao_total: float = 0.0
+
+
+class GrafoAnalises:
+    """
+    Grafo de dependências dos indicadores: cada nó declara as entradas de que precisa
+    e recebe os valores delas, na ordem declarada, como argumentos.
+
+    - avaliar() calcula os nós pedidos e tudo de que dependem, cada nó uma única vez por
+      avaliação (um nó compartilhado, como os candles, é lido uma vez e repassado)
+    - Ramos independentes rodam em paralelo: funções síncronas (TradingView, cálculo de
+      indicadores) em threads, corrotinas (Web3) no event loop
+    - Falha de um nó derruba os dependentes, exceto os registrados com tolera_falhas,
+      que recebem a exceção no lugar do valor e montam a própria resposta de erro
+    - Dependências precisam estar registradas antes do nó, o que impede ciclos
+    """
+
+    def __init__(self):
+        self._nos: Dict[str, _No] = {}
+        self.avaliacoes = 0
+
+    def registrar(self, nome: str, funcao: Callable[..., Any], dependencias: Tuple[str, ...] = (),
+                  assincrona: bool = False, tolera_falhas: bool = False):
+        """
+        Args:
+            nome: Nome do nó (chave em avaliar())
+            funcao: Recebe os valores das dependências, na ordem declarada (corrotina se assincrona=True)
+            dependencias: Nós de entrada, já registrados
+            tolera_falhas: Dependência com falha chega como exceção em vez de abortar o nó
+
+        Raises:
+            ValueError: se o nome já existir ou alguma dependência não estiver registrada
+        """
+        if nome in self._nos:
+            raise ValueError(f"Nó '{nome}' já registrado")
+        faltando = [d for d in dependencias if d not in self._nos]
+        if faltando:
+            raise ValueError(f"Nó '{nome}' depende de nós não registrados: {', '.join(faltando)}")
+        self._nos[nome] = _No(nome=nome, funcao=funcao, dependencias=tuple(dependencias),
+                              assincrona=assincrona, tolera_falhas=tolera_falhas)
+
+    def nomes(self) -> List[str]:
+        return list(self._nos)
+
+    async def avaliar(self, *alvos: str) -> Dict[str, Any]:
+        """
+        Calcula os nós `alvos` (e suas dependências) em uma única avaliação
+
+        Returns:
+            Dicionário nome -> valor, um item por alvo
+
+        Raises:
+            KeyError: se algum alvo não estiver registrado
+            Exception: a falha do primeiro nó que não pôde ser calculado
+        """
+        for alvo in alvos:
+            if alvo not in self._nos:
+                raise KeyError(f"Nó '{alvo}' não registrado")
+
+        self.avaliacoes += 1
+        tarefas: Dict[str, asyncio.Future] = {}
+        valores = await asyncio.gather(*(self._tarefa(alvo, tarefas) for alvo in alvos))
+        return dict(zip(alvos, valores))
+
+    async def avaliar_no(self, nome: str) -> Any:
+        """Atalho para o valor de um único nó"""
+        return (await self.avaliar(nome))[nome]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "avaliacoes": self.avaliacoes,
+            "nos": {
+                nome: {
+                    "dependencias": list(no.dependencias),
+                    "execucoes": no.execucoes,
+                    "falhas": no.falhas,
+                    "duracao_media_ms": round(1000 * no.duracao_total / no.execucoes, 1) if no.execucoes else None
+                }
+                for nome, no in self._nos.items()
+            }
+        }
+
+    def _tarefa(self, nome: str, tarefas: Dict[str, asyncio.Future]) -> asyncio.Future:
+        """Tarefa do nó nesta avaliação, criada na primeira vez que alguém precisa dele"""
+        if nome not in tarefas:
+            tarefa = asyncio.ensure_future(self._resolver(self._nos[nome], tarefas))
+            # Falha já propagada a quem aguardava (ou a ninguém, se outro ramo abortou antes)
+            tarefa.add_done_callback(lambda t: t.cancelled() or t.exception())
+            tarefas[nome] = tarefa
+        return tarefas[nome]
+
+    async def _resolver(self, no: _No, tarefas: Dict[str, asyncio.Future]) -> Any:
+        entradas = await asyncio.gather(
+            *(self._tarefa(dep, tarefas) for dep in no.dependencias),
+            return_exceptions=no.tolera_falhas
+        )
+
+        inicio = time.perf_counter()
+        try:
+            if no.assincrona:
+                return await no.funcao(*entradas)
+            return await asyncio.to_thread(no.funcao, *entradas)
+        except Exception as e:
+            no.falhas += 1
+            logger.warning(f"⚠️ Nó {no.nome} falhou: {str(e)}")
+            raise
+        finally:
+            no.execucoes += 1
+            no.duracao_total += time.perf_counter() - inicio
+
+
+def _registrar_nos(grafo: GrafoAnalises):
+    """Indicadores e análises de risco como nós do grafo"""
+    from app.services.tv_session_manager import get_candles_multi
+    from app.services.ema_analysis import calcular_analise_emas
+    from app.services.risk_analysis_rsi import calcular_rsi_timeframes, calculate_rsi_risk
+    from app.services.risk_analysis_divergencia import calcular_divergencias_timeframes, calculate_divergence_risk
+    from app.services.risk_analysis_trend import calculate_trend_risk
+    from app.services.risk_analysis import (
+        calculate_technical_risk, calculate_btc_structural_risk, calculate_macro_platform_risk,
+        calculate_direct_financial_risk, get_consolidated_risk_analysis
+    )
+    from app.services.financial_risk_service import get_financial_risk_service
+
+    # Todos os timeframes baixados em paralelo (uma rodada de latência), uma vez por avaliação
+    grafo.registrar("candles", lambda: get_candles_multi("BTCUSDT", "BINANCE", interval_map, n_bars=500))
+
+    # candles → RSI / divergências (o detector mantém o próprio RSI barra a barra) / EMAs
+    grafo.registrar("rsi", calcular_rsi_timeframes, ("candles",))
+    grafo.registrar("divergencias", calcular_divergencias_timeframes, ("candles",))
+    grafo.registrar("emas", calcular_analise_emas, ("candles",))
+
+    # Componentes do risco técnico: falha a montante vira componente com pontuação zero
+    grafo.registrar("risco-rsi", calculate_rsi_risk, ("rsi",), tolera_falhas=True)
+    grafo.registrar("risco-divergencias", calculate_divergence_risk, ("divergencias",), tolera_falhas=True)
+    grafo.registrar("risco-tendencia", calculate_trend_risk, ("emas",), tolera_falhas=True)
+    grafo.registrar("risco-tecnico", calculate_technical_risk, ("risco-rsi", "risco-divergencias", "risco-tendencia"))
+
+    grafo.registrar("risco-estrutural", calculate_btc_structural_risk)
+    grafo.registrar("risco-macro", calculate_macro_platform_risk)
+    grafo.registrar("risco-financeiro-direto", calculate_direct_financial_risk)
+    grafo.registrar("analise-riscos", get_consolidated_risk_analysis,
+                    ("risco-tecnico", "risco-estrutural", "risco-macro", "risco-financeiro-direto"))
+
+    # AAVE → risco financeiro (leitura on-chain reaproveitada enquanto o bloco não muda)
+    async def dados_aave():
+        return await get_financial_risk_service().fetch_financial_data()
+
+    grafo.registrar("dados-aave", dados_aave, assincrona=True)
+    grafo.registrar("risco-financeiro", lambda dados: get_financial_risk_service().calculate_financial_risk(dados),
+                    ("dados-aave",))
+
+
+_grafo: Optional[GrafoAnalises] = None
+_grafo_lock = threading.Lock()
+
+
+def get_analysis_graph() -> GrafoAnalises:
+    """Grafo compartilhado por routers e agendador"""
+    global _grafo
+    if _grafo is None:
+        with _grafo_lock:
+            if _grafo is None:
+                grafo = GrafoAnalises()
+                _registrar_nos(grafo)
+                _grafo = grafo
+    return _grafo
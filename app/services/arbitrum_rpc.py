@@ -0,0 +1,173 @@
+# app/services/arbitrum_rpc.py
+
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from web3 import AsyncWeb3
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Peso da última medição na média móvel exponencial de latência
+_EWMA_ALPHA = 0.3
+
+# Quarentena após falha: dobra a cada falha consecutiva até o limite
+_QUARENTENA_BASE_SECONDS = 5.0
+_QUARENTENA_MAX_SECONDS = 300.0
+
+# Latência assumida para endpoints ainda sem medição (entram no topo do ranking)
+_LATENCIA_INICIAL = 0.0
+
+# Marca "nenhum endpoint do grupo respondeu" (None pode ser um resultado válido)
+_SEM_RESULTADO = object()
+
+
+@dataclass
+class _RpcEndpoint:
+    url: str
+    w3: AsyncWeb3
+    latencia_ewma: float = _LATENCIA_INICIAL
+    sucessos: int = 0
+    falhas: int = 0
+    falhas_seguidas: int = 0
+    quarentena_ate: float = 0.0
+
+    def score(self, agora: float) -> float:
+        """Menor é melhor: latência média, com endpoints em quarentena no fim da fila"""
+        penalidade = 1e6 if agora < self.quarentena_ate else 0.0
+        return penalidade + self.latencia_ewma
+
+    def registrar_sucesso(self, latencia: float):
+        self.latencia_ewma = latencia if self.sucessos == 0 else (
+            _EWMA_ALPHA * latencia + (1 - _EWMA_ALPHA) * self.latencia_ewma
+        )
+        self.sucessos += 1
+        self.falhas_seguidas = 0
+        self.quarentena_ate = 0.0
+
+    def registrar_falha(self):
+        self.falhas += 1
+        self.falhas_seguidas += 1
+        quarentena = min(_QUARENTENA_MAX_SECONDS, _QUARENTENA_BASE_SECONDS * 2 ** (self.falhas_seguidas - 1))
+        self.quarentena_ate = time.time() + quarentena
+
+
+class MultiRpcProvider:
+    """
+    Cliente JSON-RPC assíncrono sobre vários endpoints da mesma rede.
+
+    - Cada endpoint tem seu AsyncWeb3 e uma média móvel de latência
+    - Cada chamada vai em paralelo para os `hedge` endpoints mais rápidos; vale a primeira
+      resposta válida e as demais são canceladas
+    - Se todos falharem, tenta os restantes um a um (failover); endpoints com falha
+      ficam em quarentena crescente e voltam ao ranking ao responder
+    - Nenhuma chamada bloqueia o event loop; sem conexão na construção
+    """
+
+    def __init__(self, urls: List[str], timeout_seconds: float = 10.0, hedge: int = 2):
+        if not urls:
+            raise ValueError("Nenhum endpoint RPC configurado")
+        self.timeout_seconds = timeout_seconds
+        self.hedge = max(1, hedge)
+        self.endpoints = [
+            _RpcEndpoint(url=url, w3=AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(url)))
+            for url in urls
+        ]
+
+    async def executar(self, fn: Callable[[AsyncWeb3], Awaitable[T]]) -> T:
+        """
+        Executa `fn(w3)` no melhor endpoint disponível
+
+        Args:
+            fn: Corrotina que recebe um AsyncWeb3 (ex: lambda w3: w3.eth.block_number)
+
+        Raises:
+            ConnectionError: se nenhum endpoint respondeu
+        """
+        agora = time.time()
+        ranking = sorted(self.endpoints, key=lambda e: e.score(agora))
+        erros = []
+
+        resultado = await self._hedge(ranking[:self.hedge], fn, erros)
+        if resultado is not _SEM_RESULTADO:
+            return resultado
+
+        for endpoint in ranking[self.hedge:]:
+            resultado = await self._hedge([endpoint], fn, erros)
+            if resultado is not _SEM_RESULTADO:
+                return resultado
+
+        raise ConnectionError(f"Nenhum RPC respondeu: {'; '.join(erros)}")
+
+    async def block_number(self) -> int:
+        return await self.executar(lambda w3: w3.eth.block_number)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        agora = time.time()
+        return [
+            {
+                "url": e.url,
+                "latencia_ms": round(e.latencia_ewma * 1000, 1),
+                "sucessos": e.sucessos,
+                "falhas": e.falhas,
+                "em_quarentena": agora < e.quarentena_ate
+            }
+            for e in sorted(self.endpoints, key=lambda e: e.score(agora))
+        ]
+
+    async def _chamar(self, endpoint: _RpcEndpoint, fn: Callable[[AsyncWeb3], Awaitable[T]]) -> T:
+        inicio = time.monotonic()
+        try:
+            resultado = await asyncio.wait_for(fn(endpoint.w3), timeout=self.timeout_seconds)
+        except asyncio.CancelledError:
+            # Perdeu a corrida do hedge: não conta como falha
+            raise
+        except Exception:
+            endpoint.registrar_falha()
+            raise
+        endpoint.registrar_sucesso(time.monotonic() - inicio)
+        return resultado
+
+    async def _hedge(self, endpoints: List[_RpcEndpoint], fn, erros: List[str]):
+        tarefas = {asyncio.ensure_future(self._chamar(e, fn)): e for e in endpoints}
+        try:
+            pendentes = set(tarefas)
+            while pendentes:
+                prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in prontas:
+                    if tarefa.exception() is None:
+                        return tarefa.result()
+                    endpoint = tarefas[tarefa]
+                    logger.warning(f"⚠️ RPC {endpoint.url} falhou: {tarefa.exception()!r}")
+                    erros.append(f"{endpoint.url}: {tarefa.exception()!r}")
+            return _SEM_RESULTADO
+        finally:
+            for tarefa in tarefas:
+                if not tarefa.done():
+                    tarefa.cancel()
+
+
+_provider: Optional[MultiRpcProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_arbitrum_rpc() -> MultiRpcProvider:
+    """Provider compartilhado dos endpoints ARBITRUM_RPC_URLS"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                settings = get_settings()
+                urls = [u.strip() for u in settings.ARBITRUM_RPC_URLS.split(",") if u.strip()]
+                _provider = MultiRpcProvider(
+                    urls,
+                    timeout_seconds=settings.ARBITRUM_RPC_TIMEOUT_SECONDS,
+                    hedge=settings.ARBITRUM_RPC_HEDGE
+                )
+                logger.info(f"🔗 Provider Arbitrum com {len(urls)} endpoint(s), hedge={settings.ARBITRUM_RPC_HEDGE}")
+    return _provider
@@ -2,11 +2,16 @@
 
 import os
 import math
-from tvDatafeed import TvDatafeed, Interval
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from tvDatafeed import Interval
 from app.config import get_settings
+from app.services.tv_session_manager import get_candles
+from app.utils.http_client import http_get
 import logging
 from app.utils.m2_utils import get_m2_global_momentum
+from app.utils.ema_utils import get_ema_engine
 from typing import Tuple
 from app.utils.puell_multiple_util import get_puell_multiple_analysis
 
@@ -43,17 +48,17 @@ def safe_float(value, fallback=0.0):
         return fallback
 
 
-def get_btc_vs_200d_ema(tv: TvDatafeed):
+def get_btc_vs_200d_ema():
     """
     Analisa a força do bull market baseado na posição do BTC vs EMA 200D
     Retorna score de 0-10 com classificação em 5 níveis
     """
     try:
-        df = tv.get_hist(symbol="BTCUSDT", exchange="BINANCE", interval=Interval.in_daily, n_bars=250)
-        df["EMA_200"] = df["close"].ewm(span=200, adjust=False).mean()
+        df = get_candles(symbol="BTCUSDT", exchange="BINANCE", interval=Interval.in_daily, n_bars=250)
+        emas = get_ema_engine("BTCUSDT", "BINANCE", Interval.in_daily.value, [200]).sincronizar(df)
         latest = df.iloc[-1]
         close = safe_float(latest["close"])
-        ema200 = safe_float(df["EMA_200"].iloc[-1])
+        ema200 = safe_float(emas["EMA_200"])
         
         if close <= 0 or ema200 <= 0:
             raise ValueError("Preços inválidos coletados")
@@ -140,7 +145,7 @@ def _get_bull_market_range(variacao_pct):
     else:
         return "< 0%"
 
-def get_btc_vs_realized_price(tv: TvDatafeed):
+def get_btc_vs_realized_price():
     """
     VERSÃO COM LOGS DETALHADOS para identificar valores fixos
     """
@@ -149,7 +154,7 @@ def get_btc_vs_realized_price(tv: TvDatafeed):
         
         # Buscar preço atual do BTC
         logging.info("📊 [DEBUG] Buscando preço atual BTC via TradingView...")
-        df = tv.get_hist(symbol="BTCUSDT", exchange="BINANCE", interval=Interval.in_daily, n_bars=1)
+        df = get_candles(symbol="BTCUSDT", exchange="BINANCE", interval=Interval.in_daily, n_bars=1)
         preco_atual = safe_float(df.iloc[-1]["close"])
         
         logging.info(f"💰 [DEBUG] Preço atual obtido: ${preco_atual:,.2f}")
@@ -281,9 +286,6 @@ def get_puell_multiple():
     try:
         logging.info("⛏️ Coletando Puell Multiple...")
         
-        # Import e chamada do utilitário completo
-        from app.utils.puell_multiple_utils import get_puell_multiple_analysis
-        
         # Retorna resultado completo pronto
         return get_puell_multiple_analysis()
         
@@ -318,7 +320,7 @@ def get_funding_rates_analysis():
     try:
         url = "https://fapi.binance.com/fapi/v1/fundingRate"
         params = {"symbol": "BTCUSDT", "limit": 56}
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -523,22 +525,14 @@ def _get_m2_from_apis():
 
 
 def _get_m2_from_notion():
-    """Busca M2 do Notion - MANTIDO"""
+    """Busca M2 do Notion (índice compartilhado com a análise de fundamentos)"""
     try:
-        from notion_client import Client
-        settings = get_settings()
-        notion = Client(auth=settings.NOTION_TOKEN)
-        DATABASE_ID = settings.NOTION_DATABASE_ID_MACRO.strip().replace('"', '')
-        
-        response = notion.databases.query(database_id=DATABASE_ID)
+        from app.utils.notion_utils import get_notion_indicators
+        indice = get_notion_indicators().indice()
         
-        for row in response["results"]:
-            props = row["properties"]
-            nome = props["indicador"]["title"][0]["plain_text"].strip().lower()
-            
-            if nome in ["m2_global", "m2_momentum", "expansao_global"]:
-                valor = safe_float(props["valor"]["number"], 2.0)
-                return valor
+        for nome in ["m2_global", "m2_momentum", "expansao_global"]:
+            if indice.get(nome) is not None:
+                return safe_float(indice[nome], 2.0)
                 
         return 2.0
         
@@ -588,7 +582,78 @@ def _generate_resumo_executivo(score_consolidado):
         }
 
 
-def analyze_btc_cycles(tv):
+# Coletores executados em paralelo: um indicador lento (BigQuery, M2) não atrasa os demais.
+# Threads que estouram o prazo continuam em background e liberam o worker ao terminar,
+# por isso o pool tem folga acima do número de indicadores
+_coleta_executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="ciclos")
+
+
+def _get_coletores():
+    """Retorna (nome, função, timeout em segundos) de cada indicador, na ordem do relatório"""
+    settings = get_settings()
+    return [
+        # 1. BTC vs EMA 200D (30%) - TradingView
+        ("BTC vs EMA 200D", get_btc_vs_200d_ema, settings.CICLOS_TIMEOUT_EMA_200D_SECONDS),
+        # 2. BTC vs Realized Price (30%) - UTXOs BLOCKCHAIN REAIS
+        ("BTC vs Realized Price", get_btc_vs_realized_price, settings.CICLOS_TIMEOUT_REALIZED_PRICE_SECONDS),
+        # 3. Puell Multiple (20%)
+        ("Puell Multiple", get_puell_multiple, settings.CICLOS_TIMEOUT_PUELL_SECONDS),
+        # 4. M2 Global Momentum (15%) - TradingView + Notion fallback
+        ("M2 Global Momentum", get_m2_global_momentum, settings.CICLOS_TIMEOUT_M2_SECONDS),
+        # 5. Funding Rates 7D (5%) - Binance API
+        ("Funding Rates 7D Média", get_funding_rates_analysis, settings.CICLOS_TIMEOUT_FUNDING_SECONDS),
+    ]
+
+
+def _indicador_indisponivel(nome: str, status: str, motivo: str) -> dict:
+    """Resposta padrão para indicador que estourou o prazo ou falhou na coleta"""
+    return {
+        "indicador": nome,
+        "fonte": "TIMEOUT" if status == "timeout" else "ERRO",
+        "status": status,
+        "valor_coletado": status,
+        "score": 0.0,
+        "score_ponderado (score × peso)": 0.0,
+        "classificacao": "Dados indisponíveis",
+        "observação": motivo,
+        "detalhes": {
+            "racional": f"Indicador excluído do score nesta execução: {motivo}"
+        }
+    }
+
+
+def _coletar_indicadores():
+    """
+    Executa todos os coletores em paralelo, cada um com seu próprio prazo
+    
+    Returns:
+        Tuple (indicadores na ordem original, nomes dos indicadores indisponíveis)
+    """
+    coletores = _get_coletores()
+    inicio = time.monotonic()
+    futures = [(nome, _coleta_executor.submit(func), timeout) for nome, func, timeout in coletores]
+
+    indicadores = []
+    indisponiveis = []
+    for nome, future, timeout in futures:
+        # Prazo contado a partir do disparo, não do fim da espera anterior
+        restante = max(0.0, timeout - (time.monotonic() - inicio))
+        try:
+            indicadores.append(future.result(timeout=restante))
+        except FuturesTimeoutError:
+            logging.warning(f"⏱️ {nome} excedeu o prazo de {timeout}s - resposta parcial")
+            indicadores.append(_indicador_indisponivel(nome, "timeout", f"Coleta excedeu o prazo de {timeout}s"))
+            indisponiveis.append(nome)
+        except Exception as e:
+            logging.error(f"❌ Erro ao coletar {nome}: {str(e)}")
+            indicadores.append(_indicador_indisponivel(nome, "erro", f"Erro ao coletar {nome}: {str(e)}"))
+            indisponiveis.append(nome)
+
+    logging.info(f"⏱️ Coleta de indicadores concluída em {time.monotonic() - inicio:.2f}s")
+    return indicadores, indisponiveis
+
+
+def analyze_btc_cycles():
     """
     Análise de ciclos BTC - VERSÃO REFATORADA
     - Realized Price via UTXOs blockchain REAIS (novo utilitário)
@@ -596,35 +661,11 @@ def analyze_btc_cycles(tv):
     - Validações de segurança JSON
     - Campo detalhes completo e padronizado
     - Resumo executivo incluído
-    - Código mais limpo e organizado
+    - Coleta paralela com prazo por indicador (resposta parcial em caso de timeout)
     """
     try:
-        indicadores = []
-        
-        # 1. BTC vs EMA 200D (30%) - TradingView
-        logging.info("📊 Coletando BTC vs EMA 200D...")
-        btc_ema_data = get_btc_vs_200d_ema(tv)
-        indicadores.append(btc_ema_data)
-        
-        # 2. BTC vs Realized Price (30%) - UTXOs BLOCKCHAIN REAIS (NOVO!)
-        logging.info("🔗 Coletando BTC vs Realized Price via UTXOs reais...")
-        realized_data = get_btc_vs_realized_price(tv)
-        indicadores.append(realized_data)
-        
-        # 3. Puell Multiple (20%) - Notion (próximo a ser refatorado)
-        logging.info("⛏️ Coletando Puell Multiple...")
-        puell_data = get_puell_multiple()
-        indicadores.append(puell_data)
-        
-        # 4. M2 Global Momentum (15%) - TradingView + Notion fallback
-        logging.info("💰 Coletando M2 Global Momentum...")
-        m2_data = get_m2_global_momentum()
-        indicadores.append(m2_data)
-        
-        # 5. Funding Rates 7D (5%) - Binance API
-        logging.info("📈 Coletando Funding Rates...")
-        funding_data = get_funding_rates_analysis()
-        indicadores.append(funding_data)
+        logging.info("📊 Coletando indicadores de ciclo em paralelo...")
+        indicadores, indisponiveis = _coletar_indicadores()
         
         # Calcular score consolidado SEGURO
         scores_ponderados = []
@@ -673,6 +714,8 @@ def analyze_btc_cycles(tv):
             "classificacao": classificacao_final,
             "observacao": observacao_final,
             "resumo_executivo": resumo_executivo,
+            "parcial": bool(indisponiveis),
+            "indicadores_indisponiveis": indisponiveis,
             "indicadores": indicadores
         }
         
@@ -689,5 +732,8 @@ def analyze_btc_cycles(tv):
                 "gestao_risco": "Não operar até sistema estar funcional",
                 "outlook": "Erro técnico - consulte administrador do sistema"
             },
+            # Mesmo formato da resposta normal: nenhum indicador entrou no score
+            "parcial": True,
+            "indicadores_indisponiveis": [nome for nome, _, _ in _get_coletores()],
             "indicadores": []
         }
\ No newline at end of file
@@ -0,0 +1,74 @@
+# app/services/ema_analysis.py
+
+import pandas as pd
+from typing import Dict, Any
+from tvDatafeed import Interval
+from app.utils.ema_utils import get_ema_engine, analisar_timeframe, consolidar_scores
+
+interval_map = {
+    "15m": Interval.in_15_minute,
+    "1h": Interval.in_1_hour,
+    "4h": Interval.in_4_hour,
+    "1d": Interval.in_daily,
+    "1w": Interval.in_weekly
+}
+
+emas_list = [17, 34, 144, 305, 610]
+
+
+def calcular_analise_emas(frames: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calcula a análise de EMAs de todos os timeframes (nó "emas" do grafo de análises,
+    compartilhado pelo router de EMAs e pelo risco de tendência)
+    
+    Args:
+        frames: Candles por timeframe, como retornados por get_candles_multi
+    
+    Returns:
+        Dict com EMAs e análise por timeframe, preço/volume atuais e score consolidado
+        
+    Raises:
+        ValueError: se algum timeframe não puder ser processado
+    """
+    result = {"emas": {}}
+    price = None
+    volume = None
+    analises = {}
+
+    for key, interval in interval_map.items():
+        try:
+            df = frames[key]
+            if isinstance(df, Exception):
+                raise df
+
+            if not isinstance(df, pd.DataFrame) or df.empty:
+                raise ValueError(f"Sem dados retornados para o intervalo {key}")
+
+            # EMAs incrementais: só as barras fechadas desde a última leitura são aplicadas
+            engine = get_ema_engine("BTCUSDT", "BINANCE", interval.value, emas_list)
+            emas_timeframe = engine.sincronizar(df)
+            latest = df.iloc[-1]
+
+            if price is None:
+                price = latest["close"]
+                volume = latest.get("volume", 0.0)
+
+            precos_timeframe = latest["close"]
+
+            analise = analisar_timeframe(precos_timeframe, emas_timeframe)
+            analises[key] = analise
+
+            result["emas"][key] = {
+                **emas_timeframe,
+                "analise": analise
+            }
+
+        except Exception as e:
+            raise ValueError(f"Erro ao processar intervalo {key}: {str(e)}") from e
+
+    result["preco_atual"] = price
+    result["volume_atual"] = volume
+    result["consolidado"] = consolidar_scores(analises)
+
+    return result
+
@@ -1,12 +1,16 @@
-import requests
+import asyncio
 import datetime
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import os
 import json
 import time
+import threading
 from web3 import Web3
 from decimal import Decimal
+from app.services.arbitrum_rpc import get_arbitrum_rpc
+from app.services.aave_portfolio import get_aave_portfolio
+from app.utils.http_client import http_aget
 
 # Configura o logger
 logging.basicConfig(level=logging.INFO)
@@ -18,56 +22,19 @@ class FinancialRiskService:
         self.wallet_address = os.getenv("WALLET_ADDRESS", "").lower()
         logger.info(f"Inicializando serviço de risco financeiro para carteira: {self.wallet_address}")
         
-        # Configuração do Web3
-        self.w3 = None
-        self.initialize_web3()
+        # Provider assíncrono com vários RPCs (nenhuma conexão aqui: os endpoints são
+        # medidos e ranqueados nas próprias consultas)
+        self.rpc = get_arbitrum_rpc()
         
         # Contratos AAVE v3 na Arbitrum
-        self.aave_pool_address = "0x794a61358D6845594F94dc1DB02A252b5b4814aD"  # Aave v3 Pool na Arbitrum
+        self.aave_pool_address = Web3.to_checksum_address("0x794a61358D6845594F94dc1DB02A252b5b4814aD")  # Aave v3 Pool na Arbitrum
         self.aave_pool_abi = self.load_abi("aave_pool")
-        self.aave_pool_contract = None
         
-        if self.w3:
-            try:
-                self.aave_pool_contract = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(self.aave_pool_address),
-                    abi=self.aave_pool_abi
-                )
-                logger.info("Contrato AAVE Pool inicializado com sucesso")
-            except Exception as e:
-                logger.error(f"Erro ao inicializar contrato AAVE: {str(e)}")
-        
-        # Cache
+        # Cache da leitura on-chain, válido enquanto a Arbitrum não avança de bloco
         self.cache = None
+        self.cache_bloco = None
         self.last_fetch = None
-        self.cache_duration = datetime.timedelta(minutes=10)  # Cache válido por 10 minutos
-    
-    def initialize_web3(self):
-        """Inicializa a conexão Web3 com RPC público"""
-        try:
-            # Tenta vários RPCs públicos disponíveis
-            rpc_endpoints = [
-                "https://arb1.arbitrum.io/rpc",
-                "https://arbitrum-one.public.blastapi.io",
-                "https://endpoints.omniatech.io/v1/arbitrum/one/public",
-                "https://arbitrum.blockpi.network/v1/rpc/public"
-            ]
-            
-            for rpc_url in rpc_endpoints:
-                try:
-                    logger.info(f"Tentando conectar ao RPC: {rpc_url}")
-                    self.w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 30}))
-                    if self.w3.is_connected():
-                        logger.info(f"Web3 conectado com sucesso: {rpc_url}")
-                        return
-                except Exception as e:
-                    logger.warning(f"Falha ao conectar a {rpc_url}: {str(e)}")
-            
-            logger.error("Não foi possível conectar a nenhum RPC público")
-            self.w3 = None
-        except Exception as e:
-            logger.error(f"Erro ao inicializar Web3: {str(e)}")
-            self.w3 = None
+        self._lock = asyncio.Lock()
     
     def load_abi(self, name):
         """Carrega ABI a partir de um arquivo ou retorna um ABI mínimo necessário"""
@@ -99,9 +66,6 @@ class FinancialRiskService:
         """Busca dados financeiros da carteira na AAVE v3 via Web3 ou APIs de fallback"""
         current_time = datetime.datetime.now()
         
-        # Remover verificação de cache para sempre buscar dados atualizados
-        logger.info("Buscando dados financeiros atualizados")
-        
         # Verificar se o endereço da carteira está definido
         if not self.wallet_address:
             logger.error("Endereço de carteira não definido na variável de ambiente WALLET_ADDRESS")
@@ -113,32 +77,53 @@ class FinancialRiskService:
                 "error": "Endereço de carteira não configurado",
                 "timestamp": current_time.isoformat()
             }
-            
+        
+        # eth_blockNumber é barato: a leitura do contrato só é refeita quando a chain avança
+        bloco = await self._bloco_atual()
+        if bloco is not None and self.cache_bloco == bloco:
+            logger.info(f"♻️ Dados financeiros do bloco {bloco} reaproveitados")
+            return self.cache
+        
+        async with self._lock:
+            # Requisições simultâneas no mesmo bloco esperam a mesma leitura
+            if bloco is not None and self.cache_bloco == bloco:
+                return self.cache
+            return await self._buscar_dados(current_time, bloco)
+    
+    async def _bloco_atual(self) -> Optional[int]:
+        try:
+            return await self.rpc.block_number()
+        except Exception as e:
+            logger.warning(f"Falha ao consultar eth_blockNumber: {str(e)}")
+            return None
+    
+    async def _buscar_dados(self, current_time: datetime.datetime, bloco: Optional[int]) -> Dict[str, Any]:
+        logger.info(f"Buscando dados financeiros atualizados (bloco {bloco})")
         try:
             logger.info(f"Buscando dados financeiros para carteira: {self.wallet_address}")
             
             # Primeiro tentar via Web3 diretamente (mais confiável)
-            if self.w3 and self.aave_pool_contract and self.w3.is_connected():
-                try:
-                    result = await self.get_data_from_web3()
-                    if result and "error" not in result:
-                        # Atualiza o cache (para possível uso em caso de falha futura)
-                        self.cache = result
-                        self.last_fetch = current_time
-                        return result
-                except Exception as e:
-                    logger.warning(f"Falha ao obter dados via Web3: {str(e)}")
+            try:
+                result = await self.get_data_from_web3()
+                if result and "error" not in result:
+                    # Leitura on-chain: vale até o próximo bloco
+                    self.cache = result
+                    self.cache_bloco = bloco
+                    self.last_fetch = current_time
+                    return result
+            except Exception as e:
+                logger.warning(f"Falha ao obter dados via Web3: {str(e)}")
             
             # Se Web3 falhar, tentar via APIs
             logger.info("Web3 falhou ou não está disponível, tentando APIs alternativas")
             
             # Tentar obter dados via Debank API
-            data = self._get_debank_protocol_data(self.wallet_address)
+            data = await self._get_debank_protocol_data(self.wallet_address)
             
             # Se não conseguir via Debank, tentar via APIs oficiais da AAVE (fallback)
             if not data or "error" in data:
                 logger.warning(f"Falha na API Debank: {data.get('error', 'Erro desconhecido')}")
-                data = self._get_aave_data_with_fallback(self.wallet_address)
+                data = await self._get_aave_data_with_fallback(self.wallet_address)
             
             if "error" in data:
                 logger.error(f"Erro ao obter dados financeiros: {data.get('error')}")
@@ -189,8 +174,9 @@ class FinancialRiskService:
             if "asset_details" in data:
                 result["asset_details"] = data["asset_details"]
             
-            # Atualiza o cache (apenas para casos de falha futura)
+            # Dados das APIs não são atrelados a um bloco: não entram no cache por bloco
             self.cache = result
+            self.cache_bloco = None
             self.last_fetch = current_time
             
             logger.info(f"Dados financeiros obtidos com sucesso: HF={health_factor}, Collateral=${total_collateral}, Debt=${total_debt}, NAV=${nav}, Leverage={leverage}")
@@ -213,10 +199,12 @@ class FinancialRiskService:
         try:
             logger.info(f"Consultando contrato AAVE via Web3 para carteira: {self.wallet_address}")
             
-            # Consulta os dados do usuário diretamente do contrato AAVE
-            user_data = self.aave_pool_contract.functions.getUserAccountData(
-                Web3.to_checksum_address(self.wallet_address)
-            ).call()
+            # Consulta os dados do usuário diretamente do contrato AAVE (RPC mais rápido vence)
+            wallet = Web3.to_checksum_address(self.wallet_address)
+            user_data = await self.rpc.executar(
+                lambda w3: w3.eth.contract(address=self.aave_pool_address, abi=self.aave_pool_abi)
+                .functions.getUserAccountData(wallet).call()
+            )
             
             # Decodifica os resultados (os valores estão em wei com 8 casas decimais)
             decimals = 10**8  # AAVE v3 usa 8 casas decimais para valores em USD
@@ -267,7 +255,33 @@ class FinancialRiskService:
             logger.warning(f"Falha ao obter dados via Web3: {str(e)}")
             return {"error": f"Falha ao consultar contrato: {str(e)}"}
     
-    def _get_aave_data_official_api(self, wallet_address):
+    async def fetch_portfolio_data(self, carteiras: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Posição e risco de várias carteiras lidos em um único multicall
+
+        Args:
+            carteiras: Endereços a consultar (padrão: WALLET_ADDRESSES)
+        """
+        portfolio = await get_aave_portfolio().consultar(carteiras)
+
+        # O resultado do multicall fica em cache por bloco: não altera o original
+        carteiras_risco = []
+        for carteira in portfolio["carteiras"]:
+            item = dict(carteira)
+            if "error" not in item:
+                hf = item["health_factor"]
+                risco = self.calculate_financial_risk({**item, "health_factor": float('inf') if hf is None else hf})
+                item["risco"] = {
+                    "score": risco["score"],
+                    "principais_alertas": risco["principais_alertas"],
+                    "health_factor": risco["detalhes"]["health_factor"]["classificacao"],
+                    "alavancagem": risco["detalhes"]["alavancagem"]["classificacao"]
+                }
+            carteiras_risco.append(item)
+
+        return {**portfolio, "carteiras": carteiras_risco}
+
+    async def _get_aave_data_official_api(self, wallet_address):
         """Obter dados da AAVE v3 na Arbitrum usando a API official da AAVE"""
         try:
             logger.info("Tentando método API oficial v1 da AAVE")
@@ -277,7 +291,7 @@ class FinancialRiskService:
             # Endpoint da API oficial da AAVE para v3
             url = f"https://app.aave.com/api/v1/data/user-summary?address={wallet_address}&network={network_id}"
             
-            response = requests.get(url, timeout=10)
+            response = await http_aget(url)
             if response.status_code != 200:
                 return {"error": f"Erro ao acessar API: {response.status_code}"}
                 
@@ -339,13 +353,13 @@ class FinancialRiskService:
             logger.warning(f"Falha no método API oficial v1: {str(e)}")
             return {"error": f"Erro ao processar dados: {str(e)}"}
     
-    def _get_aave_data_alternative(self, wallet_address):
+    async def _get_aave_data_alternative(self, wallet_address):
         """Endpoint alternativo da API AAVE para dados de usuário"""
         try:
             logger.info("Tentando método API alternativa v3 da AAVE")
             url = f"https://api.aave.com/data/v3/users/{wallet_address}/summary?networkId=42161"
             
-            response = requests.get(url, timeout=10)
+            response = await http_aget(url)
             if response.status_code != 200:
                 return {"error": f"Erro ao acessar API alternativa: {response.status_code}"}
                 
@@ -389,13 +403,13 @@ class FinancialRiskService:
             logger.warning(f"Falha no método API alternativa v3: {str(e)}")
             return {"error": f"Erro ao processar dados alternativos: {str(e)}"}
 
-    def _get_ui_api_data(self, wallet_address):
+    async def _get_ui_api_data(self, wallet_address):
         """Obter dados via UI API"""
         try:
             logger.info("Tentando método UI API da AAVE")
             # URL para dados do pool
             pool_api_url = "https://app.aave.com/api/v1/ui-pool-data?networkId=42161&lendingPoolAddressProvider=0xa97684ead0e402dC232d5A9779DDf7ECBaB3CDdb"
-            response = requests.get(pool_api_url, timeout=10)
+            response = await http_aget(pool_api_url)
             
             if response.status_code != 200:
                 logger.error(f"Erro ao acessar UI API (pool data): {response.status_code}")
@@ -405,7 +419,7 @@ class FinancialRiskService:
             
             # URL para dados do usuário
             user_api_url = f"https://app.aave.com/api/v1/user-data?networkId=42161&lendingPoolAddressProvider=0xa97684ead0e402dC232d5A9779DDf7ECBaB3CDdb&userAddress={wallet_address}"
-            user_response = requests.get(user_api_url, timeout=10)
+            user_response = await http_aget(user_api_url)
             
             if user_response.status_code != 200:
                 logger.error(f"Erro ao acessar UI API (user data): {user_response.status_code}")
@@ -453,7 +467,7 @@ class FinancialRiskService:
             logger.warning(f"Falha no método UI API: {str(e)}")
             return {"error": f"Erro ao processar dados UI API: {str(e)}"}
 
-    def _get_debank_protocol_data(self, wallet_address):
+    async def _get_debank_protocol_data(self, wallet_address):
         """
         Obter dados da AAVE v3 na Arbitrum via Debank API
         Esta API é pública e confiável, sendo usada por várias carteiras e aplicações
@@ -471,7 +485,7 @@ class FinancialRiskService:
             }
             
             # Fazer a requisição
-            response = requests.get(url, headers=headers, timeout=15)
+            response = await http_aget(url, headers=headers, timeout=15)
             
             if response.status_code != 200:
                 logger.error(f"Erro ao acessar Debank API (protocol): {response.status_code}")
@@ -532,7 +546,7 @@ class FinancialRiskService:
                 try:
                     # Usando a API alternativa da AAVE só para o healthFactor
                     hf_url = f"https://aave-api-v2.aave.com/data/users/{wallet_address}/arbitrum/0xa97684ead0e402dc232d5a9799df7ecbab3cddb"
-                    hf_response = requests.get(hf_url, timeout=10)
+                    hf_response = await http_aget(hf_url)
                     
                     if hf_response.status_code == 200:
                         hf_data = hf_response.json()
@@ -564,22 +578,22 @@ class FinancialRiskService:
             logger.warning(f"Falha no método Debank API: {str(e)}")
             return {"error": f"Erro ao processar dados Debank: {str(e)}"}
 
-    def _get_aave_data_with_fallback(self, wallet_address):
+    async def _get_aave_data_with_fallback(self, wallet_address):
         """
         Tentar obter dados usando vários métodos diferentes com fallback
         """
         # Primeiro método - API oficial
-        result = self._get_aave_data_official_api(wallet_address)
+        result = await self._get_aave_data_official_api(wallet_address)
         if "error" not in result:
             return result
         
         # Segundo método - API alternativa
-        result_alt = self._get_aave_data_alternative(wallet_address)
+        result_alt = await self._get_aave_data_alternative(wallet_address)
         if "error" not in result_alt:
             return result_alt
         
         # Terceiro método - UI API
-        result_ui = self._get_ui_api_data(wallet_address)
+        result_ui = await self._get_ui_api_data(wallet_address)
         if "error" not in result_ui:
             return result_ui
         
@@ -685,4 +699,18 @@ class FinancialRiskService:
                     "peso": leverage_weight
                 }
             }
-        }
\ No newline at end of file
+        }
+
+
+_service: Optional[FinancialRiskService] = None
+_service_lock = threading.Lock()
+
+
+def get_financial_risk_service() -> FinancialRiskService:
+    """Instância compartilhada por todos os endpoints (um provider RPC, um cache)"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = FinancialRiskService()
+    return _service
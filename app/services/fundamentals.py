@@ -1,18 +1,18 @@
 # app/services/fundamentals.py
 
 import math
-import requests
 import pandas as pd
 import logging
 from datetime import datetime, timedelta
-from requests.exceptions import HTTPError
+from app.utils.notion_utils import get_notion_indicators
+from app.utils.http_client import http_get
 
 COINGECKO_URL     = "https://api.coingecko.com/api/v3/coins/bitcoin"
 COINMETRICS_BASE  = "https://community-api.coinmetrics.io/v4/timeseries/asset-metrics"
 FRED_M2_CSV       = "https://fred.stlouisfed.org/graph/fredgraph.csv?id=M2SL"
 
 def _fetch_coingecko() -> dict:
-    resp = requests.get(
+    resp = http_get(
         COINGECKO_URL,
         params={"localization": "false", "tickers": "false", "market_data": "true"}
     )
@@ -34,7 +34,7 @@ def _fetch_coinmetrics_timeseries(metric: str, days: int = 365) -> (float, float
         "start_time": start,
         "end_time": end
     }
-    resp = requests.get(COINMETRICS_BASE, params=params)
+    resp = http_get(COINMETRICS_BASE, params=params)
     resp.raise_for_status()
     data = resp.json().get("data", [])
     if len(data) >= 2:
@@ -45,50 +45,28 @@ def _fetch_coinmetrics_timeseries(metric: str, days: int = 365) -> (float, float
 
 def get_model_variance() -> dict:
     try:
-        from notion_client import Client
-        from app.config import get_settings
-        settings = get_settings()
-        NOTION_TOKEN = settings.NOTION_TOKEN
-        
-        # Obter o ID do banco de dados e verificar se é válido
-        DATABASE_ID = settings.NOTION_DATABASE_ID_MACRO.strip().replace('"', '')
-        
-        # Verificar se o DATABASE_ID não está vazio
-        if not DATABASE_ID:
-            logging.error("DATABASE_ID está vazio. Verifique a variável NOTION_DATABASE_ID_MACRO no arquivo .env")
-            raise ValueError("DATABASE_ID não pode ser vazio.")
-            
-        logging.info(f"Model Variance - DATABASE_ID: {DATABASE_ID}")
-        notion = Client(auth=NOTION_TOKEN)
-
-        response = notion.databases.query(database_id=DATABASE_ID)
-        for row in response["results"]:
-            props = row["properties"]
-            nome = props["indicador"]["title"][0]["plain_text"].strip().lower()
-            if nome == "model_variance":
-                valor = float(props["valor"]["number"])
+        # Índice do database carregado uma vez e compartilhado entre os indicadores
+        valor = get_notion_indicators().valor("model_variance")
 
-                # Ajustando a lógica conforme a documentação
-                if valor <= -1.4:
-                    score = 3
-                elif valor <= -0.8:
-                    score = 2
-                elif valor <= -0.3:
-                    score = 1
-                else:
-                    score = 0
+        # Ajustando a lógica conforme a documentação
+        if valor <= -1.4:
+            score = 3
+        elif valor <= -0.8:
+            score = 2
+        elif valor <= -0.3:
+            score = 1
+        else:
+            score = 0
 
-                peso = 0.35
-                return {
-                    "indicador": "Model Variance (S2F)",
-                    "fonte": "Notion API",
-                    "valor": round(valor, 2),
-                    "pontuacao_bruta": score,
-                    "peso": peso,
-                    "pontuacao_ponderada": round((score / 3) * peso, 4)
-                }
-
-        raise ValueError("Indicador 'model_variance' não encontrado.")
+        peso = 0.35
+        return {
+            "indicador": "Model Variance (S2F)",
+            "fonte": "Notion API",
+            "valor": round(valor, 2),
+            "pontuacao_bruta": score,
+            "peso": peso,
+            "pontuacao_ponderada": round((score / 3) * peso, 4)
+        }
     except Exception as e:
         peso = 0.35
         return {
@@ -104,49 +82,27 @@ def get_model_variance() -> dict:
 def get_mvrv_zscore() -> dict:
     peso = 0.25
     try:
-        from notion_client import Client
-        from app.config import get_settings
-        settings = get_settings()
-        NOTION_TOKEN = settings.NOTION_TOKEN
-        
-        # Obter o ID do banco de dados e verificar se é válido
-        DATABASE_ID = settings.NOTION_DATABASE_ID_MACRO.strip().replace('"', '')
-        
-        # Verificar se o DATABASE_ID não está vazio
-        if not DATABASE_ID:
-            logging.error("DATABASE_ID está vazio. Verifique a variável NOTION_DATABASE_ID_MACRO no arquivo .env")
-            raise ValueError("DATABASE_ID não pode ser vazio.")
-            
-        logging.info(f"MVRV Z-Score - DATABASE_ID: {DATABASE_ID}")
-        notion = Client(auth=NOTION_TOKEN)
-
-        response = notion.databases.query(database_id=DATABASE_ID)
-        for row in response["results"]:
-            props = row["properties"]
-            nome = props["indicador"]["title"][0]["plain_text"].strip().lower()
-            if nome == "mvrv":
-                valor = float(props["valor"]["number"])
+        # Índice do database carregado uma vez e compartilhado entre os indicadores
+        valor = get_notion_indicators().valor("mvrv")
 
-                # Atualizando as regras conforme documentação
-                if valor < 2.0:
-                    score = 2
-                elif valor < 2.5:
-                    score = 1.5
-                elif valor < 5.0:
-                    score = 1
-                else:
-                    score = 0
+        # Atualizando as regras conforme documentação
+        if valor < 2.0:
+            score = 2
+        elif valor < 2.5:
+            score = 1.5
+        elif valor < 5.0:
+            score = 1
+        else:
+            score = 0
 
-                return {
-                    "indicador": "MVRV Z-Score",
-                    "fonte": "Notion API",
-                    "valor": round(valor, 2),
-                    "pontuacao_bruta": score,
-                    "peso": peso,
-                    "pontuacao_ponderada": round((score / 3) * peso, 4)
-                }
-
-        raise ValueError("Indicador 'mvrv' não encontrado.")
+        return {
+            "indicador": "MVRV Z-Score",
+            "fonte": "Notion API",
+            "valor": round(valor, 2),
+            "pontuacao_bruta": score,
+            "peso": peso,
+            "pontuacao_ponderada": round((score / 3) * peso, 4)
+        }
     except Exception as e:
         return {
             "indicador": "MVRV Z-Score",
@@ -161,47 +117,25 @@ def get_mvrv_zscore() -> dict:
 def get_vdd_multiple() -> dict:
     peso = 0.20
     try:
-        from notion_client import Client
-        from app.config import get_settings
-        settings = get_settings()
-        NOTION_TOKEN = settings.NOTION_TOKEN
-        
-        # Obter o ID do banco de dados e verificar se é válido
-        DATABASE_ID = settings.NOTION_DATABASE_ID_MACRO.strip().replace('"', '')
-        
-        # Verificar se o DATABASE_ID não está vazio
-        if not DATABASE_ID:
-            logging.error("DATABASE_ID está vazio. Verifique a variável NOTION_DATABASE_ID_MACRO no arquivo .env")
-            raise ValueError("DATABASE_ID não pode ser vazio.")
-            
-        logging.info(f"VDD Multiple - DATABASE_ID: {DATABASE_ID}")
-        notion = Client(auth=NOTION_TOKEN)
-
-        response = notion.databases.query(database_id=DATABASE_ID)
-        for row in response["results"]:
-            props = row["properties"]
-            nome = props["indicador"]["title"][0]["plain_text"].strip().lower()
-            if nome == "vdd_multiple":
-                valor = float(props["valor"]["number"])
+        # Índice do database carregado uma vez e compartilhado entre os indicadores
+        valor = get_notion_indicators().valor("vdd_multiple")
 
-                # Atualizando as regras conforme documentação
-                if valor < 1.0:
-                    score = 2
-                elif valor < 2.0:
-                    score = 1
-                else:
-                    score = 0
+        # Atualizando as regras conforme documentação
+        if valor < 1.0:
+            score = 2
+        elif valor < 2.0:
+            score = 1
+        else:
+            score = 0
 
-                return {
-                    "indicador": "VDD Multiple",
-                    "fonte": "Notion API",
-                    "valor": round(valor, 2),
-                    "pontuacao_bruta": score,
-                    "peso": peso,
-                    "pontuacao_ponderada": round((score / 3) * peso, 4)
-                }
-
-        raise ValueError("Indicador 'vdd_multiple' não encontrado.")
+        return {
+            "indicador": "VDD Multiple",
+            "fonte": "Notion API",
+            "valor": round(valor, 2),
+            "pontuacao_bruta": score,
+            "peso": peso,
+            "pontuacao_ponderada": round((score / 3) * peso, 4)
+        }
     except Exception as e:
         return {
             "indicador": "VDD Multiple",
@@ -216,49 +150,27 @@ def get_vdd_multiple() -> dict:
 def get_global_m2_expansion() -> dict:
     peso = 0.20
     try:
-        from notion_client import Client
-        from app.config import get_settings
-        settings = get_settings()
-        NOTION_TOKEN = settings.NOTION_TOKEN
-        
-        # Obter o ID do banco de dados e verificar se é válido
-        DATABASE_ID = settings.NOTION_DATABASE_ID_MACRO.strip().replace('"', '')
-        
-        # Verificar se o DATABASE_ID não está vazio
-        if not DATABASE_ID:
-            logging.error("DATABASE_ID está vazio. Verifique a variável NOTION_DATABASE_ID_MACRO no arquivo .env")
-            raise ValueError("DATABASE_ID não pode ser vazio.")
-            
-        logging.info(f"Global M2 Expansion - DATABASE_ID: {DATABASE_ID}")
-        notion = Client(auth=NOTION_TOKEN)
-
-        response = notion.databases.query(database_id=DATABASE_ID)
-        for row in response["results"]:
-            props = row["properties"]
-            nome = props["indicador"]["title"][0]["plain_text"].strip().lower()
-            if nome == "m2_global":
-                valor = float(props["valor"]["number"])
+        # Índice do database carregado uma vez e compartilhado entre os indicadores
+        valor = get_notion_indicators().valor("m2_global")
 
-                # Atualizando as regras conforme documentação
-                if valor > 3:
-                    score = 2
-                elif valor >= 1 and valor <= 3:
-                    score = 1
-                elif valor >= -1 and valor < 1:
-                    score = 0
-                else:  # Valor < -1
-                    score = 0
+        # Atualizando as regras conforme documentação
+        if valor > 3:
+            score = 2
+        elif valor >= 1 and valor <= 3:
+            score = 1
+        elif valor >= -1 and valor < 1:
+            score = 0
+        else:  # Valor < -1
+            score = 0
 
-                return {
-                    "indicador": "Expansão Global M2 (6m)",
-                    "fonte": "Notion API",
-                    "valor": round(valor, 2),
-                    "pontuacao_bruta": score,
-                    "peso": peso,
-                    "pontuacao_ponderada": round((score / 3) * peso, 4)
-                }
-
-        raise ValueError("Indicador 'm2_global' não encontrado.")
+        return {
+            "indicador": "Expansão Global M2 (6m)",
+            "fonte": "Notion API",
+            "valor": round(valor, 2),
+            "pontuacao_bruta": score,
+            "peso": peso,
+            "pontuacao_ponderada": round((score / 3) * peso, 4)
+        }
     except Exception as e:
         return {
             "indicador": "Expansão Global M2 (6m)",
@@ -2,26 +2,19 @@
 import logging
 import os
 from typing import Dict, List, Any, Tuple
-from app.services.risk_analysis_rsi import calculate_rsi_risk
-from app.services.risk_analysis_divergencia import calculate_divergence_risk
-from app.services.risk_analysis_trend import calculate_trend_risk
 
-def calculate_technical_risk() -> Dict[str, Any]:
+def calculate_technical_risk(rsi_risk_component: Dict[str, Any],
+                             divergence_risk_component: Dict[str, Any],
+                             trend_risk_component: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calcula o risco técnico com base em EMAs, IFR e Divergências por timeframe.
     
+    Os componentes de RSI (sobrecompra), divergências RSI e tendência (EMAs) chegam
+    calculados pelo grafo de análises, sobre os mesmos candles.
+    
     Pontuação máxima: 25 pontos
     Peso na ponderação estratégica: 0.15
     """
-    # Calcular o componente de risco de RSI (sobrecompra)
-    rsi_risk_component = calculate_rsi_risk()
-    
-    # Calcular o componente de risco de divergências RSI
-    divergence_risk_component = calculate_divergence_risk()
-    
-    # Calcular o componente de risco de tendência (baseado em EMAs)
-    trend_risk_component = calculate_trend_risk()
-    
     # Valores fixos para teste dos outros componentes
     emas_risk = {
         "1W": 0.0,  # +2.0 se fraco
@@ -246,20 +239,15 @@ def get_risk_classification(score: float) -> Dict[str, str]:
             "descricao": "Reduzir máximo possível da exposição, risco sistêmico alto."
         }
 
-def get_consolidated_risk_analysis() -> Dict[str, Any]:
+def get_consolidated_risk_analysis(technical_risk: Dict[str, Any], structural_risk: Dict[str, Any],
+                                   macro_platform_risk: Dict[str, Any], financial_risk: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Realiza a análise de risco completa, calculando todos os componentes 
-    e consolidando em uma pontuação final normalizada.
+    Realiza a análise de risco completa, consolidando os blocos de risco (calculados
+    em paralelo pelo grafo de análises) em uma pontuação final normalizada.
     
     Returns:
         Dicionário contendo todos os componentes da análise de risco
     """
-    # Calcular os blocos de risco
-    technical_risk = calculate_technical_risk()
-    structural_risk = calculate_btc_structural_risk()
-    macro_platform_risk = calculate_macro_platform_risk()
-    financial_risk = calculate_direct_financial_risk()
-    
     # Lista com todos os blocos calculados
     risk_blocks = [technical_risk, structural_risk, macro_platform_risk, financial_risk]
     
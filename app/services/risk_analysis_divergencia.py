@@ -1,6 +1,4 @@
-from app.services.tv_session_manager import get_tv_instance
-from app.utils.rsi_utils import calcular_rsi
-from app.utils.divergence_utils import detectar_divergencias, analisar_divergencias_rsi_risco
+from app.utils.divergence_utils import get_divergence_detector, analisar_divergencias_rsi_risco
 from tvDatafeed import Interval
 import pandas as pd
 from typing import Dict, Any
@@ -14,45 +12,63 @@ interval_map = {
     "1w": Interval.in_weekly
 }
 
-def get_divergence_data() -> Dict[str, Dict[str, Any]]:
+def calcular_divergencias_timeframes(frames: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Obtém os dados de divergências RSI de todos os timeframes
+    Avança os detectores de divergência de cada timeframe com os candles
+    (nó "divergencias" do grafo de análises)
     
+    Args:
+        frames: Candles por timeframe, como retornados por get_candles_multi
+        
     Returns:
-        Dicionário com análises de divergência por timeframe
+        Dicionário com a análise por timeframe; timeframe sem dados traz a exceção no lugar da análise
     """
-    tv = get_tv_instance()
-    divergencias = {}
-    
+    leituras = {}
+
     for key, interval in interval_map.items():
         try:
-            df = tv.get_hist(symbol="BTCUSDT", exchange="BINANCE", interval=interval, n_bars=500)
+            df = frames[key]
+            if isinstance(df, Exception):
+                raise df
             
             if not isinstance(df, pd.DataFrame) or df.empty:
-                continue
+                raise ValueError(f"Sem dados retornados para o intervalo {key}")
                 
-            # Calcular RSI
-            df = calcular_rsi(df, periodo=14)
-            
-            # Detectar divergências com janela de extremos reduzida e mais candles para análise
-            divergencias[key] = detectar_divergencias(df, janela_extremos=3, janela_analise=120)
+            # Detector incremental: só processa as barras fechadas desde a última leitura
+            detector = get_divergence_detector("BTCUSDT", "BINANCE", interval.value, janela_extremos=3, janela_analise=120)
+            leituras[key] = detector.sincronizar(df)
                 
-        except Exception:
-            # Silently continue if we can't get data for a timeframe
-            continue
+        except Exception as e:
+            leituras[key] = e
     
-    return divergencias
+    return leituras
 
-def calculate_divergence_risk() -> Dict[str, Any]:
+def get_divergence_data(leituras: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Filtra as análises de divergência válidas das leituras por timeframe
+    
+    Returns:
+        Dicionário com análises de divergência por timeframe
+    """
+    # Timeframes com erro ficam de fora
+    return {key: analise for key, analise in leituras.items() if not isinstance(analise, Exception)}
+
+def calculate_divergence_risk(leituras: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calcula o componente de risco de divergências RSI para análise de risco técnico
     
+    Args:
+        leituras: Saída de calcular_divergencias_timeframes (ou a exceção do nó "divergencias")
+        
     Returns:
         Componente de risco de divergências para a análise técnica
     """
     try:
+        if isinstance(leituras, Exception):
+            raise leituras
+
         # Obter análises de divergência
-        divergencias = get_divergence_data()
+        divergencias = get_divergence_data(leituras)
         
         # Analisar risco com base nas divergências
         analise = analisar_divergencias_rsi_risco(divergencias)
@@ -1,7 +1,6 @@
 # app/services/risk_analysis_rsi.py
 
-from app.services.tv_session_manager import get_tv_instance
-from app.utils.rsi_utils import calcular_rsi, analisar_rsi_risco
+from app.utils.rsi_utils import get_rsi_engine, analisar_rsi_risco
 from tvDatafeed import Interval
 import pandas as pd
 from typing import Dict, Any, List, Tuple
@@ -17,45 +16,64 @@ interval_map = {
 
 rsi_periodo = 14
 
-def get_rsi_data() -> Dict[str, float]:
+def calcular_rsi_timeframes(frames: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Obtém os dados de RSI de todos os timeframes
+    Calcula o RSI de cada timeframe a partir dos candles (nó "rsi" do grafo de análises)
     
+    Args:
+        frames: Candles por timeframe, como retornados por get_candles_multi
+        
     Returns:
-        Dicionário com valores RSI por timeframe
+        Dicionário com o RSI por timeframe; timeframe sem dados traz a exceção no lugar do valor
     """
-    tv = get_tv_instance()
-    rsi_values = {}
-    
+    leituras = {}
+
     for key, interval in interval_map.items():
         try:
-            df = tv.get_hist(symbol="BTCUSDT", exchange="BINANCE", interval=interval, n_bars=500)
+            df = frames[key]
+            if isinstance(df, Exception):
+                raise df
             
             if not isinstance(df, pd.DataFrame) or df.empty:
-                continue
+                raise ValueError(f"Sem dados retornados para o intervalo {key}")
                 
-            df = calcular_rsi(df, periodo=rsi_periodo)
-            latest = df.iloc[-1]
-            
-            if "RSI" in latest and not pd.isna(latest["RSI"]):
-                rsi_values[key] = latest["RSI"]
+            # RSI incremental: só as barras fechadas desde a última leitura são aplicadas
+            leituras[key] = get_rsi_engine("BTCUSDT", "BINANCE", interval.value, rsi_periodo).sincronizar(df)
                 
-        except Exception:
-            # Silently continue if we can't get data for a timeframe
-            continue
+        except Exception as e:
+            leituras[key] = e
     
-    return rsi_values
+    return leituras
 
-def calculate_rsi_risk() -> Dict[str, Any]:
+def get_rsi_data(leituras: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Filtra os valores de RSI válidos das leituras por timeframe
+    
+    Returns:
+        Dicionário com valores RSI por timeframe
+    """
+    # Timeframes com erro ou RSI indisponível ficam de fora
+    return {
+        key: valor for key, valor in leituras.items()
+        if not isinstance(valor, Exception) and not pd.isna(valor)
+    }
+
+def calculate_rsi_risk(leituras: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calcula o componente de risco RSI sobrecomprado para análise de risco técnico
     
+    Args:
+        leituras: Saída de calcular_rsi_timeframes (ou a exceção do nó "rsi")
+        
     Returns:
         Componente de risco RSI para a análise técnica
     """
     try:
+        if isinstance(leituras, Exception):
+            raise leituras
+
         # Obter valores RSI
-        rsi_values = get_rsi_data()
+        rsi_values = get_rsi_data(leituras)
         
         # Analisar risco com base nos valores de RSI
         analise = analisar_rsi_risco(rsi_values)
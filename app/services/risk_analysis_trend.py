@@ -1,39 +1,22 @@
 import logging
-import requests
-import os
 from typing import Dict, Any
-from app.config import get_settings
 
-def calculate_trend_risk() -> Dict[str, Any]:
+def calculate_trend_risk(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calcula o componente de risco de tendência para análise de risco técnico.
     
     Inverte a lógica da pontuação do endpoint de EMAs (quanto maior o score EMAs, 
     menor o risco de tendência). Normaliza para uma escala de 0-10 para risco.
     
+    Args:
+        data: Análise de EMAs (nó "emas" do grafo de análises, ou a exceção dele)
+    
     Pontuação máxima: 10 pontos
     """
     try:
-        settings = get_settings()
-        
-        # Detectar ambiente (Railway vs. local)
-        is_production = os.environ.get("RAILWAY_ENVIRONMENT") == "production"
-        
-        if is_production:
-            # Em produção (Railway), usar URL externa
-            base_url = "https://btc-turbo-api-production.up.railway.app/api/v1"
-        else:
-            # Em desenvolvimento local, usar localhost
-            base_url = f"http://localhost:{settings.PORT}/api/v1"
-        
-        # Consultar o endpoint de análise de EMAs
-        response = requests.get(f"{base_url}/analise-tecnica-emas")
-        if response.status_code != 200:
-            logging.error(f"Erro ao consultar endpoint de EMAs: {response.status_code}")
-            # Retornar objeto padrão em caso de erro
-            return default_trend_risk_response("Erro ao consultar dados de EMAs")
-            
-        data = response.json()
+        if isinstance(data, Exception):
+            raise data
+
         consolidado = data.get("consolidado", {})
         score_emas = consolidado.get("score", 0.0)
         
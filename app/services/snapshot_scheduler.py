@@ -0,0 +1,332 @@
+# app/services/snapshot_scheduler.py
+
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Espera antes de tentar de novo uma análise que falhou (sem passar do próximo ciclo)
+_RETENTATIVA_SECONDS = 60.0
+
+Cadencia = Callable[[float], float]
+
+
+def a_cada_barra(minutos: int, atraso_seconds: float = 0.0) -> Cadencia:
+    """Próximo fechamento de barra de `minutos` (UTC), deslocado de `atraso_seconds`"""
+    periodo = minutos * 60
+    return lambda agora: ((agora - atraso_seconds) // periodo + 1) * periodo + atraso_seconds
+
+
+def a_cada(segundos: float) -> Cadencia:
+    """Intervalo fixo a partir do fim da última execução"""
+    return lambda agora: agora + segundos
+
+
+def fingerprint(dados: Any) -> str:
+    """Hash estável (sha256 do JSON ordenado) de entradas ou resultados"""
+    conteudo = json.dumps(jsonable_encoder(dados), sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Snapshot:
+    valor: Any
+    calculado_em: float
+    valido_ate: float
+    duracao: float
+    # Dados de entrada do cálculo (última barra de cada timeframe, bloco, dia UTC...)
+    entradas: Dict[str, Any]
+    fingerprint: str
+    # Hash do resultado: base da ETag (muda exatamente quando a resposta muda)
+    hash_valor: str
+
+    @property
+    def fresco(self) -> bool:
+        return time.time() < self.valido_ate
+
+
+@dataclass
+class _Analise:
+    nome: str
+    funcao: Callable[[], Any]
+    cadencia: Cadencia
+    assincrona: bool
+    entradas: Optional[Callable[[], Dict[str, Any]]] = None
+    snapshot: Optional[Snapshot] = None
+    em_andamento: Optional[asyncio.Task] = None
+    execucoes: int = 0
+    falhas: int = 0
+    ultimo_erro: Optional[str] = None
+    ouvintes: list = field(default_factory=list)
+
+
+class SnapshotScheduler:
+    """
+    Recalcula cada análise em segundo plano na sua cadência natural e publica snapshots.
+
+    - Cada análise registrada roda em um laço próprio: calcula, publica o snapshot e dorme
+      até o próximo ciclo (fechamento de barra, virada do dia ou intervalo fixo)
+    - obter() devolve o snapshot na hora. Vencido, ele ainda é servido enquanto um
+      recálculo roda em segundo plano (stale-while-revalidate); só sem nenhum snapshot o
+      chamador espera o cálculo, e chamadas simultâneas esperam o mesmo cálculo
+    - Funções síncronas (TradingView, BigQuery, Notion) rodam em threads, fora do event loop
+    - Se o cálculo falhar, o snapshot anterior continua valendo até a próxima tentativa
+    """
+
+    def __init__(self):
+        self._analises: Dict[str, _Analise] = {}
+        self._tarefas: list = []
+
+    def registrar(self, nome: str, funcao: Callable[[], Any], cadencia: Cadencia, assincrona: bool = False,
+                  entradas: Optional[Callable[[], Dict[str, Any]]] = None):
+        """
+        Args:
+            nome: Nome da análise (chave em obter())
+            funcao: Calcula a análise (corrotina se assincrona=True)
+            cadencia: Próximo instante de recálculo a partir de um timestamp
+            entradas: Descreve os dados usados no cálculo, lida logo após ele; o fingerprint
+                do snapshot é o hash das entradas (sem entradas, o hash do resultado)
+        """
+        self._analises[nome] = _Analise(nome=nome, funcao=funcao, cadencia=cadencia,
+                                        assincrona=assincrona, entradas=entradas)
+
+    def ao_publicar(self, nome: str, ouvinte: Callable[[str, Snapshot], None]):
+        """Registra `ouvinte(nome, snapshot)`, chamado (em thread) a cada snapshot novo da análise"""
+        self._analises[nome].ouvintes.append(ouvinte)
+
+    def nomes(self) -> List[str]:
+        return list(self._analises)
+
+    async def obter(self, nome: str) -> Any:
+        """
+        Valor mais recente da análise `nome`
+
+        Raises:
+            KeyError: se a análise não estiver registrada
+            Exception: a falha do cálculo, se ainda não houver snapshot algum
+        """
+        return (await self.obter_snapshot(nome)).valor
+
+    async def obter_snapshot(self, nome: str) -> Snapshot:
+        """Como obter(), mas devolve o snapshot inteiro (valor, validade e fingerprint)"""
+        analise = self._analises[nome]
+        snapshot = analise.snapshot
+        if snapshot is not None:
+            if not snapshot.fresco:
+                self._disparar(analise)
+            return snapshot
+        # shield: requisição cancelada não derruba o cálculo que outras aguardam
+        return await asyncio.shield(self._disparar(analise))
+
+    def snapshot(self, nome: str) -> Optional[Snapshot]:
+        return self._analises[nome].snapshot
+
+    async def iniciar(self):
+        if self._tarefas:
+            return
+        for analise in self._analises.values():
+            self._tarefas.append(asyncio.create_task(self._laco(analise), name=f"snapshot:{analise.nome}"))
+        logger.info(f"⏱️ Agendador iniciado com {len(self._tarefas)} análise(s): {', '.join(self._analises)}")
+
+    async def parar(self):
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+
+    def stats(self) -> Dict[str, Any]:
+        def _iso(ts):
+            return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+        agora = time.time()
+        return {
+            nome: {
+                "calculado_em": _iso(a.snapshot.calculado_em) if a.snapshot else None,
+                "valido_ate": _iso(a.snapshot.valido_ate) if a.snapshot else None,
+                "idade_segundos": round(agora - a.snapshot.calculado_em, 1) if a.snapshot else None,
+                "fresco": a.snapshot.fresco if a.snapshot else False,
+                "duracao_segundos": round(a.snapshot.duracao, 2) if a.snapshot else None,
+                "atualizando": a.em_andamento is not None and not a.em_andamento.done(),
+                "execucoes": a.execucoes,
+                "falhas": a.falhas,
+                "ultimo_erro": a.ultimo_erro
+            }
+            for nome, a in self._analises.items()
+        }
+
+    def _disparar(self, analise: _Analise) -> asyncio.Task:
+        """Recálculo da análise, reaproveitando o que já estiver em andamento"""
+        if analise.em_andamento is None or analise.em_andamento.done():
+            analise.em_andamento = asyncio.create_task(self._calcular(analise))
+            # Recálculo disparado por obter() sem ninguém aguardando: não deixa a exceção solta
+            analise.em_andamento.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return analise.em_andamento
+
+    async def _calcular(self, analise: _Analise) -> Snapshot:
+        inicio = time.time()
+        analise.execucoes += 1
+        try:
+            if analise.assincrona:
+                valor, entradas = await analise.funcao(), self._entradas(analise)
+            else:
+                valor, entradas = await asyncio.to_thread(self._executar, analise)
+        except Exception as e:
+            analise.falhas += 1
+            analise.ultimo_erro = str(e)
+            logger.error(f"❌ Snapshot {analise.nome} falhou: {str(e)}")
+            raise
+
+        fim = time.time()
+        snapshot = Snapshot(
+            valor=valor,
+            calculado_em=fim,
+            valido_ate=analise.cadencia(fim),
+            duracao=fim - inicio,
+            entradas=entradas,
+            fingerprint=fingerprint(entradas) if entradas else fingerprint(valor),
+            hash_valor=fingerprint(valor)
+        )
+        analise.snapshot = snapshot
+        analise.ultimo_erro = None
+        logger.info(f"📸 Snapshot {analise.nome} publicado em {snapshot.duracao:.2f}s")
+
+        for ouvinte in analise.ouvintes:
+            try:
+                await asyncio.to_thread(ouvinte, analise.nome, snapshot)
+            except Exception as e:
+                logger.warning(f"⚠️ Ouvinte do snapshot {analise.nome} falhou: {str(e)}")
+        return snapshot
+
+    def _executar(self, analise: _Analise) -> Tuple[Any, Dict[str, Any]]:
+        """Cálculo síncrono e leitura das entradas, na mesma thread"""
+        return analise.funcao(), self._entradas(analise)
+
+    @staticmethod
+    def _entradas(analise: _Analise) -> Dict[str, Any]:
+        if analise.entradas is None:
+            return {}
+        try:
+            return analise.entradas()
+        except Exception as e:
+            logger.warning(f"⚠️ Entradas da análise {analise.nome} indisponíveis: {str(e)}")
+            return {}
+
+    async def _laco(self, analise: _Analise):
+        while True:
+            agora = time.time()
+            proximo = analise.cadencia(agora)
+            try:
+                await self._disparar(analise)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                proximo = min(proximo, time.time() + _RETENTATIVA_SECONDS)
+            await asyncio.sleep(max(0.0, proximo - time.time()))
+
+
+def _registrar_analises(scheduler: SnapshotScheduler):
+    """Análises servidas por snapshot e a cadência de cada uma"""
+    from app.services.analysis_graph import get_analysis_graph
+    from app.services.btc_analysis import analyze_btc_cycles
+    from app.services.fundamentals import get_all_fundamentals
+    from app.services.financial_risk_service import get_financial_risk_service
+    from app.services.tv_session_manager import get_candle_store
+    from app.utils.notion_utils import get_notion_indicators
+
+    settings = get_settings()
+    atraso = settings.AGENDADOR_ATRASO_FECHAMENTO_SECONDS
+
+    # Análises técnicas e financeiras saem do grafo de indicadores
+    def no_do_grafo(nome: str):
+        async def calcular():
+            return await get_analysis_graph().avaliar_no(nome)
+        return calcular
+
+    # EMAs e risco consolidado vencem na mesma barra: uma avaliação do grafo serve os dois
+    tecnica: Dict[str, asyncio.Task] = {}
+
+    def avaliacao_tecnica(nome: str):
+        async def calcular():
+            tarefa = tecnica.get("em_andamento")
+            if tarefa is None or tarefa.done():
+                tarefa = asyncio.ensure_future(get_analysis_graph().avaliar("emas", "analise-riscos"))
+                tarefa.add_done_callback(lambda t: t.cancelled() or t.exception())
+                tecnica["em_andamento"] = tarefa
+            return (await asyncio.shield(tarefa))[nome]
+        return calcular
+
+    # Entradas de cada análise: o que, mudando, muda o resultado
+    def dia_utc() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def entradas_candles() -> Dict[str, Any]:
+        return {"candles": get_candle_store().ultimas_barras()}
+
+    def entradas_ciclos() -> Dict[str, Any]:
+        return {"candles": get_candle_store().ultimas_barras(), "dia_utc": dia_utc()}
+
+    def entradas_fundamentos() -> Dict[str, Any]:
+        return {"dia_utc": dia_utc(), "notion": get_notion_indicators().indice()}
+
+    def entradas_financeiro() -> Dict[str, Any]:
+        # Dados das APIs REST não têm bloco: o fingerprint cai no hash do resultado
+        bloco = get_financial_risk_service().cache_bloco
+        return {"bloco": bloco} if bloco is not None else {}
+
+    # EMAs e risco técnico mudam a cada barra de 15m (menor timeframe analisado)
+    scheduler.registrar("analise-tecnica-emas", avaliacao_tecnica("emas"), a_cada_barra(15, atraso),
+                        assincrona=True, entradas=entradas_candles)
+    scheduler.registrar("analise-riscos", avaliacao_tecnica("analise-riscos"), a_cada_barra(15, atraso),
+                        assincrona=True, entradas=entradas_candles)
+    # Ciclos: preço vs EMA 200D a cada hora; BigQuery e Notion já ficam em cache pelo dia
+    scheduler.registrar("analise-ciclos", analyze_btc_cycles, a_cada_barra(60, atraso),
+                        entradas=entradas_ciclos)
+    # Fundamentos: Notion e séries on-chain diárias
+    scheduler.registrar("analise-fundamentos", get_all_fundamentals,
+                        a_cada_barra(24 * 60, settings.AGENDADOR_ATRASO_DIARIO_SECONDS),
+                        entradas=entradas_fundamentos)
+    # AAVE: o serviço só relê o contrato quando o bloco muda
+    scheduler.registrar("risco-financeiro", no_do_grafo("risco-financeiro"), a_cada(settings.AGENDADOR_AAVE_INTERVALO_SECONDS),
+                        assincrona=True, entradas=entradas_financeiro)
+
+
+def _registrar_historico(scheduler: SnapshotScheduler):
+    """Todo snapshot novo também entra no histórico persistido"""
+    from app.utils.snapshot_store import get_snapshot_store
+
+    def gravar(nome: str, snapshot: Snapshot):
+        get_snapshot_store().gravar(
+            analise=nome,
+            valor=snapshot.valor,
+            calculado_em=snapshot.calculado_em,
+            entradas=snapshot.entradas,
+            fingerprint=snapshot.fingerprint
+        )
+
+    for nome in scheduler.nomes():
+        scheduler.ao_publicar(nome, gravar)
+
+
+_scheduler: Optional[SnapshotScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_snapshot_scheduler() -> SnapshotScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                scheduler = SnapshotScheduler()
+                _registrar_analises(scheduler)
+                _registrar_historico(scheduler)
+                _scheduler = scheduler
+    return _scheduler
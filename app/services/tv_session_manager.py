@@ -1,36 +1,513 @@
 # app/services/tv_session_manager.py
 
-from tvDatafeed import TvDatafeed
+from tvDatafeed import TvDatafeed, Interval
 from app.config import get_settings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, Union
+import pandas as pd
+import threading
+import calendar
 import logging
+import time
 
-_tv_instance = None
+# ---------------------------------------------------------------------------
+# Pool de sessões TradingView
+# ---------------------------------------------------------------------------
+
+# Consulta mínima usada como prova de vida da sessão (e verificação do login)
+_PROBE_SYMBOL = ("BTCUSDT", "BINANCE")
+
+
+@dataclass
+class _TvSession:
+    slot: int
+    tv: Optional[TvDatafeed] = None
+    last_ok: float = 0.0
+    failures: int = 0
+    next_login_at: float = 0.0
+
+
+class TvSessionPool:
+    """
+    Pool de N sessões TvDatafeed autenticadas.
+
+    - TvDatafeed guarda o websocket em self.ws: cada sessão atende um chamador por vez
+      (checkout/devolução); chamadores excedentes aguardam uma sessão livre
+    - Login preguiçoso: a sessão só é criada no primeiro checkout do slot
+    - Prova de vida (get_hist de 1 barra) após o login e quando a sessão ficou ociosa
+      mais que probe_interval_seconds; falha descarta a sessão e agenda novo login
+      com backoff exponencial (limitado a max_backoff_seconds)
+    - Erros no uso também descartam a sessão: o próximo checkout refaz o login
+    - Métricas de espera por sessão, checkouts, relogins e falhas em stats()
+    """
+
+    def __init__(self, size: int, username: str, password: str,
+                 probe_interval_seconds: float = 300.0, max_backoff_seconds: float = 300.0):
+        self.size = max(1, size)
+        self.username = username
+        self.password = password
+        self.probe_interval_seconds = probe_interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._cond = threading.Condition()
+        self._idle = [_TvSession(slot=i) for i in range(self.size)]
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_timeouts = 0
+        self.logins = 0
+        self.login_failures = 0
+        self.probe_failures = 0
+        self.discarded = 0
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """
+        Empresta uma sessão autenticada e saudável
+
+        Raises:
+            TimeoutError: se nenhuma sessão ficou livre dentro do timeout
+            ConnectionError: se não foi possível autenticar uma sessão
+        """
+        session = self._acquire(timeout)
+        try:
+            tv = self._ensure_ready(session)
+            yield tv
+        except BaseException:
+            self._discard(session)
+            raise
+        finally:
+            self._release(session)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._cond:
+            return {
+                "tamanho": self.size,
+                "livres": len(self._idle),
+                "autenticadas": sum(1 for s in self._idle if s.tv is not None),
+                "checkouts": self.checkouts,
+                "espera_media_ms": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "espera_max_ms": round(self.wait_max * 1000, 2),
+                "timeouts_espera": self.wait_timeouts,
+                "logins": self.logins,
+                "falhas_login": self.login_failures,
+                "falhas_prova_vida": self.probe_failures,
+                "sessoes_descartadas": self.discarded
+            }
+
+    def _acquire(self, timeout: Optional[float]) -> _TvSession:
+        inicio = time.monotonic()
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._idle, timeout=timeout):
+                self.wait_timeouts += 1
+                raise TimeoutError(f"Nenhuma sessão TradingView livre em {timeout}s")
+            # Prioriza sessões já autenticadas, depois as que podem tentar login agora
+            agora = time.time()
+            self._idle.sort(key=lambda s: (s.tv is None, s.next_login_at > agora))
+            session = self._idle.pop(0)
+            espera = time.monotonic() - inicio
+            self.checkouts += 1
+            self.wait_total += espera
+            self.wait_max = max(self.wait_max, espera)
+        return session
+
+    def _release(self, session: _TvSession):
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    def _discard(self, session: _TvSession):
+        if session.tv is not None:
+            logging.warning(f"♻️ Descartando sessão TradingView do slot {session.slot}")
+            session.tv = None
+            with self._cond:
+                self.discarded += 1
+
+    def _ensure_ready(self, session: _TvSession) -> TvDatafeed:
+        if session.tv is not None:
+            if time.time() - session.last_ok < self.probe_interval_seconds:
+                return session.tv
+            if self._probe(session.tv):
+                session.last_ok = time.time()
+                return session.tv
+            with self._cond:
+                self.probe_failures += 1
+            logging.warning(f"⚠️ Sessão TradingView do slot {session.slot} falhou na prova de vida")
+            session.tv = None
+
+        return self._login(session)
+
+    def _login(self, session: _TvSession) -> TvDatafeed:
+        agora = time.time()
+        if agora < session.next_login_at:
+            raise ConnectionError(
+                f"Sessão TradingView indisponível (novo login em {session.next_login_at - agora:.0f}s)"
+            )
+
+        logging.info(f"🚀 Iniciando nova sessão com TradingView (slot {session.slot})...")
+        logging.info(f"🔐 Username carregado: {self.username} | Senha definida? {'✔️' if self.password else '❌'}")
+        with self._cond:
+            self.logins += 1
+
+        try:
+            tv = TvDatafeed(username=self.username, password=self.password)
+            # TvDatafeed não levanta erro em credencial inválida: a prova de vida valida o login
+            if not self._probe(tv):
+                raise ConnectionError("prova de vida falhou após o login")
+        except Exception as e:
+            session.failures += 1
+            backoff = min(self.max_backoff_seconds, 2 ** session.failures)
+            session.next_login_at = time.time() + backoff
+            with self._cond:
+                self.login_failures += 1
+            logging.error(f"❌ Falha ao conectar ou logar no TradingView (slot {session.slot}): {e} - nova tentativa em {backoff}s")
+            raise ConnectionError(f"Falha ao logar no TradingView: {e}") from e
+
+        session.tv = tv
+        session.failures = 0
+        session.next_login_at = 0.0
+        session.last_ok = time.time()
+        logging.info(f"✅ Sessão TradingView iniciada (slot {session.slot}, ID={id(tv)})")
+        return tv
+
+    @staticmethod
+    def _probe(tv: TvDatafeed) -> bool:
+        try:
+            df = tv.get_hist(symbol=_PROBE_SYMBOL[0], exchange=_PROBE_SYMBOL[1], interval=Interval.in_daily, n_bars=1)
+            return isinstance(df, pd.DataFrame) and not df.empty
+        except Exception:
+            return False
 
-def get_tv_instance():
-    global _tv_instance
-    settings = get_settings()
 
-    if _tv_instance is not None:
-        logging.info(f"♻️ Reutilizando sessão TV (ID={id(_tv_instance)})")
-        return _tv_instance
+class PooledTvDatafeed:
+    """
+    Substituto do TvDatafeed compartilhado: cada get_hist empresta uma sessão do pool,
+    então pode ser usado por várias threads ao mesmo tempo
+    """
 
-    try:
-        logging.info("🚀 Iniciando nova sessão com TradingView...")
-        logging.info(f"🔐 Username carregado: {settings.TV_USERNAME} | Senha definida? {'✔️' if settings.TV_PASSWORD else '❌'}")
+    def __init__(self, pool: TvSessionPool, checkout_timeout: Optional[float] = None):
+        self.pool = pool
+        self.checkout_timeout = checkout_timeout
 
-        _tv_instance = TvDatafeed(
-            username=settings.TV_USERNAME,
-            password=settings.TV_PASSWORD
-        )
+    def get_hist(self, *args, **kwargs) -> Optional[pd.DataFrame]:
+        with self.pool.checkout(timeout=self.checkout_timeout) as tv:
+            return tv.get_hist(*args, **kwargs)
 
-        # Testar se está logado de verdade
-        # Login presumido como bem-sucedido, método de verificação desativado
-        logging.info("⚠️ Aviso: método de verificação de login desabilitado (get_user_settings não disponível).")
 
-        logging.info(f"✅ Sessão TradingView iniciada (ID={id(_tv_instance)})")
+_tv_pool: Optional[TvSessionPool] = None
+_tv_instance: Optional[PooledTvDatafeed] = None
+_tv_pool_lock = threading.Lock()
 
-    except Exception as e:
-        logging.error(f"❌ Falha ao conectar ou logar no TradingView: {e}")
-        _tv_instance = None
 
+def get_tv_session_pool() -> TvSessionPool:
+    global _tv_pool
+    if _tv_pool is None:
+        with _tv_pool_lock:
+            if _tv_pool is None:
+                settings = get_settings()
+                _tv_pool = TvSessionPool(
+                    size=settings.TV_POOL_SIZE,
+                    username=settings.TV_USERNAME,
+                    password=settings.TV_PASSWORD,
+                    probe_interval_seconds=settings.TV_POOL_PROBE_INTERVAL_SECONDS,
+                    max_backoff_seconds=settings.TV_POOL_MAX_BACKOFF_SECONDS
+                )
+    return _tv_pool
+
+
+def get_tv_instance() -> PooledTvDatafeed:
+    """
+    Retorna o cliente TradingView compartilhado do processo (apoiado no pool de sessões)
+    """
+    global _tv_instance
+    if _tv_instance is None:
+        pool = get_tv_session_pool()
+        with _tv_pool_lock:
+            if _tv_instance is None:
+                _tv_instance = PooledTvDatafeed(pool, checkout_timeout=get_settings().TV_POOL_CHECKOUT_TIMEOUT_SECONDS)
     return _tv_instance
+
+
+# ---------------------------------------------------------------------------
+# Repositório de candles compartilhado
+# ---------------------------------------------------------------------------
+
+# Duração de cada barra em segundos (intervalos alinhados ao epoch UTC)
+_INTERVAL_SECONDS = {
+    Interval.in_1_minute: 60,
+    Interval.in_3_minute: 180,
+    Interval.in_5_minute: 300,
+    Interval.in_15_minute: 900,
+    Interval.in_30_minute: 1800,
+    Interval.in_45_minute: 2700,
+    Interval.in_1_hour: 3600,
+    Interval.in_2_hour: 7200,
+    Interval.in_3_hour: 10800,
+    Interval.in_4_hour: 14400,
+    Interval.in_daily: 86400,
+    Interval.in_weekly: 604800,
+}
+
+# 01/01/1970 foi uma quinta-feira; as barras semanais abrem na segunda (UTC)
+_WEEKLY_OFFSET_SECONDS = 4 * 86400
+
+
+def proximo_fechamento(interval: Interval, agora: Optional[float] = None) -> float:
+    """
+    Retorna o timestamp (epoch UTC) do próximo fechamento de barra do intervalo
+
+    Args:
+        interval: Intervalo do TradingView
+        agora: Timestamp de referência (padrão: time.time())
+
+    Returns:
+        Epoch em segundos do fechamento da barra corrente
+    """
+    agora = time.time() if agora is None else agora
+
+    if interval == Interval.in_monthly:
+        dt = time.gmtime(agora)
+        ano, mes = (dt.tm_year + 1, 1) if dt.tm_mon == 12 else (dt.tm_year, dt.tm_mon + 1)
+        return float(calendar.timegm((ano, mes, 1, 0, 0, 0)))
+
+    duracao = _INTERVAL_SECONDS[interval]
+    offset = _WEEKLY_OFFSET_SECONDS if interval == Interval.in_weekly else 0
+    return ((agora - offset) // duracao + 1) * duracao + offset
+
+
+CandleKey = Tuple[str, str, str]
+
+# Barras extras pedidas no refresh incremental: a barra que estava em formação
+# no último download (agora fechada) e a nova barra em formação
+_TAIL_MARGIN_BARS = 2
+
+# Mês mais longo, usado para estimar barras mensais decorridas
+_MONTH_SECONDS = 31 * 86400
+
+
+@dataclass
+class _CandleEntry:
+    df: pd.DataFrame
+    n_bars: int
+    fetched_at: float
+    expires_at: float
+
+
+@dataclass
+class _InflightFetch:
+    done: threading.Event = field(default_factory=threading.Event)
+    error: Optional[BaseException] = None
+
+
+class CandleStore:
+    """
+    Janela móvel de candles OHLCV do processo, chaveada por (symbol, exchange, interval).
+
+    - Guarda as últimas N barras por chave (N = maior n_bars já pedido) e serve
+      qualquer n_bars menor a partir do final da janela
+    - Ao expirar, baixa apenas a cauda (barras decorridas desde o último download),
+      mescla por timestamp e descarta as mais antigas; sem sobreposição com a
+      janela guardada, refaz o download completo
+    - Cada entrada expira no próximo fechamento de barra do intervalo, limitado
+      a max_age_seconds para que a barra em formação (preço atual) não fique congelada
+    - Chamadas concorrentes para a mesma chave compartilham um único get_hist (single-flight)
+    - Sempre devolve cópias: os utils adicionam colunas (EMA_*, RSI) no DataFrame
+    """
+
+    def __init__(self, max_age_seconds: int):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[CandleKey, _CandleEntry] = {}
+        self._inflight: Dict[CandleKey, _InflightFetch] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bars_downloaded = 0
+
+    def get(self, symbol: str, exchange: str, interval: Interval, n_bars: int) -> Optional[pd.DataFrame]:
+        key = (symbol, exchange, interval.value)
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.n_bars >= n_bars and entry.expires_at > time.time():
+                    self.hits += 1
+                    return entry.df.tail(n_bars).copy()
+
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    inflight = _InflightFetch()
+                    self._inflight[key] = inflight
+                    self.misses += 1
+                    break
+
+            # Outra thread já está atualizando essa janela: aguarda e reavalia
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+
+        try:
+            df = self._refresh(key, entry, symbol, exchange, interval, n_bars)
+            if not isinstance(df, pd.DataFrame) or df.empty:
+                # Não armazenar respostas vazias: a próxima chamada tenta de novo
+                return df
+            agora = time.time()
+            janela = max(n_bars, entry.n_bars) if entry is not None else n_bars
+            with self._lock:
+                self._entries[key] = _CandleEntry(
+                    df=df,
+                    n_bars=janela,
+                    fetched_at=agora,
+                    expires_at=self._expiracao(interval, agora)
+                )
+            return df.tail(n_bars).copy()
+        except BaseException as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.done.set()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "barras_baixadas": self.bars_downloaded,
+                "entradas": len(self._entries)
+            }
+
+    def ultimas_barras(self) -> Dict[str, str]:
+        """Timestamp e fechamento da última barra de cada janela guardada (entrada das análises)"""
+        with self._lock:
+            return {
+                ":".join(key): f"{entry.df.index[-1].isoformat()} {entry.df['close'].iloc[-1]}"
+                for key, entry in self._entries.items()
+            }
+
+    def proxima_expiracao(self) -> Optional[float]:
+        """Instante (epoch) em que a primeira janela guardada vence e pode mudar"""
+        with self._lock:
+            return min((entry.expires_at for entry in self._entries.values()), default=None)
+
+    def _refresh(self, key: CandleKey, entry: Optional[_CandleEntry], symbol: str, exchange: str,
+                 interval: Interval, n_bars: int) -> Optional[pd.DataFrame]:
+        """Atualiza a janela da chave, baixando só a cauda quando possível"""
+        if entry is None or entry.n_bars < n_bars:
+            return self._fetch(symbol, exchange, interval, n_bars)
+
+        janela = entry.n_bars
+        duracao = _INTERVAL_SECONDS.get(interval, _MONTH_SECONDS)
+        n_tail = int((time.time() - entry.fetched_at) // duracao) + _TAIL_MARGIN_BARS
+
+        if n_tail >= janela:
+            return self._fetch(symbol, exchange, interval, janela)
+
+        tail = self._fetch(symbol, exchange, interval, n_tail)
+        if not isinstance(tail, pd.DataFrame) or tail.empty:
+            return tail
+
+        # Sem sobreposição não há como garantir que nenhuma barra foi pulada
+        if tail.index[0] > entry.df.index[-1]:
+            logging.warning(f"⚠️ Cauda sem sobreposição para {key}, refazendo download completo")
+            return self._fetch(symbol, exchange, interval, janela)
+
+        merged = pd.concat([entry.df, tail])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        return merged.tail(janela)
+
+    def _expiracao(self, interval: Interval, agora: float) -> float:
+        return min(proximo_fechamento(interval, agora), agora + self.max_age_seconds)
+
+    def _fetch(self, symbol: str, exchange: str, interval: Interval, n_bars: int) -> Optional[pd.DataFrame]:
+        logging.info(f"📥 Baixando candles {symbol}/{exchange} {interval.value} (n_bars={n_bars})")
+        df = get_tv_instance().get_hist(symbol=symbol, exchange=exchange, interval=interval, n_bars=n_bars)
+
+        if isinstance(df, pd.DataFrame):
+            with self._lock:
+                self.bars_downloaded += len(df)
+        return df
+
+
+_candle_store: Optional[CandleStore] = None
+_candle_store_lock = threading.Lock()
+
+
+def get_candle_store() -> CandleStore:
+    global _candle_store
+    if _candle_store is None:
+        with _candle_store_lock:
+            if _candle_store is None:
+                _candle_store = CandleStore(max_age_seconds=get_settings().TV_CANDLE_MAX_AGE_SECONDS)
+    return _candle_store
+
+
+def get_candles(symbol: str, exchange: str, interval: Interval, n_bars: int = 500) -> Optional[pd.DataFrame]:
+    """
+    Substituto compartilhado de tv.get_hist: serve o mesmo frame para todos os routers
+
+    Returns:
+        Cópia do DataFrame OHLCV (ou None se o TradingView não retornou dados)
+    """
+    return get_candle_store().get(symbol, exchange, interval, n_bars)
+
+
+# ---------------------------------------------------------------------------
+# Fetcher multi-timeframe
+# ---------------------------------------------------------------------------
+
+_fetch_executor: Optional[ThreadPoolExecutor] = None
+_fetch_executor_lock = threading.Lock()
+
+
+def _get_fetch_executor() -> ThreadPoolExecutor:
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                # O tamanho do pool é o limite de websockets simultâneos abertos no TradingView
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=max(1, get_settings().TV_MAX_CONCURRENCY),
+                    thread_name_prefix="tv-fetch"
+                )
+    return _fetch_executor
+
+
+def get_candles_multi(symbol: str, exchange: str, intervals: Dict[str, Interval],
+                      n_bars: int = 500) -> Dict[str, Union[pd.DataFrame, None, Exception]]:
+    """
+    Busca vários timeframes ao mesmo tempo através do repositório de candles
+
+    Os timeframes são pedidos em paralelo, limitados a TV_MAX_CONCURRENCY conexões
+    simultâneas; os que já estão em cache retornam sem novo download.
+
+    Args:
+        symbol: Símbolo (ex: BTCUSDT)
+        exchange: Exchange (ex: BINANCE)
+        intervals: Mapa chave do timeframe -> Interval (ex: interval_map dos routers)
+        n_bars: Quantidade de barras por timeframe
+
+    Returns:
+        Dict na mesma ordem de intervals com o DataFrame de cada chave; falhas
+        individuais vêm como a exceção levantada, para o chamador tratar por timeframe
+    """
+    store = get_candle_store()
+    executor = _get_fetch_executor()
+    futures = {
+        key: executor.submit(store.get, symbol, exchange, interval, n_bars)
+        for key, interval in intervals.items()
+    }
+
+    resultado = {}
+    for key, future in futures.items():
+        try:
+            resultado[key] = future.result()
+        except Exception as e:
+            logging.error(f"❌ Falha ao buscar {symbol}/{exchange} {key}: {e}")
+            resultado[key] = e
+    return resultado
@@ -0,0 +1,172 @@
+# app/utils/bigquery_cache.py
+
+import os
+import re
+import glob
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import pandas as pd
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional
+from app.config import get_settings
+from app.utils.local_store import caminho_dados
+from app.utils.bigquery_client import get_bigquery_client, para_dataframe
+
+logger = logging.getLogger(__name__)
+
+# Tipo BigQuery de cada parâmetro, pelo tipo Python do valor
+_TIPOS_PARAMETRO = [
+    (bool, "BOOL"),
+    (int, "INT64"),
+    (float, "FLOAT64"),
+    (datetime, "TIMESTAMP"),
+    (date, "DATE"),
+    (str, "STRING"),
+]
+
+
+def normalizar_sql(query: str) -> str:
+    """Remove comentários de linha e espaços redundantes (mesma query, mesma chave)"""
+    sem_comentarios = re.sub(r"--[^\n]*", " ", query)
+    return re.sub(r"\s+", " ", sem_comentarios).strip()
+
+
+def _tipo_parametro(valor: Any) -> str:
+    for tipo, nome in _TIPOS_PARAMETRO:
+        if isinstance(valor, tipo):
+            return nome
+    raise TypeError(f"Tipo de parâmetro não suportado: {type(valor).__name__}")
+
+
+class BigQueryResultCache:
+    """
+    Cache local de resultados de query em Parquet, chaveado por (SQL normalizado, parâmetros, data UTC).
+
+    - Os arquivos ficam em <diretorio>/<data UTC>/<hash>.parquet; diretórios de dias
+      anteriores são removidos na virada do dia
+    - Cada entrada vale ttl_seconds a partir da gravação (nunca além do dia UTC da chave)
+    - Contadores de hit/miss e bytes faturados no BigQuery em stats()
+    """
+
+    def __init__(self, diretorio: str, ttl_seconds: int):
+        self.diretorio = diretorio
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_billed = 0
+
+    def consultar(self, query: str, params: Optional[Dict[str, Any]] = None,
+                  ttl_seconds: Optional[int] = None, client=None) -> pd.DataFrame:
+        """
+        Executa a query no BigQuery ou devolve o resultado gravado hoje
+
+        Args:
+            query: SQL com parâmetros nomeados (@nome)
+            params: Valores dos parâmetros (tipo BigQuery inferido do tipo Python)
+            ttl_seconds: TTL desta consulta (padrão: o do cache); 0 ou menos consulta
+                sempre o BigQuery e não grava o resultado
+            client: bigquery.Client (padrão: cliente compartilhado de get_bigquery_client)
+
+        Returns:
+            DataFrame com o resultado
+        """
+        params = params or {}
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        dia = datetime.now(timezone.utc).date().isoformat()
+        chave = self._chave(query, params, dia)
+        arquivo = os.path.join(self.diretorio, dia, f"{chave}.parquet")
+
+        if ttl > 0 and os.path.exists(arquivo) and time.time() - os.path.getmtime(arquivo) < ttl:
+            try:
+                df = pd.read_parquet(arquivo)
+                with self._lock:
+                    self.hits += 1
+                logger.info(f"💾 Cache BigQuery hit ({chave[:12]}, {len(df)} linhas)")
+                return df
+            except Exception as e:
+                logger.warning(f"⚠️ Arquivo de cache ilegível, consultando BigQuery: {str(e)}")
+
+        with self._lock:
+            self.misses += 1
+        df = self._executar(client or get_bigquery_client(), query, params)
+        if ttl > 0:
+            self._gravar(arquivo, df, dia)
+        return df
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_faturados": self.bytes_billed,
+                "arquivos": len(glob.glob(os.path.join(self.diretorio, "*", "*.parquet")))
+            }
+
+    @staticmethod
+    def _chave(query: str, params: Dict[str, Any], dia: str) -> str:
+        conteudo = json.dumps({
+            "sql": normalizar_sql(query),
+            "params": {nome: [_tipo_parametro(v), str(v)] for nome, v in sorted(params.items())},
+            "dia": dia
+        }, sort_keys=True)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def _executar(self, client, query: str, params: Dict[str, Any]) -> pd.DataFrame:
+        from google.cloud import bigquery
+
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter(nome, _tipo_parametro(valor), valor)
+            for nome, valor in params.items()
+        ])
+        job = client.query(query, job_config=job_config)
+        df = para_dataframe(job)
+
+        faturados = job.total_bytes_billed or 0
+        with self._lock:
+            self.bytes_billed += faturados
+        logger.info(f"⚡ Query BigQuery executada: {len(df)} linhas, {faturados / 1e9:.2f} GB faturados")
+        return df
+
+    def _gravar(self, arquivo: str, df: pd.DataFrame, dia: str):
+        try:
+            os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+            # Grava em arquivo temporário e renomeia: leitores nunca veem Parquet pela metade
+            temporario = f"{arquivo}.{threading.get_ident()}.tmp"
+            df.to_parquet(temporario, engine="pyarrow", index=False)
+            os.replace(temporario, arquivo)
+            self._limpar_dias_anteriores(dia)
+        except Exception as e:
+            # Falha no cache não pode derrubar a consulta
+            logger.warning(f"⚠️ Não foi possível gravar cache BigQuery: {str(e)}")
+
+    def _limpar_dias_anteriores(self, dia: str):
+        for caminho in glob.glob(os.path.join(self.diretorio, "*")):
+            if os.path.isdir(caminho) and os.path.basename(caminho) < dia:
+                shutil.rmtree(caminho, ignore_errors=True)
+
+
+_cache: Optional[BigQueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_bigquery_cache() -> BigQueryResultCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = BigQueryResultCache(
+                    diretorio=caminho_dados("bigquery_cache"),
+                    ttl_seconds=get_settings().BIGQUERY_CACHE_TTL_SECONDS
+                )
+    return _cache
+
+
+def consultar_bigquery(query: str, params: Optional[Dict[str, Any]] = None,
+                       ttl_seconds: Optional[int] = None) -> pd.DataFrame:
+    """Atalho para get_bigquery_cache().consultar(...) com o cliente compartilhado"""
+    return get_bigquery_cache().consultar(query, params, ttl_seconds)
@@ -0,0 +1,88 @@
+# app/utils/bigquery_client.py
+
+import json
+import logging
+import threading
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_credentials = None
+_client = None
+_storage_client = None
+_storage_indisponivel = False
+_lock = threading.Lock()
+
+
+def _get_credentials():
+    global _credentials
+    if _credentials is None:
+        from google.oauth2 import service_account
+
+        settings = get_settings()
+        if not settings.GOOGLE_APPLICATION_CREDENTIALS_JSON or not settings.GOOGLE_CLOUD_PROJECT:
+            raise ValueError("Credenciais Google Cloud não configuradas")
+
+        credentials_info = json.loads(settings.GOOGLE_APPLICATION_CREDENTIALS_JSON)
+        _credentials = service_account.Credentials.from_service_account_info(
+            credentials_info,
+            scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        )
+    return _credentials
+
+
+def get_bigquery_client():
+    """
+    Cliente BigQuery compartilhado do processo (criado no primeiro uso)
+
+    O mesmo cliente reaproveita credenciais e a sessão HTTP entre chamadas; a sessão
+    autorizada do google-auth renova o token quando expira.
+
+    Raises:
+        ValueError: se as credenciais não estiverem configuradas
+        ImportError: se google-cloud-bigquery não estiver instalado
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from google.cloud import bigquery
+
+                project_id = get_settings().GOOGLE_CLOUD_PROJECT
+                _client = bigquery.Client(credentials=_get_credentials(), project=project_id)
+                logger.info(f"✅ Cliente BigQuery configurado para projeto: {project_id}")
+    return _client
+
+
+def get_bigquery_storage_client():
+    """
+    Cliente da BigQuery Storage Read API para acelerar to_dataframe(), se habilitado
+
+    Returns:
+        BigQueryReadClient, ou None se BIGQUERY_USE_STORAGE_API estiver desligado ou
+        google-cloud-bigquery-storage não estiver instalado (download pela API REST)
+    """
+    global _storage_client, _storage_indisponivel
+    if not get_settings().BIGQUERY_USE_STORAGE_API or _storage_indisponivel:
+        return None
+
+    if _storage_client is None:
+        with _lock:
+            if _storage_client is None:
+                try:
+                    from google.cloud import bigquery_storage
+                except ImportError:
+                    logger.warning("⚠️ google-cloud-bigquery-storage não instalado, download via API REST")
+                    _storage_indisponivel = True
+                    return None
+                _storage_client = bigquery_storage.BigQueryReadClient(credentials=_get_credentials())
+                logger.info("✅ Cliente BigQuery Storage Read API configurado")
+    return _storage_client
+
+
+def para_dataframe(job):
+    """Baixa o resultado de um QueryJob, pela Storage Read API quando disponível"""
+    storage_client = get_bigquery_storage_client()
+    if storage_client is not None:
+        return job.result().to_dataframe(bqstorage_client=storage_client)
+    return job.result().to_dataframe(create_bqstorage_client=False)
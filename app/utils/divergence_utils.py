@@ -1,7 +1,42 @@
+import logging
+import threading
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Tuple, Optional
-from app.utils.rsi_utils import calcular_rsi
+from collections import deque
+from typing import Dict, Any, List, Tuple, Optional, Callable
+from app.utils.rsi_utils import calcular_rsi, RsiEngine
+
+def marcar_extremos(valores: np.ndarray, janela: int = 3) -> np.ndarray:
+    """
+    Marca máximos (1) e mínimos (-1) locais com janelas deslizantes do NumPy
+    
+    Para cada índice i em [janela, n - janela), o ponto é máximo local se for igual
+    ao maior valor de valores[i-janela:i+janela+1] (e mínimo, caso contrário, se for
+    igual ao menor). Reproduz o max()/min() nativo do Python inclusive com NaN:
+    o nativo ignora NaN, exceto quando o primeiro elemento da janela é NaN.
+    
+    Args:
+        valores: Array 1-D com a série
+        janela: Tamanho da janela para buscar extremos locais
+        
+    Returns:
+        Array de inteiros com 1, -1 ou 0
+    """
+    v = np.asarray(valores, dtype=float)
+    extremos = np.zeros(len(v), dtype=np.int64)
+    largura = 2 * janela + 1
+    if len(v) < largura:
+        return extremos
+    
+    janelas = np.lib.stride_tricks.sliding_window_view(v, largura)
+    centro = v[janela:len(v) - janela]
+    validas = ~np.isnan(janelas[:, 0])
+    
+    maximos = validas & (centro == np.fmax.reduce(janelas, axis=1))
+    minimos = validas & ~maximos & (centro == np.fmin.reduce(janelas, axis=1))
+    
+    extremos[janela:len(v) - janela] = np.where(maximos, 1, np.where(minimos, -1, 0))
+    return extremos
 
 def identificar_pontos_extremos(serie: pd.Series, janela: int = 3) -> pd.Series:
     """
@@ -14,18 +49,7 @@ def identificar_pontos_extremos(serie: pd.Series, janela: int = 3) -> pd.Series:
     Returns:
         Série com valores 1 (máximo local), -1 (mínimo local) ou 0
     """
-    extremos = pd.Series(0, index=serie.index)
-    
-    # Ignorar os primeiros e últimos dados da janela
-    for i in range(janela, len(serie) - janela):
-        # Verificar se é um ponto de máximo local
-        if serie.iloc[i] == max(serie.iloc[i-janela:i+janela+1]):
-            extremos.iloc[i] = 1
-        # Verificar se é um ponto de mínimo local
-        elif serie.iloc[i] == min(serie.iloc[i-janela:i+janela+1]):
-            extremos.iloc[i] = -1
-            
-    return extremos
+    return pd.Series(marcar_extremos(serie.to_numpy(dtype=float), janela), index=serie.index)
 
 def detectar_divergencias(df: pd.DataFrame, janela_extremos: int = 3, janela_analise: int = 120) -> Dict[str, Any]:
     """
@@ -51,64 +75,67 @@ def detectar_divergencias(df: pd.DataFrame, janela_extremos: int = 3, janela_ana
     df_analise['extremos_rsi'] = identificar_pontos_extremos(df_analise['RSI'], janela_extremos)
     
     # Obter pontos de extremos locais significativos 
-    df_topos = df_analise[df_analise['extremos_preco'] == 1].copy()
-    df_fundos = df_analise[df_analise['extremos_preco'] == -1].copy()
+    df_topos = df_analise[df_analise['extremos_preco'] == 1].sort_index()
+    df_fundos = df_analise[df_analise['extremos_preco'] == -1].sort_index()
     
-    # Verificar se temos pelo menos dois pontos extremos para comparar
-    divergencia_alta = False
-    divergencia_baixa = False
-    dados_divergencia_alta = None
-    dados_divergencia_baixa = None
-    
-    # Tentar encontrar divergência bearish (baixa) - topos
-    if len(df_topos) >= 2:
-        # Ordenar por data crescente e pegar os dois últimos
-        df_topos_recentes = df_topos.sort_index().tail(2)
-        
-        # Acessar os valores de preço e RSI
-        preco1 = df_topos_recentes.iloc[0]['close']
-        preco2 = df_topos_recentes.iloc[1]['close']
-        rsi1 = df_topos_recentes.iloc[0]['RSI']
-        rsi2 = df_topos_recentes.iloc[1]['RSI']
-        
-        # Verificar divergência bearish: preço forma topo MAIS ALTO, RSI forma topo MAIS BAIXO
-        if preco2 > preco1 and rsi2 < rsi1:
-            divergencia_baixa = True
-            dados_divergencia_baixa = {
-                'data_topo1': df_topos_recentes.index[0].strftime("%Y-%m-%d %H:%M"),
-                'preco_topo1': float(preco1),
-                'rsi_topo1': float(rsi1),
-                'data_topo2': df_topos_recentes.index[1].strftime("%Y-%m-%d %H:%M"),
-                'preco_topo2': float(preco2),
-                'rsi_topo2': float(rsi2),
-                'delta_preco': f'{((preco2 - preco1) / preco1 * 100):.2f}%',
-                'delta_rsi': f'{((rsi2 - rsi1) / rsi1 * 100):.2f}%'
-            }
-    
-    # Tentar encontrar divergência bullish (alta) - fundos
-    if len(df_fundos) >= 2:
-        # Ordenar por data crescente e pegar os dois últimos
-        df_fundos_recentes = df_fundos.sort_index().tail(2)
-        
-        # Acessar os valores de preço e RSI
-        preco1 = df_fundos_recentes.iloc[0]['close']
-        preco2 = df_fundos_recentes.iloc[1]['close'] 
-        rsi1 = df_fundos_recentes.iloc[0]['RSI']
-        rsi2 = df_fundos_recentes.iloc[1]['RSI']
+    topos = list(zip(df_topos.index, df_topos['close'], df_topos['RSI']))
+    fundos = list(zip(df_fundos.index, df_fundos['close'], df_fundos['RSI']))
+    
+    return _montar_resultado(topos, fundos, len(df_analise))
+
+Pivo = Tuple[pd.Timestamp, float, float]  # (data, preço, RSI)
+
+def _divergencia_baixa(topo1: Pivo, topo2: Pivo) -> Optional[Dict[str, Any]]:
+    """Divergência bearish: preço forma topo MAIS ALTO, RSI forma topo MAIS BAIXO"""
+    data1, preco1, rsi1 = topo1
+    data2, preco2, rsi2 = topo2
+    if not (preco2 > preco1 and rsi2 < rsi1):
+        return None
+    return {
+        'data_topo1': data1.strftime("%Y-%m-%d %H:%M"),
+        'preco_topo1': float(preco1),
+        'rsi_topo1': float(rsi1),
+        'data_topo2': data2.strftime("%Y-%m-%d %H:%M"),
+        'preco_topo2': float(preco2),
+        'rsi_topo2': float(rsi2),
+        'delta_preco': f'{((preco2 - preco1) / preco1 * 100):.2f}%',
+        'delta_rsi': f'{((rsi2 - rsi1) / rsi1 * 100):.2f}%'
+    }
+
+def _divergencia_alta(fundo1: Pivo, fundo2: Pivo) -> Optional[Dict[str, Any]]:
+    """Divergência bullish: preço forma fundo MAIS BAIXO, RSI forma fundo MAIS ALTO"""
+    data1, preco1, rsi1 = fundo1
+    data2, preco2, rsi2 = fundo2
+    if not (preco2 < preco1 and rsi2 > rsi1):
+        return None
+    return {
+        'data_fundo1': data1.strftime("%Y-%m-%d %H:%M"),
+        'preco_fundo1': float(preco1),
+        'rsi_fundo1': float(rsi1),
+        'data_fundo2': data2.strftime("%Y-%m-%d %H:%M"),
+        'preco_fundo2': float(preco2),
+        'rsi_fundo2': float(rsi2),
+        'delta_preco': f'{((preco2 - preco1) / preco1 * 100):.2f}%',
+        'delta_rsi': f'{((rsi2 - rsi1) / rsi1 * 100):.2f}%'
+    }
+
+def _montar_resultado(topos: List[Pivo], fundos: List[Pivo], candles_analisados: int) -> Dict[str, Any]:
+    """
+    Compara os dois últimos topos e fundos (em ordem cronológica) e monta a análise
+    
+    Args:
+        topos: Pivôs de máximo do preço
+        fundos: Pivôs de mínimo do preço
+        candles_analisados: Quantidade de candles da janela de análise
         
-        # Verificar divergência bullish: preço forma fundo MAIS BAIXO, RSI forma fundo MAIS ALTO
-        if preco2 < preco1 and rsi2 > rsi1:
-            divergencia_alta = True
-            dados_divergencia_alta = {
-                'data_fundo1': df_fundos_recentes.index[0].strftime("%Y-%m-%d %H:%M"),
-                'preco_fundo1': float(preco1),
-                'rsi_fundo1': float(rsi1),
-                'data_fundo2': df_fundos_recentes.index[1].strftime("%Y-%m-%d %H:%M"),
-                'preco_fundo2': float(preco2),
-                'rsi_fundo2': float(rsi2),
-                'delta_preco': f'{((preco2 - preco1) / preco1 * 100):.2f}%',
-                'delta_rsi': f'{((rsi2 - rsi1) / rsi1 * 100):.2f}%'
-            }
+    Returns:
+        Dict com análise de divergências
+    """
+    # Verificar se temos pelo menos dois pontos extremos para comparar
+    dados_divergencia_baixa = _divergencia_baixa(*topos[-2:]) if len(topos) >= 2 else None
+    dados_divergencia_alta = _divergencia_alta(*fundos[-2:]) if len(fundos) >= 2 else None
+    divergencia_baixa = dados_divergencia_baixa is not None
+    divergencia_alta = dados_divergencia_alta is not None
     
     # Determinar qual divergência é a mais recente
     tipo_divergencia = None
@@ -145,11 +172,149 @@ def detectar_divergencias(df: pd.DataFrame, janela_extremos: int = 3, janela_ana
         "detalhes": detalhes_divergencia,
         "divergencia_alta": divergencia_alta,
         "divergencia_baixa": divergencia_baixa,
-        "candles_analisados": len(df_analise)
+        "candles_analisados": candles_analisados
     }
     
     return resultado
 
+class DetectorDivergencias:
+    """
+    Detector de divergências preço x RSI que avança barra a barra
+    
+    Mantém os pivôs de topo/fundo já confirmados de um timeframe. Um pivô na barra i
+    só é confirmado quando a barra i + janela_extremos fecha; nesse momento ele é
+    comparado com o pivô anterior do mesmo tipo e, havendo divergência, um evento é
+    enviado aos inscritos. Apenas barras fechadas entram no estado.
+    """
+
+    def __init__(self, janela_extremos: int = 3, janela_analise: int = 120, periodo_rsi: int = 14, nome: str = ""):
+        self.janela_extremos = janela_extremos
+        self.janela_analise = janela_analise
+        self.nome = nome
+        self.rsi = RsiEngine(periodo_rsi)
+        self._inscritos: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._resetar()
+
+    def _resetar(self):
+        self.barras: deque = deque(maxlen=2 * self.janela_extremos + 1)  # (indice, data, preço, RSI)
+        self.topos: deque = deque()
+        self.fundos: deque = deque()
+        self.indice = -1
+        self.ultimo_fechado: Optional[pd.Timestamp] = None
+        self.eventos: deque = deque(maxlen=50)
+
+    def inscrever(self, callback: Callable[[Dict[str, Any]], None]):
+        """Registra um callback chamado a cada divergência confirmada"""
+        self._inscritos.append(callback)
+
+    def _processar_barra(self, data: pd.Timestamp, close: float, notificar: bool = True):
+        self.rsi.atualizar(close, data)
+        self.indice += 1
+        self.ultimo_fechado = data
+        self.barras.append((self.indice, data, close, self.rsi.valor_fechado()))
+
+        # Descartar pivôs que saíram da janela de análise (como no batch, os
+        # primeiros janela_extremos candles da janela não podem ser pivôs)
+        limite = self.indice - self.janela_analise + self.janela_extremos
+        for pivos in (self.topos, self.fundos):
+            while pivos and pivos[0][0] <= limite:
+                pivos.popleft()
+
+        if len(self.barras) < self.barras.maxlen:
+            return
+
+        # Centro da janela: confirmado agora que janela_extremos barras fecharam depois dele
+        marca = marcar_extremos(np.array([b[2] for b in self.barras]), self.janela_extremos)[self.janela_extremos]
+        if marca == 0:
+            return
+
+        indice, data_pivo, preco, rsi = self.barras[self.janela_extremos]
+        pivos, comparar, tipo = (
+            (self.topos, _divergencia_baixa, "bearish") if marca == 1
+            else (self.fundos, _divergencia_alta, "bullish")
+        )
+        anterior = pivos[-1] if pivos else None
+        pivos.append((indice, data_pivo, preco, rsi))
+
+        if anterior is None:
+            return
+        detalhes = comparar(anterior[1:], (data_pivo, preco, rsi))
+        if detalhes is None:
+            return
+
+        evento = {
+            "detector": self.nome,
+            "tipo_divergencia": tipo,
+            "confirmado_em": data.strftime("%Y-%m-%d %H:%M"),
+            "detalhes": detalhes
+        }
+        self.eventos.append(evento)
+        if notificar:
+            for callback in self._inscritos:
+                try:
+                    callback(evento)
+                except Exception as e:
+                    logging.error(f"❌ Erro no inscrito de divergências {self.nome}: {e}")
+
+    def aquecer(self, fechados: pd.DataFrame):
+        """
+        Reconstrói o estado: aquece o RSI com o histórico anterior à janela de análise
+        e reprocessa a janela barra a barra, sem notificar os inscritos
+        """
+        self._resetar()
+        inicio = max(len(fechados) - self.janela_analise, self.rsi.periodo + 1)
+        self.rsi.aquecer(fechados.iloc[:inicio])
+        self.indice = inicio - 1
+        self.ultimo_fechado = fechados.index[inicio - 1]
+        for data, close in fechados['close'].iloc[inicio:].items():
+            self._processar_barra(data, float(close), notificar=False)
+
+    def sincronizar(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Avança o detector com as barras fechadas ainda não vistas e retorna a análise atual
+        
+        Args:
+            df: DataFrame OHLCV ordenado (última linha = barra em formação)
+            
+        Returns:
+            Dict no mesmo formato de detectar_divergencias
+        """
+        with self._lock:
+            fechados = df.iloc[:-1]
+
+            if self.ultimo_fechado is None or self.ultimo_fechado not in fechados.index:
+                # Primeira leitura ou lacuna maior que a janela: reconstrução completa
+                self.aquecer(fechados)
+            else:
+                novos = fechados.loc[fechados.index > self.ultimo_fechado, 'close']
+                for data, close in novos.items():
+                    self._processar_barra(data, float(close))
+
+            return self.estado()
+
+    def estado(self) -> Dict[str, Any]:
+        """Análise de divergências a partir dos pivôs confirmados na janela de análise"""
+        return _montar_resultado(
+            [p[1:] for p in self.topos],
+            [p[1:] for p in self.fundos],
+            min(self.janela_analise, self.indice + 1)
+        )
+
+_detectores: Dict[Tuple, DetectorDivergencias] = {}
+_detectores_lock = threading.Lock()
+
+def get_divergence_detector(symbol: str, exchange: str, interval: str, janela_extremos: int = 3,
+                            janela_analise: int = 120) -> DetectorDivergencias:
+    """Retorna o DetectorDivergencias do processo para (symbol, exchange, interval, janelas)"""
+    key = (symbol, exchange, interval, janela_extremos, janela_analise)
+    with _detectores_lock:
+        detector = _detectores.get(key)
+        if detector is None:
+            detector = DetectorDivergencias(janela_extremos, janela_analise, nome=f"{symbol}:{exchange}:{interval}")
+            _detectores[key] = detector
+        return detector
+
 def analisar_divergencias_rsi_risco(divergencias: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
     """
     Analisa o risco com base nas divergências de RSI nos diferentes timeframes
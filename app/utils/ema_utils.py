@@ -1,12 +1,213 @@
 # app/utils/ema_utils.py
 
+import logging
+import threading
+import numpy as np
 import pandas as pd
+from typing import Dict, Optional, Tuple
+
+# Limite do expoente de 1/(1 - alpha) dentro de um bloco do kernel matricial:
+# e^50 ~ 5e21 mantém a soma acumulada longe de overflow e com perda de precisão desprezível
+_EXPOENTE_MAXIMO_BLOCO = 50.0
 
 def calcular_emas(df: pd.DataFrame, periods: list[int]) -> pd.DataFrame:
-    for period in periods:
-        df[f'EMA_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
+    matriz = calcular_emas_matriz(df['close'].to_numpy(dtype=float), periods)
+    for i, period in enumerate(periods):
+        df[f'EMA_{period}'] = matriz[:, i]
     return df
 
+def _alphas(periods: list[int]) -> np.ndarray:
+    return 2.0 / (np.asarray(periods, dtype=float) + 1.0)
+
+def calcular_emas_matriz(closes: np.ndarray, periods: list[int]) -> np.ndarray:
+    """
+    Calcula todas as EMAs (adjust=False) de uma vez, sem loop por período
+
+    A recursão y_t = a*x_t + (1-a)*y_{t-1} é resolvida em blocos pela forma fechada
+    y_{s+j} = w^(j+1)*y_{s-1} + a*w^j*cumsum(x_{s+i}*w^-i), com w = 1-a, vetorizada
+    sobre os períodos (e sobre as séries, se empilhadas).
+
+    Args:
+        closes: Preços de fechamento finitos, shape (n,) ou (m, n) para m timeframes empilhados
+        periods: Spans das EMAs
+
+    Returns:
+        Matriz (n, k) ou (m, n, k) com a EMA de cada período por barra
+    """
+    x = np.asarray(closes, dtype=float)
+    unica = x.ndim == 1
+    if unica:
+        x = x[None, :]
+
+    alphas = _alphas(periods)
+    w = 1.0 - alphas
+    m, n = x.shape
+    saida = np.empty((m, n, len(alphas)))
+    if n == 0:
+        return saida[0] if unica else saida
+
+    bloco = max(1, int(_EXPOENTE_MAXIMO_BLOCO / (-np.log(w)).max()))
+    y_anterior = np.repeat(x[:, :1], len(alphas), axis=1)  # semente: primeiro preço
+
+    for inicio in range(0, n, bloco):
+        trecho = x[:, inicio:inicio + bloco]
+        j = np.arange(trecho.shape[1])[:, None]
+        acumulado = np.cumsum(trecho[:, :, None] * w ** -j, axis=1)
+        y = w ** (j + 1) * y_anterior[:, None, :] + alphas * w ** j * acumulado
+        saida[:, inicio:inicio + trecho.shape[1]] = y
+        y_anterior = y[:, -1]
+
+    return saida[0] if unica else saida
+
+def calcular_emas_ultimo(closes: np.ndarray, periods: list[int]) -> np.ndarray:
+    """
+    Retorna apenas a última linha das EMAs (adjust=False), como um único produto matricial
+
+    y_{n-1} = w^(n-1)*x_0 + sum_{i>=1} a*w^(n-1-i)*x_i
+
+    Args:
+        closes: Preços de fechamento, shape (n,) ou (m, n) para m timeframes empilhados
+        periods: Spans das EMAs
+
+    Returns:
+        Vetor (k,) ou matriz (m, k) com a EMA de cada período na última barra
+    """
+    x = np.asarray(closes, dtype=float)
+    n = x.shape[-1]
+    alphas = _alphas(periods)
+    w = 1.0 - alphas
+
+    expoentes = np.arange(n - 1, -1, -1, dtype=float)
+    pesos = alphas[:, None] * w[:, None] ** expoentes
+    pesos[:, 0] = w ** (n - 1)
+
+    return x @ pesos.T
+
+
+class EmaEngine:
+    """
+    EMAs incrementais de um timeframe (mesma recursão de ewm(span=p, adjust=False))
+
+    Guarda o valor da EMA na última barra fechada para cada período e avança
+    em O(1) por barra fechada. A barra em formação (última linha do DataFrame)
+    nunca entra no estado: seu valor é derivado na leitura, a partir do preço atual.
+
+    A semente é a primeira barra do aquecimento e o estado é carregado adiante,
+    então EMAs longas (305/610) passam a refletir mais histórico do que a janela
+    de 500 barras baixada do TradingView.
+    """
+
+    def __init__(self, periods: list[int], reconciliar_a_cada: int = 50, tolerancia: float = 1e-6):
+        self.periods = list(periods)
+        self.alphas = {p: 2 / (p + 1) for p in self.periods}
+        self.reconciliar_a_cada = reconciliar_a_cada
+        self.tolerancia = tolerancia
+        self.emas_fechadas: Dict[int, float] = {}
+        self.ultimo_fechado: Optional[pd.Timestamp] = None
+        self.ancora: Optional[pd.Timestamp] = None
+        self._barras_desde_reconciliacao = 0
+        self._lock = threading.Lock()
+
+    def aquecer(self, fechados: pd.DataFrame):
+        """Inicializa o estado com o kernel vetorizado sobre as barras fechadas"""
+        ultimos = calcular_emas_ultimo(fechados['close'].to_numpy(dtype=float), self.periods)
+        self.emas_fechadas = dict(zip(self.periods, ultimos.tolist()))
+        self.ancora = fechados.index[0]
+        self.ultimo_fechado = fechados.index[-1]
+        self._barras_desde_reconciliacao = 0
+
+    def atualizar(self, close: float, timestamp: pd.Timestamp):
+        """Aplica uma nova barra fechada em O(1) por período"""
+        for p, alpha in self.alphas.items():
+            self.emas_fechadas[p] = alpha * close + (1 - alpha) * self.emas_fechadas[p]
+        self.ultimo_fechado = timestamp
+        self._barras_desde_reconciliacao += 1
+
+    def sincronizar(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Avança o estado com as barras fechadas ainda não vistas e retorna as EMAs
+        da barra em formação
+
+        Args:
+            df: DataFrame OHLCV ordenado (última linha = barra em formação)
+
+        Returns:
+            Dict {"EMA_<p>": valor} para a última linha do DataFrame
+        """
+        with self._lock:
+            fechados = df.iloc[:-1]
+
+            if fechados.empty:
+                raise ValueError("Histórico insuficiente para calcular EMAs")
+
+            if self.ultimo_fechado is None or self.ultimo_fechado not in fechados.index:
+                # Primeira leitura ou lacuna maior que a janela: aquecimento completo
+                self.aquecer(fechados)
+            else:
+                novos = fechados.loc[fechados.index > self.ultimo_fechado, 'close']
+                for timestamp, close in novos.items():
+                    self.atualizar(float(close), timestamp)
+
+                if self._barras_desde_reconciliacao >= self.reconciliar_a_cada:
+                    self.reconciliar(fechados)
+
+            return self.valores(float(df['close'].iloc[-1]))
+
+    def valores(self, preco_atual: float) -> Dict[str, float]:
+        """EMAs da barra em formação, sem alterar o estado"""
+        return {
+            f"EMA_{p}": alpha * preco_atual + (1 - alpha) * self.emas_fechadas[p]
+            for p, alpha in self.alphas.items()
+        }
+
+    def reconciliar(self, fechados: pd.DataFrame) -> Dict[int, float]:
+        """
+        Compara o estado com o cálculo completo do pandas e reaquece em caso de divergência
+
+        Enquanto a âncora estiver na janela, o pandas roda a partir dela (mesma semente).
+        Depois disso só são comparados os períodos cuja semente já não pesa na janela
+        ((1 - alpha)^n < tolerancia), pois para os demais o resultado do pandas depende
+        de onde a janela começa.
+
+        Returns:
+            Dict {periodo: diferença relativa} dos períodos comparados
+        """
+        if self.ancora in fechados.index:
+            base = fechados.loc[fechados.index >= self.ancora, 'close']
+            periodos = self.periods
+        else:
+            base = fechados['close']
+            periodos = [p for p in self.periods if (1 - self.alphas[p]) ** len(base) < self.tolerancia]
+
+        diferencas = {}
+        for p in periodos:
+            esperado = float(base.ewm(span=p, adjust=False).mean().iloc[-1])
+            diferencas[p] = abs(self.emas_fechadas[p] - esperado) / abs(esperado) if esperado else 0.0
+
+        self._barras_desde_reconciliacao = 0
+
+        divergentes = {p: d for p, d in diferencas.items() if d > self.tolerancia}
+        if divergentes:
+            logging.warning(f"⚠️ EMAs incrementais divergiram do pandas {divergentes}, reaquecendo")
+            self.aquecer(fechados)
+
+        return diferencas
+
+
+_ema_engines: Dict[Tuple, EmaEngine] = {}
+_ema_engines_lock = threading.Lock()
+
+
+def get_ema_engine(symbol: str, exchange: str, interval: str, periods: list[int]) -> EmaEngine:
+    """Retorna o EmaEngine do processo para (symbol, exchange, interval, periods)"""
+    key = (symbol, exchange, interval, tuple(periods))
+    with _ema_engines_lock:
+        engine = _ema_engines.get(key)
+        if engine is None:
+            engine = EmaEngine(periods)
+            _ema_engines[key] = engine
+        return engine
+
 def analisar_timeframe(preco, emas):
     pesos_alinhamento = {
         ("EMA_17", "EMA_34"): 1,
@@ -0,0 +1,94 @@
+# app/utils/http_cache.py
+
+import time
+from typing import Optional
+from fastapi import Response
+from starlette.datastructures import Headers
+from app.config import get_settings
+
+# Headers repetidos na resposta 304 (RFC 9110 §15.4.5); o corpo e o restante são descartados
+_HEADERS_304 = {b"etag", b"cache-control", b"vary", b"date", b"expires", b"content-location"}
+
+
+def etag(hash_conteudo: str) -> str:
+    """ETag fraca: derivada de um hash do resultado (ou das entradas), não dos bytes do corpo"""
+    return f'W/"{hash_conteudo[:32]}"'
+
+
+def cache_control(valido_ate: Optional[float] = None) -> str:
+    """
+    Cache-Control com max-age até a próxima mudança esperada dos dados
+
+    Args:
+        valido_ate: Epoch em que os dados podem mudar (próximo recálculo); sem ele o
+            max-age é CACHE_EXPIRATION_SECONDS. Já vencido, max-age=0 (revalidar com ETag)
+    """
+    padrao = get_settings().CACHE_EXPIRATION_SECONDS
+    max_age = padrao if valido_ate is None else max(0, int(valido_ate - time.time()))
+    # Vencido, o servidor ainda serve o último snapshot enquanto recalcula: CDN pode fazer o mesmo
+    return f"public, max-age={max_age}, stale-while-revalidate={padrao}"
+
+
+def aplicar_cache(response: Response, hash_conteudo: str, valido_ate: Optional[float] = None):
+    """
+    Define ETag e Cache-Control da resposta
+
+    Args:
+        hash_conteudo: Hash do resultado servido (snapshots) ou das entradas que o
+            determinam (ex.: últimas barras consumidas pelas rotas do grafo)
+        valido_ate: Epoch da próxima mudança esperada (ver cache_control)
+    """
+    response.headers["ETag"] = etag(hash_conteudo)
+    response.headers["Cache-Control"] = cache_control(valido_ate)
+
+
+def etag_corresponde(if_none_match: str, valor: str) -> bool:
+    """Comparação fraca do If-None-Match (lista de ETags ou "*") com a ETag da resposta"""
+    if if_none_match.strip() == "*":
+        return True
+    alvo = valor.strip().removeprefix("W/")
+    return any(candidata.strip().removeprefix("W/") == alvo for candidata in if_none_match.split(","))
+
+
+class RespostaCondicionalMiddleware:
+    """
+    GET condicional: se o If-None-Match da requisição casa com a ETag de uma resposta
+    200, o cliente recebe 304 sem corpo (só ETag e Cache-Control)
+
+    Fica por fora da coalescência: a resposta compartilhada é a mesma para todos e cada
+    cliente recebe 200 ou 304 conforme a ETag que já tem.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if not if_none_match:
+            await self.app(scope, receive, send)
+            return
+
+        nao_modificado = False
+
+        async def enviar(mensagem):
+            nonlocal nao_modificado
+            if mensagem["type"] == "http.response.start":
+                valor = Headers(raw=mensagem["headers"]).get("etag")
+                if mensagem["status"] == 200 and valor and etag_corresponde(if_none_match, valor):
+                    nao_modificado = True
+                    await send({
+                        "type": "http.response.start",
+                        "status": 304,
+                        "headers": [(k, v) for k, v in mensagem["headers"] if k.lower() in _HEADERS_304]
+                    })
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    return
+            elif nao_modificado:
+                return
+            await send(mensagem)
+
+        await self.app(scope, receive, enviar)
@@ -0,0 +1,207 @@
+# app/utils/http_client.py
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Respostas que valem nova tentativa (limite de taxa e falhas do servidor)
+_STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+# Teto da espera entre tentativas (inclusive quando o servidor pede Retry-After maior)
+_ESPERA_MAX_SECONDS = 10.0
+
+
+def _http2_disponivel() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartilhado para todas as chamadas REST externas (Binance, CoinGecko,
+    CoinMetrics, Debank, AAVE).
+
+    - Um httpx.Client (código síncrono, ex: coletores em threads) e um httpx.AsyncClient
+      (handlers async), ambos com pool keep-alive e HTTP/2 quando o pacote h2 existe
+    - Timeout global, retry com backoff exponencial + jitter em erros de transporte,
+      429 e 5xx (Retry-After respeitado até o teto)
+    - No máximo `max_por_host` requisições simultâneas por host (limite separado para a
+      via síncrona e a assíncrona)
+    """
+
+    def __init__(self, timeout_seconds: float, max_retries: int, max_por_host: int,
+                 max_conexoes: int, http2: bool = True):
+        self.timeout = httpx.Timeout(timeout_seconds)
+        self.max_retries = max_retries
+        self.max_por_host = max_por_host
+        self.limits = httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes)
+        self.http2 = http2 and _http2_disponivel()
+        if http2 and not self.http2:
+            logger.warning("⚠️ Pacote h2 não instalado, cliente HTTP seguirá em HTTP/1.1")
+
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._semaforos: Dict[str, threading.BoundedSemaphore] = {}
+        self._semaforos_async: Dict[str, asyncio.Semaphore] = {}
+        self.requisicoes = 0
+        self.retentativas = 0
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        """
+        GET síncrono com retry; a resposta final (mesmo 4xx/5xx) é devolvida ao chamador
+
+        Raises:
+            httpx.TransportError: se todas as tentativas falharam na conexão
+        """
+        client = self._get_client()
+        semaforo = self._semaforo(url)
+        for tentativa in range(self.max_retries + 1):
+            try:
+                with semaforo:
+                    resposta = client.get(url, params=params, headers=headers,
+                                          timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT)
+                self._contar(tentativa)
+            except httpx.TransportError as e:
+                self._contar(tentativa)
+                if tentativa == self.max_retries:
+                    raise
+                logger.warning(f"⚠️ {self._host(url)}: {e!r}, nova tentativa ({tentativa + 1}/{self.max_retries})")
+                time.sleep(self._espera(tentativa))
+                continue
+
+            if resposta.status_code not in _STATUS_RETENTAVEIS or tentativa == self.max_retries:
+                return resposta
+            logger.warning(f"⚠️ {self._host(url)} respondeu {resposta.status_code}, nova tentativa ({tentativa + 1}/{self.max_retries})")
+            time.sleep(self._espera(tentativa, resposta))
+        return resposta
+
+    async def aget(self, url: str, params: Optional[Dict[str, Any]] = None,
+                   headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        """Versão assíncrona de get(): mesmo retry e mesmo limite por host"""
+        client = self._get_async_client()
+        semaforo = self._semaforo_async(url)
+        for tentativa in range(self.max_retries + 1):
+            try:
+                async with semaforo:
+                    resposta = await client.get(url, params=params, headers=headers,
+                                                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT)
+                self._contar(tentativa)
+            except httpx.TransportError as e:
+                self._contar(tentativa)
+                if tentativa == self.max_retries:
+                    raise
+                logger.warning(f"⚠️ {self._host(url)}: {e!r}, nova tentativa ({tentativa + 1}/{self.max_retries})")
+                await asyncio.sleep(self._espera(tentativa))
+                continue
+
+            if resposta.status_code not in _STATUS_RETENTAVEIS or tentativa == self.max_retries:
+                return resposta
+            logger.warning(f"⚠️ {self._host(url)} respondeu {resposta.status_code}, nova tentativa ({tentativa + 1}/{self.max_retries})")
+            await asyncio.sleep(self._espera(tentativa, resposta))
+        return resposta
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requisicoes": self.requisicoes,
+            "retentativas": self.retentativas,
+            "http2": self.http2,
+            "hosts": sorted(set(self._semaforos) | set(self._semaforos_async))
+        }
+
+    def _get_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout, limits=self.limits, http2=self.http2)
+            return self._client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # Só o event loop acessa: sem lock
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=self.http2)
+        return self._async_client
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc
+
+    def _semaforo(self, url: str) -> threading.BoundedSemaphore:
+        host = self._host(url)
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.max_por_host)
+            return self._semaforos[host]
+
+    def _semaforo_async(self, url: str) -> asyncio.Semaphore:
+        host = self._host(url)
+        if host not in self._semaforos_async:
+            self._semaforos_async[host] = asyncio.Semaphore(self.max_por_host)
+        return self._semaforos_async[host]
+
+    def _contar(self, tentativa: int):
+        with self._lock:
+            self.requisicoes += 1
+            self.retentativas += 1 if tentativa else 0
+
+    @staticmethod
+    def _espera(tentativa: int, resposta: Optional[httpx.Response] = None) -> float:
+        """Backoff exponencial com jitter completo; Retry-After (em segundos) tem prioridade"""
+        if resposta is not None:
+            retry_after = resposta.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), _ESPERA_MAX_SECONDS)
+        return random.uniform(0, min(_ESPERA_MAX_SECONDS, 0.5 * 2 ** tentativa))
+
+
+_http: Optional[HttpClient] = None
+_http_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Cliente HTTP compartilhado do processo"""
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                settings = get_settings()
+                _http = HttpClient(
+                    timeout_seconds=settings.HTTP_TIMEOUT_SECONDS,
+                    max_retries=settings.HTTP_MAX_RETRIES,
+                    max_por_host=settings.HTTP_MAX_CONCURRENCY_PER_HOST,
+                    max_conexoes=settings.HTTP_MAX_CONNECTIONS,
+                    http2=settings.HTTP_HTTP2
+                )
+    return _http
+
+
+def http_get(url: str, params: Optional[Dict[str, Any]] = None,
+             headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> httpx.Response:
+    """Atalho para get_http_client().get(...)"""
+    return get_http_client().get(url, params=params, headers=headers, timeout=timeout)
+
+
+async def http_aget(url: str, params: Optional[Dict[str, Any]] = None,
+                    headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> httpx.Response:
+    """Atalho para get_http_client().aget(...)"""
+    return await get_http_client().aget(url, params=params, headers=headers, timeout=timeout)
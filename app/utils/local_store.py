@@ -0,0 +1,46 @@
+# app/utils/local_store.py
+
+import os
+import sqlite3
+import logging
+from contextlib import contextmanager
+from app.config import get_settings
+
+
+def caminho_dados(*partes: str) -> str:
+    """
+    Monta um caminho dentro do diretório de dados locais (LOCAL_DATA_DIR), criando-o se preciso
+
+    Args:
+        partes: Componentes do caminho relativo ao diretório de dados
+
+    Returns:
+        Caminho absoluto
+    """
+    base = os.path.abspath(get_settings().LOCAL_DATA_DIR)
+    caminho = os.path.join(base, *partes)
+    os.makedirs(os.path.dirname(caminho) if partes else caminho, exist_ok=True)
+    return caminho
+
+
+@contextmanager
+def conectar(nome: str):
+    """
+    Abre uma conexão SQLite com o banco local `nome` (arquivo <LOCAL_DATA_DIR>/<nome>.db)
+
+    Cada uso abre sua própria conexão (seguro entre threads); o bloco inteiro roda numa
+    transação, confirmada na saída ou desfeita em caso de exceção.
+
+    Args:
+        nome: Nome lógico do banco (ex: "realized_price")
+    """
+    conn = sqlite3.connect(caminho_dados(f"{nome}.db"), timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            yield conn
+    except sqlite3.Error as e:
+        logging.error(f"❌ Erro no banco local {nome}: {str(e)}")
+        raise
+    finally:
+        conn.close()
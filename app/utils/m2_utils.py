@@ -1,5 +1,5 @@
 import logging
-from app.services.tv_session_manager import get_tv_instance
+from app.services.tv_session_manager import get_candles
 from tvDatafeed import Interval
 
 def get_m2_global_momentum():
@@ -11,22 +11,16 @@ def get_m2_global_momentum():
     logging.info("🚀 [M2_GLOBAL] Iniciando cálculo do M2 Global Momentum...")
     
     try:
-        tv = get_tv_instance()
-        
-        if tv is None:
-            raise Exception("TradingView instance é None")
-            
-        logging.info("✅ [M2_GLOBAL] TradingView conectado com sucesso")
-        
-        # Calcular M2 Global conforme documento
-        return _calculate_m2_global_vigor(tv)
+        # Calcular M2 Global conforme documento (candles via repositório compartilhado,
+        # que reaproveita o cache e o pool de sessões TradingView)
+        return _calculate_m2_global_vigor()
         
     except Exception as e:
         logging.error(f"❌ [M2_GLOBAL] Erro crítico: {str(e)}")
         # Retornar valor de emergência conforme contexto 2025
         return _get_emergency_vigor()
 
-def _calculate_m2_global_vigor(tv):
+def _calculate_m2_global_vigor():
     """
     Calcula o vigor do M2 Global seguindo EXATAMENTE as regras do documento:
     1. Soma M2 de EUA + China + Eurozona + Japão (convertidos para USD)
@@ -48,7 +42,7 @@ def _calculate_m2_global_vigor(tv):
         n_bars = 15  # 15 meses para ter margem
         
         # Coletar M2 Global (soma de todos os países)
-        m2_global_series = _collect_m2_global_sum(tv, countries, n_bars, "completa")
+        m2_global_series = _collect_m2_global_sum(countries, n_bars, "completa")
         
         # Calcular YoY atual (usando dados mais recentes)
         yoy_atual = _calculate_yoy_growth(m2_global_series, -1, "atual")
@@ -74,7 +68,7 @@ def _calculate_m2_global_vigor(tv):
         logging.error(f"❌ [M2_GLOBAL] Erro no cálculo do vigor: {str(e)}")
         raise e
 
-def _collect_m2_global_sum(tv, countries, n_bars, period_label):
+def _collect_m2_global_sum(countries, n_bars, period_label):
     """
     Coleta M2 de todos os países e retorna a série temporal completa em USD
     """
@@ -87,7 +81,7 @@ def _collect_m2_global_sum(tv, countries, n_bars, period_label):
             logging.info(f"🏴 [M2_GLOBAL] Coletando {country} ({config['m2_symbol']})...")
             
             # Coletar M2 do país
-            m2_df = tv.get_hist(config["m2_symbol"], "ECONOMICS", Interval.in_monthly, n_bars=n_bars)
+            m2_df = get_candles(config["m2_symbol"], "ECONOMICS", Interval.in_monthly, n_bars=n_bars)
             
             if m2_df is None or m2_df.empty:
                 logging.warning(f"⚠️ [M2_GLOBAL] {country}: Dados M2 não disponíveis")
@@ -95,10 +89,10 @@ def _collect_m2_global_sum(tv, countries, n_bars, period_label):
                 
             # Se não é USD, converter usando FX
             if config["fx_symbol"]:
-                fx_df = tv.get_hist(config["fx_symbol"], "FX_IDC", Interval.in_monthly, n_bars=n_bars)
+                fx_df = get_candles(config["fx_symbol"], "FX_IDC", Interval.in_monthly, n_bars=n_bars)
                 if fx_df is None or fx_df.empty:
                     # Tentar exchange alternativa
-                    fx_df = tv.get_hist(config["fx_symbol"], "FX", Interval.in_monthly, n_bars=n_bars)
+                    fx_df = get_candles(config["fx_symbol"], "FX", Interval.in_monthly, n_bars=n_bars)
                     
                 if fx_df is None or fx_df.empty:
                     logging.warning(f"⚠️ [M2_GLOBAL] {country}: FX {config['fx_symbol']} não disponível")
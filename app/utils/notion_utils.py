@@ -0,0 +1,102 @@
+# app/utils/notion_utils.py
+
+import time
+import logging
+import threading
+from typing import Dict, Optional
+from app.config import get_settings
+
+
+class NotionIndicatorLoader:
+    """
+    Índice nome -> valor dos indicadores de um database do Notion (colunas 'indicador' e 'valor').
+
+    - Uma única consulta paginada monta o índice inteiro
+    - O índice é reaproveitado por ttl_seconds; chamadas concorrentes durante a
+      recarga aguardam a mesma consulta
+    """
+
+    def __init__(self, token: str, database_id: str, ttl_seconds: int):
+        self.token = token
+        self.database_id = database_id.strip().replace('"', '')
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._client = None
+        self._indice: Optional[Dict[str, Optional[float]]] = None
+        self._expira_em = 0.0
+
+    def indice(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            if self._indice is None or time.time() >= self._expira_em:
+                self._indice = self._carregar()
+                self._expira_em = time.time() + self.ttl_seconds
+            return self._indice
+
+    def valor(self, nome: str) -> float:
+        """
+        Valor numérico do indicador `nome` (comparação sem caixa/espaços)
+
+        Raises:
+            ValueError: se o indicador não existir ou estiver sem valor
+        """
+        valor = self.indice().get(nome.strip().lower())
+        if valor is None:
+            raise ValueError(f"Indicador '{nome}' não encontrado.")
+        return float(valor)
+
+    def invalidar(self):
+        with self._lock:
+            self._indice = None
+
+    def _carregar(self) -> Dict[str, Optional[float]]:
+        if not self.database_id:
+            logging.error("DATABASE_ID está vazio. Verifique a variável NOTION_DATABASE_ID_MACRO no arquivo .env")
+            raise ValueError("DATABASE_ID não pode ser vazio.")
+
+        if self._client is None:
+            from notion_client import Client
+            self._client = Client(auth=self.token)
+
+        indice = {}
+        cursor = None
+        paginas = 0
+        while True:
+            kwargs = {"database_id": self.database_id, "page_size": 100}
+            if cursor:
+                kwargs["start_cursor"] = cursor
+            response = self._client.databases.query(**kwargs)
+            paginas += 1
+
+            for row in response["results"]:
+                props = row["properties"]
+                titulo = props.get("indicador", {}).get("title", [])
+                if not titulo:
+                    continue
+                nome = titulo[0]["plain_text"].strip().lower()
+                indice[nome] = props.get("valor", {}).get("number")
+
+            if not response.get("has_more"):
+                break
+            cursor = response.get("next_cursor")
+
+        logging.info(f"📒 Indicadores do Notion carregados: {len(indice)} ({paginas} página(s))")
+        return indice
+
+
+_loader: Optional[NotionIndicatorLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_notion_indicators() -> NotionIndicatorLoader:
+    """Loader compartilhado do database NOTION_DATABASE_ID_MACRO"""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                settings = get_settings()
+                _loader = NotionIndicatorLoader(
+                    token=settings.NOTION_TOKEN,
+                    database_id=settings.NOTION_DATABASE_ID_MACRO,
+                    ttl_seconds=settings.NOTION_CACHE_TTL_SECONDS
+                )
+    return _loader
@@ -1,4 +1,4 @@
-# app/utils/puell_multiple_utils.py
+# app/utils/puell_multiple_util.py
 """
 Utilitário para cálculo do Puell Multiple REAL baseado em dados BigQuery
 APENAS BigQuery - SEM fallbacks
@@ -6,11 +6,9 @@ APENAS BigQuery - SEM fallbacks
 
 import logging
 import math
-import json
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Tuple, Dict, Any
-from app.config import get_settings
+from app.utils.puell_revenue_store import get_puell_revenue_store
 
 logger = logging.getLogger(__name__)
 
@@ -47,33 +45,15 @@ def safe_division(numerator, denominator, fallback=0.0):
         return fallback
 
 
-def get_btc_current_price() -> float:
-    """
-    Busca preço atual do BTC via CoinGecko (para usar no cálculo)
-    """
-    try:
-        import requests
-        
-        url = "https://api.coingecko.com/api/v3/simple/price"
-        params = {"ids": "bitcoin", "vs_currencies": "usd"}
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        return safe_float(data.get("bitcoin", {}).get("usd", 0))
-        
-    except Exception as e:
-        logging.error(f"❌ Erro ao buscar preço BTC: {str(e)}")
-        return 0.0
-
-
 def calculate_puell_multiple_bigquery() -> Tuple[float, Dict]:
     """
-    Calcula Puell Multiple usando APENAS BigQuery
+    Calcula Puell Multiple a partir da série diária persistida de receita (BigQuery)
     
     Fórmula: Receita_Diária_Atual / Média_365_Dias
-    Receita = (Reward + Fees) × Preço_BTC
+    Receita = (Reward + Fees) × Preço_BTC do próprio dia
+    
+    Só o dia novo é consultado no BigQuery; a média de 365 dias vem da soma móvel
+    mantida junto com a série.
     
     Returns:
         Tuple[float, Dict]: (puell_multiple, metadata)
@@ -81,116 +61,46 @@ def calculate_puell_multiple_bigquery() -> Tuple[float, Dict]:
     try:
         logger.info("🚀 Calculando Puell Multiple via BigQuery...")
         
-        # 1. Configurar BigQuery
-        settings = get_settings()
-        credentials_json = settings.GOOGLE_APPLICATION_CREDENTIALS_JSON
-        project_id = settings.GOOGLE_CLOUD_PROJECT
-        
-        if not credentials_json or not project_id:
-            raise Exception("Credenciais Google Cloud não configuradas")
-        
-        # Importar BigQuery
-        from google.cloud import bigquery
-        from google.oauth2 import service_account
+        # 1. Atualizar série de receita (dias fechados até ontem, UTC)
+        store = get_puell_revenue_store()
+        try:
+            store.atualizar()
+        except Exception as update_error:
+            # Série até o dia anterior continua válida para o cálculo
+            logger.warning(f"⚠️ Falha ao atualizar série de receita, usando última série: {str(update_error)}")
         
-        credentials_info = json.loads(credentials_json)
-        credentials = service_account.Credentials.from_service_account_info(credentials_info)
-        client = bigquery.Client(credentials=credentials, project=project_id)
+        resumo = store.resumo()
         
-        logger.info(f"✅ Cliente BigQuery configurado para projeto: {project_id}")
+        if resumo["dias"] < 30:
+            raise Exception(f"Dados insuficientes: apenas {resumo['dias']} dias encontrados")
         
-        # 2. Buscar preço atual do BTC
-        current_btc_price = get_btc_current_price()
-        if current_btc_price <= 0:
-            raise Exception("Não foi possível obter preço atual do BTC")
+        logger.info(f"📊 Série de receita: {resumo['dias']} dias de mineração até {resumo['dia']}")
         
-        logger.info(f"💰 Preço atual BTC: ${current_btc_price:,.2f}")
-        
-        # 3. Query BigQuery para receita dos mineradores
-        logger.info("⚡ Executando query BigQuery...")
-        
-        query = """
-        WITH daily_mining_data AS (
-          SELECT 
-            DATE(timestamp) as mining_date,
-            COUNT(*) as blocks_mined,
-            SUM(reward) / 1e8 as total_btc_reward,
-            SUM(fee_satoshi) / 1e8 as total_btc_fees,
-            SUM((reward + fee_satoshi)) / 1e8 as total_btc_earned
-          FROM `bigquery-public-data.crypto_bitcoin.blocks`
-          WHERE 
-            DATE(timestamp) >= DATE_SUB(CURRENT_DATE(), INTERVAL 365 DAY)
-            AND reward > 0
-          GROUP BY DATE(timestamp)
-        ),
-        
-        daily_revenue AS (
-          SELECT 
-            mining_date,
-            blocks_mined,
-            total_btc_earned,
-            total_btc_earned * @current_btc_price as revenue_usd
-          FROM daily_mining_data
-          WHERE total_btc_earned > 0
-        )
-        
-        SELECT 
-          mining_date,
-          blocks_mined,
-          total_btc_earned,
-          revenue_usd
-        FROM daily_revenue
-        ORDER BY mining_date DESC
-        """
-        
-        # Configurar parâmetros da query
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("current_btc_price", "FLOAT64", current_btc_price)
-            ]
-        )
-        
-        # Executar query
-        result = client.query(query, job_config=job_config).result()
-        revenue_data = result.to_dataframe()
-        
-        if revenue_data.empty or len(revenue_data) < 30:
-            raise Exception(f"Dados insuficientes: apenas {len(revenue_data)} dias encontrados")
-        
-        logger.info(f"📊 Dados coletados: {len(revenue_data)} dias de mineração")
-        
-        # 4. Calcular Puell Multiple
-        revenues = [safe_float(r) for r in revenue_data['revenue_usd'] if r > 0]
-        
-        if len(revenues) < 30:
-            raise Exception("Receitas válidas insuficientes")
-        
-        revenue_today = revenues[0]  # Mais recente (ORDER BY DESC)
-        avg_365 = safe_division(sum(revenues), len(revenues))
+        # 2. Calcular Puell Multiple
+        revenue_today = safe_float(resumo["receita_usd"])
+        avg_365 = safe_float(resumo["media_365_usd"])
         
         puell_multiple = safe_division(revenue_today, avg_365)
         
-        # 5. Validar resultado
+        # 3. Validar resultado
         if not (0.1 <= puell_multiple <= 10.0):
             raise Exception(f"Puell Multiple fora do range esperado: {puell_multiple}")
         
-        # 6. Preparar metadados
-        total_btc_mined = safe_float(revenue_data['total_btc_earned'].iloc[0])
-        blocks_today = safe_float(revenue_data['blocks_mined'].iloc[0])
-        
+        # 4. Preparar metadados
         metadata = {
             "revenue_today_usd": safe_float(revenue_today),
             "avg_365_days_usd": safe_float(avg_365),
-            "btc_price_used": safe_float(current_btc_price),
-            "total_btc_mined_today": safe_float(total_btc_mined),
-            "blocks_mined_today": safe_float(blocks_today),
-            "historical_days": len(revenues),
+            "btc_price_used": safe_float(resumo["preco_usd"]),
+            "total_btc_mined_today": safe_float(resumo["btc_emitido"] + resumo["btc_taxas"]),
+            "blocks_mined_today": safe_float(resumo["blocos"]),
+            "historical_days": resumo["dias"],
+            "reference_date": resumo["dia"],
             "calculation_date": datetime.now().strftime('%Y-%m-%d'),
-            "methodology": "BigQuery blockchain data: (reward + fees) × BTC price"
+            "methodology": "BigQuery blockchain data: (reward + fees) × BTC price of each day"
         }
         
         logger.info(f"✅ Puell Multiple calculado: {puell_multiple:.3f}")
-        logger.info(f"📈 Receita hoje: ${revenue_today:,.0f}")
+        logger.info(f"📈 Receita {resumo['dia']}: ${revenue_today:,.0f}")
         logger.info(f"📊 Média 365 dias: ${avg_365:,.0f}")
         
         return puell_multiple, metadata
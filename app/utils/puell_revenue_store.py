@@ -0,0 +1,223 @@
+# app/utils/puell_revenue_store.py
+
+import logging
+import threading
+import pandas as pd
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+from tvDatafeed import Interval
+from app.services.tv_session_manager import get_candles
+from app.utils.bigquery_cache import consultar_bigquery
+from app.utils.local_store import conectar
+
+logger = logging.getLogger(__name__)
+
+# Janela da média móvel do Puell Multiple
+JANELA_DIAS = 365
+
+_BANCO = "puell_multiple"
+
+_QUERY_RECEITA = """
+SELECT
+  DATE(timestamp) AS dia,
+  COUNT(*) AS blocos,
+  SUM(reward) / 1e8 AS btc_emitido,
+  SUM(fee_satoshi) / 1e8 AS btc_taxas
+FROM `bigquery-public-data.crypto_bitcoin.blocks`
+WHERE timestamp_month >= DATE_TRUNC(@desde, MONTH)
+  AND DATE(timestamp) BETWEEN @desde AND @ate
+  AND reward > 0
+GROUP BY dia
+ORDER BY dia
+"""
+
+
+def _precos_diarios(desde: date) -> pd.Series:
+    """Fechamento diário do BTC (USD) por data, a partir dos candles compartilhados"""
+    n_bars = (datetime.now(timezone.utc).date() - desde).days + 5
+    df = get_candles(symbol="BTCUSDT", exchange="BINANCE", interval=Interval.in_daily, n_bars=max(n_bars, 10))
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        raise ValueError("Sem candles diários para precificar a receita dos mineradores")
+    precos = pd.Series(df["close"].astype(float).values, index=pd.Index(df.index.date))
+    return precos[~precos.index.duplicated(keep="last")]
+
+
+class PuellRevenueStore:
+    """
+    Série diária persistida da receita dos mineradores (últimos 365 dias fechados).
+
+    - Cada dia guarda BTC emitido, taxas, o preço de fechamento DAQUELE dia e a receita em USD
+    - Primeira execução: uma query com o ano inteiro; depois só o dia novo é consultado
+    - A soma da janela é mantida junto com a série (entra o dia novo, sai o dia que
+      completou 365 dias), então a média de 365 dias custa O(1)
+    - crypto_bitcoin.blocks costuma atrasar: um dia só entra na série quando o dataset
+      já tem blocos de um dia posterior (mesma regra do agregado UTXO do Realized Price).
+      ultimo_dia avança só até o último dia aceito; os demais são consultados de novo
+      na próxima atualização
+    """
+
+    def __init__(self, nome: str = _BANCO, janela_dias: int = JANELA_DIAS):
+        self.nome = nome
+        self.janela_dias = janela_dias
+        self._lock = threading.Lock()
+        with conectar(self.nome) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS receita_diaria ("
+                "dia TEXT PRIMARY KEY, blocos INTEGER NOT NULL, btc_emitido REAL NOT NULL, "
+                "btc_taxas REAL NOT NULL, preco_usd REAL NOT NULL, receita_usd REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+
+    def atualizar(self, ate: Optional[date] = None) -> bool:
+        """
+        Leva a série até o dia `ate` (padrão: ontem em UTC, último dia completo)
+
+        Returns:
+            True se a série mudou, False se já estava atualizada (ou o dataset ainda não
+            tem o próximo dia completo)
+        """
+        ate = ate or (datetime.now(timezone.utc).date() - timedelta(days=1))
+
+        with self._lock:
+            meta = self._meta()
+            ultimo = date.fromisoformat(meta["ultimo_dia"]) if "ultimo_dia" in meta else None
+            if ultimo is not None and ultimo >= ate:
+                return False
+
+            # Sem série ou com buraco maior que a janela: recomeça do zero
+            if ultimo is None or (ate - ultimo).days >= self.janela_dias:
+                desde = ate - timedelta(days=self.janela_dias - 1)
+                return self._reconstruir(desde, ate) > 0
+            return self._acrescentar(ultimo + timedelta(days=1), ate) > 0
+
+    def resumo(self) -> Dict[str, float]:
+        """
+        Receita do último dia fechado e média móvel de 365 dias
+
+        Returns:
+            Dict com dia, receita_usd, media_365_usd, preco_usd, btc_emitido, btc_taxas, blocos, dias
+        """
+        with conectar(self.nome) as conn:
+            ultimo = conn.execute(
+                "SELECT dia, blocos, btc_emitido, btc_taxas, preco_usd, receita_usd "
+                "FROM receita_diaria ORDER BY dia DESC LIMIT 1"
+            ).fetchone()
+            meta = dict(conn.execute("SELECT chave, valor FROM meta").fetchall())
+
+        if ultimo is None:
+            raise ValueError("Série de receita dos mineradores vazia")
+
+        dias = int(meta["dias"])
+        return {
+            "dia": ultimo[0],
+            "blocos": ultimo[1],
+            "btc_emitido": ultimo[2],
+            "btc_taxas": ultimo[3],
+            "preco_usd": ultimo[4],
+            "receita_usd": ultimo[5],
+            "media_365_usd": float(meta["soma_receita_usd"]) / dias if dias else 0.0,
+            "dias": dias
+        }
+
+    def _meta(self) -> Dict[str, str]:
+        with conectar(self.nome) as conn:
+            return dict(conn.execute("SELECT chave, valor FROM meta").fetchall())
+
+    def _linhas(self, desde: date, ate: date) -> pd.DataFrame:
+        """
+        Receita diária dos dias completos de [desde, ate], precificada pelo fechamento de
+        cada dia: os anteriores ao último dia com blocos no dataset
+        """
+        # Um dia além de `ate` só para saber se o dataset já passou dele
+        df = consultar_bigquery(_QUERY_RECEITA, {"desde": desde, "ate": ate + timedelta(days=1)})
+        if df.empty:
+            return df
+
+        df["dia"] = pd.to_datetime(df["dia"]).dt.date
+        # Dia com blocos de um dia posterior já foi totalmente ingerido, tenha quantos blocos tiver
+        completo_ate = min(ate, df["dia"].max() - timedelta(days=1))
+        if completo_ate < ate:
+            logger.warning(f"⏳ Dataset de blocos ainda incompleto após {completo_ate}; dias seguintes ficam para a próxima atualização")
+        df = df[df["dia"] <= completo_ate].reset_index(drop=True)
+        if df.empty:
+            return df
+
+        precos = _precos_diarios(desde)
+        # Dia sem candle (raro): usa o último fechamento anterior disponível
+        precos = precos.reindex(sorted(set(precos.index) | set(df["dia"]))).ffill()
+        df["preco_usd"] = df["dia"].map(precos)
+        if df["preco_usd"].isna().any():
+            raise ValueError("Sem preço histórico para parte dos dias da receita")
+
+        df["receita_usd"] = (df["btc_emitido"].astype(float) + df["btc_taxas"].astype(float)) * df["preco_usd"]
+        return df
+
+    def _reconstruir(self, desde: date, ate: date) -> int:
+        """Refaz a série; retorna quantos dias completos entraram"""
+        logger.info(f"🏗️ Montando série de receita dos mineradores de {desde} até {ate}...")
+        df = self._linhas(desde, ate)
+        if df.empty:
+            return 0
+        with conectar(self.nome) as conn:
+            conn.execute("DELETE FROM receita_diaria")
+            self._inserir(conn, df)
+            self._gravar_meta(conn, df["dia"].max(), float(df["receita_usd"].sum()), len(df))
+        logger.info(f"✅ Série de receita montada: {len(df)} dias")
+        return len(df)
+
+    def _acrescentar(self, desde: date, ate: date) -> int:
+        """Acrescenta os dias completos de [desde, ate]; retorna quantos entraram"""
+        df = self._linhas(desde, ate)
+        if df.empty:
+            return 0
+        ultimo = df["dia"].max()
+        meta = self._meta()
+        soma = float(meta["soma_receita_usd"])
+        dias = int(meta["dias"])
+        limite = (ultimo - timedelta(days=self.janela_dias - 1)).isoformat()
+
+        with conectar(self.nome) as conn:
+            self._inserir(conn, df)
+            soma += float(df["receita_usd"].sum())
+            dias += len(df)
+
+            # Dias que saíram da janela deixam a soma
+            saindo = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(receita_usd), 0) FROM receita_diaria WHERE dia < ?", (limite,)
+            ).fetchone()
+            conn.execute("DELETE FROM receita_diaria WHERE dia < ?", (limite,))
+            self._gravar_meta(conn, ultimo, soma - saindo[1], dias - saindo[0])
+        logger.info(f"📥 Série de receita atualizada até {ultimo} (+{len(df)} dias, -{saindo[0]} dias)")
+        return len(df)
+
+    @staticmethod
+    def _inserir(conn, df: pd.DataFrame):
+        conn.executemany(
+            "INSERT OR REPLACE INTO receita_diaria (dia, blocos, btc_emitido, btc_taxas, preco_usd, receita_usd) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r.dia.isoformat(), int(r.blocos), float(r.btc_emitido), float(r.btc_taxas),
+                 float(r.preco_usd), float(r.receita_usd))
+                for r in df.itertuples(index=False)
+            ]
+        )
+
+    @staticmethod
+    def _gravar_meta(conn, ultimo_dia: date, soma: float, dias: int):
+        conn.executemany(
+            "INSERT INTO meta (chave, valor) VALUES (?, ?) ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+            [("ultimo_dia", ultimo_dia.isoformat()), ("soma_receita_usd", repr(soma)), ("dias", str(dias))]
+        )
+
+
+_store: Optional[PuellRevenueStore] = None
+_store_lock = threading.Lock()
+
+
+def get_puell_revenue_store() -> PuellRevenueStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PuellRevenueStore()
+    return _store
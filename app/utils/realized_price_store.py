@@ -0,0 +1,343 @@
+# app/utils/realized_price_store.py
+
+import os
+import logging
+import threading
+import pandas as pd
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple
+from app.config import get_settings
+from app.utils.local_store import conectar
+from app.utils.bigquery_cache import consultar_bigquery
+from app.utils.bigquery_client import get_bigquery_client
+
+logger = logging.getLogger(__name__)
+
+# Janela de criação dos UTXOs considerada no Realized Price (último ano)
+JANELA_DIAS = 365
+
+# Acima disso é mais barato refazer o agregado do que aplicar o delta do período
+MAX_DIAS_INCREMENTAIS = 30
+
+_BANCO = "realized_price"
+_COLUNAS = ["creation_date", "btc"]
+
+
+# ---------------------------------------------------------------------------
+# Fontes de UTXOs
+# ---------------------------------------------------------------------------
+
+_QUERY_AGREGADO = """
+WITH saidas AS (
+  SELECT transaction_hash, output_index, value, DATE(block_timestamp) AS creation_date
+  FROM `bigquery-public-data.crypto_bitcoin.outputs`
+  WHERE block_timestamp_month >= DATE_TRUNC(@desde, MONTH)
+    AND DATE(block_timestamp) BETWEEN @desde AND @ate
+    AND value > 0
+),
+gastos AS (
+  SELECT spent_transaction_hash, spent_output_index
+  FROM `bigquery-public-data.crypto_bitcoin.inputs`
+  WHERE block_timestamp_month >= DATE_TRUNC(@desde, MONTH)
+    AND DATE(block_timestamp) BETWEEN @desde AND @ate
+)
+SELECT s.creation_date, SUM(s.value) / 1e8 AS btc
+FROM saidas s
+LEFT JOIN gastos g
+  ON s.transaction_hash = g.spent_transaction_hash
+  AND s.output_index = g.spent_output_index
+WHERE g.spent_transaction_hash IS NULL  -- UTXO não gasto até @ate
+GROUP BY s.creation_date
+ORDER BY s.creation_date
+"""
+
+# Custo: saídas e entradas só dos dias do período, mas a data de criação das saídas
+# gastas vem de `transactions` (hash + block_timestamp de todo o último ano, na ordem
+# de 10-15 GB por execução). As tabelas públicas não trazem a data de criação do
+# UTXO gasto em `inputs`, e manter localmente o mapa hash -> data da janela seria
+# da ordem de centenas de milhões de linhas. Por isso o período inteiro vai numa
+# única query: a varredura de `transactions` é paga uma vez por atualização, não por dia
+_QUERY_DELTA_PERIODO = """
+SELECT DATE(block_timestamp) AS creation_date, SUM(value) / 1e8 AS btc
+FROM `bigquery-public-data.crypto_bitcoin.outputs`
+WHERE block_timestamp_month BETWEEN DATE_TRUNC(@inicio, MONTH) AND DATE_TRUNC(@fim, MONTH)
+  AND DATE(block_timestamp) BETWEEN @inicio AND @fim
+  AND value > 0
+GROUP BY creation_date
+
+UNION ALL
+
+-- Saídas gastas no período, atribuídas à data de criação do UTXO gasto
+SELECT DATE(t.block_timestamp) AS creation_date, -SUM(i.value) / 1e8 AS btc
+FROM `bigquery-public-data.crypto_bitcoin.inputs` i
+JOIN `bigquery-public-data.crypto_bitcoin.transactions` t
+  ON t.hash = i.spent_transaction_hash
+WHERE i.block_timestamp_month BETWEEN DATE_TRUNC(@inicio, MONTH) AND DATE_TRUNC(@fim, MONTH)
+  AND DATE(i.block_timestamp) BETWEEN @inicio AND @fim
+  AND t.block_timestamp_month >= DATE_TRUNC(@desde, MONTH)
+  AND DATE(t.block_timestamp) >= @desde
+GROUP BY creation_date
+"""
+
+# O ETL do dataset público insere os blocos em ordem: havendo bloco do dia D, os dias
+# anteriores já estão completos (em blocks, outputs e inputs). Consulta só a tabela
+# blocks, pequena, em vez de varrer block_timestamp das tabelas de saídas/entradas
+_QUERY_ULTIMO_BLOCO = """
+SELECT DATE(MAX(timestamp)) AS dia
+FROM `bigquery-public-data.crypto_bitcoin.blocks`
+WHERE timestamp_month >= DATE_TRUNC(@desde, MONTH)
+  AND DATE(timestamp) >= @desde
+"""
+
+# Quantos dias para trás procurar o último bloco ingerido
+_DIAS_BUSCA_ULTIMO_BLOCO = 7
+
+
+def _agrupar(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza para (creation_date: date, btc: float) somado por data"""
+    if df.empty:
+        return pd.DataFrame(columns=_COLUNAS)
+    df = df[_COLUNAS].copy()
+    df["creation_date"] = pd.to_datetime(df["creation_date"]).dt.date
+    df["btc"] = df["btc"].astype(float)
+    return df.groupby("creation_date", as_index=False)["btc"].sum()
+
+
+class BigQueryUtxoSource:
+    """UTXOs a partir do dataset público crypto_bitcoin do BigQuery (cliente compartilhado + cache)"""
+
+    def _executar(self, query: str, ttl_seconds: Optional[int] = None, **params) -> pd.DataFrame:
+        return consultar_bigquery(query, params, ttl_seconds)
+
+    def ultimo_dia_completo(self, ate: date) -> Optional[date]:
+        """Último dia <= ate totalmente ingerido no dataset (None se nada recente)"""
+        # Sem cache: a resposta muda ao longo do dia conforme o dataset avança
+        df = self._executar(_QUERY_ULTIMO_BLOCO, ttl_seconds=0,
+                            desde=ate - timedelta(days=_DIAS_BUSCA_ULTIMO_BLOCO))
+        if df.empty or pd.isna(df["dia"].iloc[0]):
+            return None
+        return min(ate, pd.to_datetime(df["dia"].iloc[0]).date() - timedelta(days=1))
+
+    def agregado_ate(self, desde: date, ate: date) -> pd.DataFrame:
+        return _agrupar(self._executar(_QUERY_AGREGADO, desde=desde, ate=ate))
+
+    def delta_do_periodo(self, inicio: date, fim: date, desde: date) -> pd.DataFrame:
+        return _agrupar(self._executar(_QUERY_DELTA_PERIODO, inicio=inicio, fim=fim, desde=desde))
+
+
+class LocalUtxoSource:
+    """
+    Substituto offline do BigQuery: outputs.csv e inputs.csv num diretório local,
+    com as mesmas colunas usadas das tabelas crypto_bitcoin (valores em satoshis)
+
+    - outputs.csv: transaction_hash, output_index, block_timestamp, value
+    - inputs.csv: spent_transaction_hash, spent_output_index, block_timestamp, value
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._outputs: Optional[pd.DataFrame] = None
+        self._inputs: Optional[pd.DataFrame] = None
+
+    def _carregar(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        if self._outputs is None:
+            outputs = pd.read_csv(os.path.join(self.diretorio, "outputs.csv"))
+            inputs = pd.read_csv(os.path.join(self.diretorio, "inputs.csv"))
+            outputs["dia"] = pd.to_datetime(outputs["block_timestamp"]).dt.date
+            inputs["dia"] = pd.to_datetime(inputs["block_timestamp"]).dt.date
+            self._outputs, self._inputs = outputs, inputs
+        return self._outputs, self._inputs
+
+    def agregado_ate(self, desde: date, ate: date) -> pd.DataFrame:
+        outputs, inputs = self._carregar()
+        saidas = outputs[(outputs["dia"] >= desde) & (outputs["dia"] <= ate) & (outputs["value"] > 0)]
+        gastos = inputs[inputs["dia"] <= ate]
+        gasto = pd.MultiIndex.from_frame(saidas[["transaction_hash", "output_index"]]).isin(
+            pd.MultiIndex.from_frame(gastos[["spent_transaction_hash", "spent_output_index"]])
+        )
+        nao_gastas = saidas[~gasto]
+        return _agrupar(pd.DataFrame({
+            "creation_date": nao_gastas["dia"],
+            "btc": nao_gastas["value"] / 1e8
+        }))
+
+    def ultimo_dia_completo(self, ate: date) -> Optional[date]:
+        outputs, inputs = self._carregar()
+        if outputs.empty or inputs.empty:
+            return None
+        return min(ate, min(outputs["dia"].max(), inputs["dia"].max()) - timedelta(days=1))
+
+    def delta_do_periodo(self, inicio: date, fim: date, desde: date) -> pd.DataFrame:
+        outputs, inputs = self._carregar()
+        criadas = outputs[(outputs["dia"] >= inicio) & (outputs["dia"] <= fim) & (outputs["value"] > 0)]
+        gastas = inputs[(inputs["dia"] >= inicio) & (inputs["dia"] <= fim)].merge(
+            outputs[["transaction_hash", "output_index", "dia"]],
+            left_on=["spent_transaction_hash", "spent_output_index"],
+            right_on=["transaction_hash", "output_index"],
+            suffixes=("", "_criacao")
+        )
+        gastas = gastas[gastas["dia_criacao"] >= desde]
+        return _agrupar(pd.concat([
+            pd.DataFrame({"creation_date": criadas["dia"], "btc": criadas["value"] / 1e8}),
+            pd.DataFrame({"creation_date": gastas["dia_criacao"], "btc": -gastas["value"] / 1e8})
+        ]))
+
+
+# ---------------------------------------------------------------------------
+# Agregado materializado
+# ---------------------------------------------------------------------------
+
+class RealizedPriceStore:
+    """
+    Agregado diário persistido creation_date -> BTC ainda não gasto (UTXOs do último ano).
+
+    - Primeira execução: monta o agregado completo até o último dia fechado (sem LIMIT)
+    - Depois: aplica os dias novos numa única query (+saídas criadas no período,
+      -saídas gastas no período pela data de criação) e descarta as datas que saíram
+      da janela. Resolver a data de criação das saídas gastas ainda varre um ano de
+      `transactions` (ver _QUERY_DELTA_PERIODO), custo pago uma vez por atualização
+    - O Realized Price é calculado sobre o agregado local, sem tocar no BigQuery
+    - O dataset público atrasa: só dias já totalmente ingeridos (fonte.ultimo_dia_completo)
+      entram no agregado; ultimo_dia nunca passa deles, e os dias restantes ficam para a
+      próxima atualização
+    """
+
+    def __init__(self, fonte, nome: str = _BANCO, janela_dias: int = JANELA_DIAS,
+                 max_dias_incrementais: int = MAX_DIAS_INCREMENTAIS):
+        self.fonte = fonte
+        self.nome = nome
+        self.janela_dias = janela_dias
+        self.max_dias_incrementais = max_dias_incrementais
+        self._lock = threading.Lock()
+        with conectar(self.nome) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS utxo_diario (creation_date TEXT PRIMARY KEY, btc REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+
+    def ultimo_dia(self) -> Optional[date]:
+        with conectar(self.nome) as conn:
+            row = conn.execute("SELECT valor FROM meta WHERE chave = 'ultimo_dia'").fetchone()
+        return date.fromisoformat(row[0]) if row else None
+
+    def atualizar(self, ate: Optional[date] = None) -> bool:
+        """
+        Leva o agregado até o dia `ate` (padrão: ontem em UTC, último dia completo)
+
+        Returns:
+            True se o agregado mudou, False se já estava atualizado (ou o dataset ainda
+            não tem dia completo além de ultimo_dia)
+        """
+        ate = ate or (datetime.now(timezone.utc).date() - timedelta(days=1))
+
+        with self._lock:
+            ultimo = self.ultimo_dia()
+            if ultimo is not None and ultimo >= ate:
+                return False
+
+            completo = self.fonte.ultimo_dia_completo(ate)
+            if completo is None or (ultimo is not None and ultimo >= completo):
+                logger.info(f"⏳ Dataset de UTXOs ainda sem dia completo após {ultimo} (último completo: {completo})")
+                return False
+            ate = completo
+
+            if ultimo is None or (ate - ultimo).days > self.max_dias_incrementais:
+                self._reconstruir(ate)
+                return True
+
+            # Gastos de UTXOs criados antes da janela do primeiro dia novo não importam:
+            # essas datas já estão (ou ficarão) fora da janela de `ate`
+            inicio = ultimo + timedelta(days=1)
+            delta = self.fonte.delta_do_periodo(inicio, ate, inicio - timedelta(days=self.janela_dias))
+            self._aplicar_delta(ate, delta)
+            return True
+
+    def agregado(self) -> pd.DataFrame:
+        with conectar(self.nome) as conn:
+            df = pd.read_sql_query("SELECT creation_date, btc FROM utxo_diario ORDER BY creation_date", conn)
+        df["creation_date"] = pd.to_datetime(df["creation_date"]).dt.date
+        return df
+
+    def _reconstruir(self, ate: date):
+        desde = ate - timedelta(days=self.janela_dias)
+        logger.info(f"🏗️ Montando agregado de UTXOs de {desde} até {ate}...")
+        df = self.fonte.agregado_ate(desde, ate)
+        with conectar(self.nome) as conn:
+            conn.execute("DELETE FROM utxo_diario")
+            conn.executemany(
+                "INSERT INTO utxo_diario (creation_date, btc) VALUES (?, ?)",
+                [(d.isoformat(), float(b)) for d, b in zip(df["creation_date"], df["btc"])]
+            )
+            self._marcar(conn, ate)
+        logger.info(f"✅ Agregado de UTXOs montado: {len(df)} dias")
+
+    def _aplicar_delta(self, dia: date, delta: pd.DataFrame):
+        desde = dia - timedelta(days=self.janela_dias)
+        with conectar(self.nome) as conn:
+            conn.executemany(
+                """INSERT INTO utxo_diario (creation_date, btc) VALUES (?, ?)
+                   ON CONFLICT(creation_date) DO UPDATE SET btc = btc + excluded.btc""",
+                [(d.isoformat(), float(b)) for d, b in zip(delta["creation_date"], delta["btc"])]
+            )
+            # Datas fora da janela ou com todos os UTXOs já gastos (resíduo de ponto flutuante)
+            conn.execute("DELETE FROM utxo_diario WHERE creation_date < ? OR btc < 1e-9", (desde.isoformat(),))
+            self._marcar(conn, dia)
+        logger.info(f"📥 Agregado de UTXOs atualizado até {dia} ({len(delta)} datas afetadas)")
+
+    @staticmethod
+    def _marcar(conn, dia: date):
+        conn.execute(
+            "INSERT INTO meta (chave, valor) VALUES ('ultimo_dia', ?) "
+            "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+            (dia.isoformat(),)
+        )
+
+
+def calcular_realized_price(utxo_data: pd.DataFrame, price_data: pd.DataFrame) -> Tuple[float, float, float]:
+    """
+    Realized Price = Σ(BTC não gasto × preço na criação) / Σ BTC não gasto
+
+    Args:
+        utxo_data: DataFrame [creation_date, btc]
+        price_data: DataFrame [date, price] com preços diários
+
+    Returns:
+        Tuple (realized_price, supply analisado, realized cap)
+    """
+    utxo_data = utxo_data.copy()
+    price_data = price_data.copy()
+    utxo_data["creation_date"] = pd.to_datetime(utxo_data["creation_date"]).dt.date
+    price_data["date"] = pd.to_datetime(price_data["date"]).dt.date
+
+    merged = utxo_data.merge(price_data, left_on="creation_date", right_on="date", how="left")
+    # Para datas sem preço, usar preço mais próximo disponível
+    merged["price"] = merged["price"].bfill().ffill()
+    merged = merged.dropna(subset=["price"])
+
+    realized_cap = float((merged["btc"] * merged["price"]).sum())
+    supply = float(merged["btc"].sum())
+    if supply <= 0:
+        raise ValueError("Supply analisado é zero")
+    return realized_cap / supply, supply, realized_cap
+
+
+def _criar_fonte():
+    settings = get_settings()
+    if settings.REALIZED_PRICE_FONTE == "local":
+        logger.info(f"📂 Realized Price usando dataset local em {settings.REALIZED_PRICE_DADOS_LOCAIS}")
+        return LocalUtxoSource(settings.REALIZED_PRICE_DADOS_LOCAIS)
+
+    # Falha cedo (credenciais ausentes/bibliotecas não instaladas) em vez de na primeira query
+    get_bigquery_client()
+    return BigQueryUtxoSource()
+
+
+_store: Optional[RealizedPriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_realized_price_store() -> RealizedPriceStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RealizedPriceStore(_criar_fonte())
+    return _store
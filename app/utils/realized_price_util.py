@@ -1,13 +1,11 @@
 # app/utils/realized_price_util.py - VERSÃO CORRIGIDA FINAL
 
 import pandas as pd
-import json
-import os
 from datetime import datetime, timedelta
-from app.services.tv_session_manager import get_tv_instance
-from app.config import get_settings
+from app.services.tv_session_manager import get_candles
+from app.utils.http_client import http_get
+from tvDatafeed import Interval
 import logging
-import requests
 
 logger = logging.getLogger(__name__)
 
@@ -18,22 +16,13 @@ def get_bitcoin_historical_prices() -> pd.DataFrame:
     try:
         logger.info("📊 Buscando dados históricos do Bitcoin...")
         
-        # Usar sessão TV existente do projeto
-        tv = get_tv_instance()
-        
-        if tv is None:
-            logger.error("❌ Não conseguiu obter instância do TradingView")
-            return pd.DataFrame()
-        
-        logger.info("📊 Buscando dados históricos do Bitcoin...")
-        
         # CORREÇÃO: Usar parâmetros mais simples
         try:
-            # Tentar primeiro com BTCUSD
-            btc_data = tv.get_hist(
+            # Candles diários do repositório compartilhado (sessão TV serializada)
+            btc_data = get_candles(
                 symbol='BTCUSD',
                 exchange='BINANCE',
-                interval='1d',
+                interval=Interval.in_daily,
                 n_bars=500
             )
             
@@ -89,6 +78,9 @@ def get_bitcoin_historical_prices() -> pd.DataFrame:
 def get_realized_price() -> float:
     """
     CORRIGIDO: Calcular Realized Price do Bitcoin usando BigQuery + TradingView
+    
+    Os UTXOs vêm do agregado diário materializado (realized_price_store): o BigQuery
+    só é consultado para os dias ainda não aplicados.
     """
     
     try:
@@ -100,114 +92,40 @@ def get_realized_price() -> float:
             logger.warning("⚠️ Fallback: Usando preços aproximados")
             return get_realized_price_fallback()
         
-        # 2. Configurar cliente BigQuery
-        logger.info("🔗 Conectando ao BigQuery...")
-        settings = get_settings()
-        
-        # CORREÇÃO: Usar nome correto das configurações
-        credentials_json = settings.GOOGLE_APPLICATION_CREDENTIALS_JSON  # Maiúsculo
-        project_id = settings.GOOGLE_CLOUD_PROJECT  # Maiúsculo
-        
-        if not credentials_json or not project_id:
-            logger.warning("⚠️ Credenciais Google Cloud não configuradas, usando fallback")
-            return get_realized_price_fallback()
-        
-        # Tentar importar BigQuery
+        # 2. Agregado local de UTXOs (BigQuery só para os dias novos)
         try:
-            from google.cloud import bigquery
-            from google.oauth2 import service_account
+            from app.utils.realized_price_store import get_realized_price_store, calcular_realized_price
         except ImportError as import_error:
             logger.error(f"❌ Bibliotecas Google Cloud não instaladas: {str(import_error)}")
             return get_realized_price_fallback()
-        
-        # Configurar credenciais
+
         try:
-            credentials_info = json.loads(credentials_json)
-            credentials = service_account.Credentials.from_service_account_info(credentials_info)
-            client = bigquery.Client(credentials=credentials, project=project_id)
-            logger.info(f"✅ Cliente BigQuery configurado para projeto: {project_id}")
-        except Exception as cred_error:
-            logger.error(f"❌ Erro ao configurar credenciais: {str(cred_error)}")
+            store = get_realized_price_store()
+        except Exception as store_error:
+            logger.error(f"❌ Erro ao configurar fonte de UTXOs: {str(store_error)}")
             return get_realized_price_fallback()
-        
-        # 3. Query para UTXOs com limite para performance
-        logger.info("⚡ Executando query do Realized Price...")
-        query = """
-        WITH current_utxos AS (
-          SELECT 
-            o.value / 1e8 as btc_value,
-            DATE(o.block_timestamp) as creation_date
-          FROM `bigquery-public-data.crypto_bitcoin.outputs` o
-          LEFT JOIN `bigquery-public-data.crypto_bitcoin.inputs` i 
-            ON o.transaction_hash = i.spent_transaction_hash 
-            AND o.output_index = i.spent_output_index
-          WHERE 
-            o.value > 0
-            AND i.spent_transaction_hash IS NULL  -- UTXO não gasto
-            AND DATE(o.block_timestamp) >= DATE_SUB(CURRENT_DATE(), INTERVAL 365 DAY)  -- Último ano
-          LIMIT 30000  -- Limite para performance
-        ),
-        
-        daily_aggregation AS (
-          SELECT 
-            creation_date,
-            SUM(btc_value) as daily_btc
-          FROM current_utxos
-          GROUP BY creation_date
-        )
-        
-        SELECT 
-          creation_date,
-          daily_btc
-        FROM daily_aggregation
-        ORDER BY creation_date
-        """
-        
-        # 4. Executar query e obter UTXOs
+
         try:
-            result = client.query(query).result()
-            utxo_data = result.to_dataframe()
-            
-            if utxo_data.empty:
-                logger.error("❌ Query BigQuery retornou dados vazios")
-                return get_realized_price_fallback()
-            
-            logger.info(f"✅ Query BigQuery executada: {len(utxo_data)} registros")
-            
-        except Exception as query_error:
-            logger.error(f"❌ Erro na query BigQuery: {str(query_error)}")
+            store.atualizar()
+        except Exception as update_error:
+            # Agregado de ontem continua válido como aproximação
+            logger.warning(f"⚠️ Falha ao atualizar agregado de UTXOs, usando último agregado: {str(update_error)}")
+
+        utxo_data = store.agregado()
+        if utxo_data.empty:
+            logger.error("❌ Agregado de UTXOs vazio")
             return get_realized_price_fallback()
-        
-        # 5. Fazer merge com preços reais do TradingView
+
+        logger.info(f"✅ Agregado de UTXOs carregado: {len(utxo_data)} dias (até {store.ultimo_dia()})")
+
+        # 3. Cruzar UTXOs com preços reais do TradingView e calcular Realized Price
         logger.info("🔄 Cruzando UTXOs com preços históricos...")
-        
-        # Converter datas para mesmo formato
-        utxo_data['creation_date'] = pd.to_datetime(utxo_data['creation_date']).dt.date
-        price_data['date'] = pd.to_datetime(price_data['date']).dt.date
-        
-        # Merge dos dados
-        merged_data = utxo_data.merge(price_data, left_on='creation_date', right_on='date', how='left')
-        
-        # Para datas sem preço, usar preço mais próximo disponível
-        merged_data['price'] = merged_data['price'].fillna(method='bfill').fillna(method='ffill')
-        
-        # Remover linhas sem preço
-        merged_data = merged_data.dropna(subset=['price'])
-        
-        if merged_data.empty:
-            logger.error("❌ Não foi possível fazer merge com preços")
-            return get_realized_price_fallback()
-        
-        # 6. Calcular Realized Price
-        total_realized_cap = (merged_data['daily_btc'] * merged_data['price']).sum()
-        total_supply = merged_data['daily_btc'].sum()
-        
-        if total_supply == 0:
-            logger.error("❌ Total supply é zero")
+        try:
+            realized_price, total_supply, total_realized_cap = calcular_realized_price(utxo_data, price_data)
+        except ValueError as calc_error:
+            logger.error(f"❌ {str(calc_error)}")
             return get_realized_price_fallback()
         
-        realized_price = total_realized_cap / total_supply
-        
         logger.info(f"✅ Realized Price: ${realized_price:,.2f}")
         logger.info(f"📈 Supply analisado: {total_supply:,.2f} BTC")
         logger.info(f"💰 Realized Cap: ${total_realized_cap:,.0f}")
@@ -229,7 +147,7 @@ def get_realized_price_fallback() -> float:
         url = "https://api.coingecko.com/api/v3/simple/price"
         params = {"ids": "bitcoin", "vs_currencies": "usd"}
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
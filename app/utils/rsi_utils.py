@@ -1,16 +1,63 @@
 # app/utils/rsi_utils.py
 
+import threading
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+from app.utils.ema_utils import calcular_emas_matriz, calcular_emas_ultimo
 
-def calcular_rsi(df: pd.DataFrame, periodo: int = 14) -> pd.DataFrame:
+SUAVIZACOES = ("sma", "wilder")
+
+def calcular_rsi_serie(closes: np.ndarray, periodo: int = 14, suavizacao: str = "sma") -> np.ndarray:
+    """
+    Calcula a série completa do RSI de forma vetorizada (caminho batch/aquecimento)
+    
+    Args:
+        closes: Array de preços de fechamento
+        periodo: Período para cálculo do RSI (padrão: 14)
+        suavizacao: "sma" (média móvel simples, padrão histórico da API) ou "wilder"
+        
+    Returns:
+        Array com o RSI de cada barra (NaN nas primeiras 'periodo' barras)
+    """
+    if suavizacao not in SUAVIZACOES:
+        raise ValueError(f"Suavização inválida: {suavizacao}")
+
+    x = np.asarray(closes, dtype=float)
+    rsi = np.full(len(x), np.nan)
+    if len(x) <= periodo:
+        return rsi
+
+    delta = np.diff(x)
+    variacoes = np.stack([np.clip(delta, 0, None), np.clip(-delta, 0, None)])  # ganhos, perdas
+
+    # Médias da primeira janela completa (barras 1..periodo)
+    acumulado = np.cumsum(variacoes, axis=1)
+    if suavizacao == "sma":
+        medias = acumulado[:, periodo - 1:].copy()
+        medias[:, 1:] -= acumulado[:, :-periodo]
+        medias /= periodo
+    else:
+        # Wilder = EMA com alpha 1/periodo (span 2*periodo-1) semeada pela primeira SMA
+        semente = acumulado[:, periodo - 1:periodo] / periodo
+        serie = np.concatenate([semente, variacoes[:, periodo:]], axis=1)
+        medias = calcular_emas_matriz(serie, [2 * periodo - 1])[:, :, 0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = medias[0] / medias[1]
+        rsi[periodo:] = 100 - (100 / (1 + rs))
+
+    return rsi
+
+def calcular_rsi(df: pd.DataFrame, periodo: int = 14, suavizacao: str = "sma") -> pd.DataFrame:
     """
     Calcula o RSI (Índice de Força Relativa) para um DataFrame de preços
     
     Args:
         df: DataFrame com dados OHLCV
         periodo: Período para cálculo do RSI (padrão: 14)
+        suavizacao: "sma" (padrão) ou "wilder"
         
     Returns:
         DataFrame com a coluna RSI adicionada
@@ -19,27 +66,133 @@ def calcular_rsi(df: pd.DataFrame, periodo: int = 14) -> pd.DataFrame:
     if len(df) <= periodo:
         return df
     
-    # Calcular as mudanças de preços
-    delta = df['close'].diff()
-    
-    # Separar ganhos (up) e perdas (down)
-    ganhos = delta.copy()
-    perdas = delta.copy()
-    ganhos[ganhos < 0] = 0
-    perdas[perdas > 0] = 0
-    perdas = abs(perdas)
+    df['RSI'] = calcular_rsi_serie(df['close'].to_numpy(dtype=float), periodo, suavizacao)
     
-    # Calcular médias móveis de ganhos e perdas
-    avg_gain = ganhos.rolling(window=periodo).mean()
-    avg_loss = perdas.rolling(window=periodo).mean()
-    
-    # Calcular RS (Relative Strength)
-    rs = avg_gain / avg_loss
+    return df
+
+def _rsi_de_medias(avg_gain: float, avg_loss: float) -> float:
+    """Mesma convenção do cálculo batch: perda zero => 100, sem variação => NaN"""
+    if avg_loss == 0:
+        return float("nan") if avg_gain == 0 else 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+class RsiEngine:
+    """
+    RSI incremental de um timeframe
     
-    # Calcular RSI
-    df['RSI'] = 100 - (100 / (1 + rs))
+    Guarda as médias de ganho/perda até a última barra fechada e avança em O(1)
+    por barra fechada. O RSI da barra em formação é derivado na leitura, sem
+    alterar o estado.
     
-    return df
+    - sma: mantém as últimas 'periodo' variações (resultado idêntico ao batch)
+    - wilder: mantém apenas as médias suavizadas (avg = (avg*(p-1) + x) / p)
+    """
+
+    def __init__(self, periodo: int = 14, suavizacao: str = "sma"):
+        if suavizacao not in SUAVIZACOES:
+            raise ValueError(f"Suavização inválida: {suavizacao}")
+        self.periodo = periodo
+        self.suavizacao = suavizacao
+        self.ganhos: deque = deque(maxlen=periodo)
+        self.perdas: deque = deque(maxlen=periodo)
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.ultimo_close: Optional[float] = None
+        self.ultimo_fechado: Optional[pd.Timestamp] = None
+        self._lock = threading.Lock()
+
+    def aquecer(self, fechados: pd.DataFrame):
+        """Inicializa o estado a partir das barras fechadas usando o caminho vetorizado"""
+        closes = fechados['close'].to_numpy(dtype=float)
+        if len(closes) <= self.periodo:
+            raise ValueError("Histórico insuficiente para calcular o RSI")
+
+        delta = np.diff(closes)
+        ganhos = np.clip(delta, 0, None)
+        perdas = np.clip(-delta, 0, None)
+        self.ganhos = deque(ganhos[-self.periodo:].tolist(), maxlen=self.periodo)
+        self.perdas = deque(perdas[-self.periodo:].tolist(), maxlen=self.periodo)
+
+        if self.suavizacao == "wilder":
+            semente = np.array([[ganhos[:self.periodo].mean()], [perdas[:self.periodo].mean()]])
+            serie = np.concatenate([semente, np.stack([ganhos, perdas])[:, self.periodo:]], axis=1)
+            self.avg_gain, self.avg_loss = calcular_emas_ultimo(serie, [2 * self.periodo - 1])[:, 0].tolist()
+        else:
+            self.avg_gain = sum(self.ganhos) / self.periodo
+            self.avg_loss = sum(self.perdas) / self.periodo
+
+        self.ultimo_close = float(closes[-1])
+        self.ultimo_fechado = fechados.index[-1]
+
+    def _medias_com(self, close: float) -> Tuple[float, float, float, float]:
+        """Médias após aplicar 'close' como próxima barra (sem alterar o estado)"""
+        delta = close - self.ultimo_close
+        ganho, perda = max(delta, 0.0), max(-delta, 0.0)
+        p = self.periodo
+        if self.suavizacao == "wilder":
+            return (self.avg_gain * (p - 1) + ganho) / p, (self.avg_loss * (p - 1) + perda) / p, ganho, perda
+        return (
+            self.avg_gain + (ganho - self.ganhos[0]) / p,
+            self.avg_loss + (perda - self.perdas[0]) / p,
+            ganho,
+            perda
+        )
+
+    def atualizar(self, close: float, timestamp: pd.Timestamp):
+        """Aplica uma nova barra fechada em O(1)"""
+        avg_gain, avg_loss, ganho, perda = self._medias_com(close)
+        self.ganhos.append(ganho)
+        self.perdas.append(perda)
+
+        if self.suavizacao == "sma":
+            # Soma da janela (periodo termos) refeita para não acumular erro de arredondamento
+            avg_gain = sum(self.ganhos) / self.periodo
+            avg_loss = sum(self.perdas) / self.periodo
+
+        self.avg_gain, self.avg_loss = avg_gain, avg_loss
+
+        self.ultimo_close = close
+        self.ultimo_fechado = timestamp
+
+    def valor_fechado(self) -> float:
+        """RSI da última barra fechada aplicada ao estado"""
+        return _rsi_de_medias(self.avg_gain, self.avg_loss)
+
+    def valor(self, preco_atual: float) -> float:
+        """RSI da barra em formação"""
+        avg_gain, avg_loss, _, _ = self._medias_com(preco_atual)
+        return _rsi_de_medias(avg_gain, avg_loss)
+
+    def sincronizar(self, df: pd.DataFrame) -> float:
+        """
+        Avança o estado com as barras fechadas ainda não vistas e retorna o RSI
+        da barra em formação (última linha do DataFrame)
+        """
+        with self._lock:
+            fechados = df.iloc[:-1]
+
+            if self.ultimo_fechado is None or self.ultimo_fechado not in fechados.index:
+                # Primeira leitura ou lacuna maior que a janela: aquecimento completo
+                self.aquecer(fechados)
+            else:
+                novos = fechados.loc[fechados.index > self.ultimo_fechado, 'close']
+                for timestamp, close in novos.items():
+                    self.atualizar(float(close), timestamp)
+
+            return self.valor(float(df['close'].iloc[-1]))
+
+_rsi_engines: Dict[Tuple, RsiEngine] = {}
+_rsi_engines_lock = threading.Lock()
+
+def get_rsi_engine(symbol: str, exchange: str, interval: str, periodo: int = 14, suavizacao: str = "sma") -> RsiEngine:
+    """Retorna o RsiEngine do processo para (symbol, exchange, interval, periodo, suavizacao)"""
+    key = (symbol, exchange, interval, periodo, suavizacao)
+    with _rsi_engines_lock:
+        engine = _rsi_engines.get(key)
+        if engine is None:
+            engine = RsiEngine(periodo, suavizacao)
+            _rsi_engines[key] = engine
+        return engine
 
 def analisar_rsi_timeframe(rsi_value: float) -> Dict[str, Any]:
     """
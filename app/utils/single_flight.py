@@ -0,0 +1,140 @@
+# app/utils/single_flight.py
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from app.config import get_settings
+
+Mensagens = List[Dict[str, Any]]
+
+
+@dataclass
+class _Rota:
+    execucoes: int = 0
+    coalescidas: int = 0
+    falhas: int = 0
+    em_andamento: int = 0
+
+
+class Coalescedor:
+    """
+    Coalescência (single-flight) de GETs idênticos em andamento.
+
+    - Só vale para as rotas configuradas; as demais passam direto
+    - Requisições com mesmo caminho e mesma query (ordem dos parâmetros não importa)
+      que chegam enquanto a primeira ainda está sendo processada não disparam um novo
+      processamento: aguardam a primeira e recebem a mesma resposta (status, headers e corpo)
+    - O processamento não é cancelado se o cliente que o iniciou desconectar: os demais
+      continuam aguardando
+    - Terminado o processamento a chave é liberada; não há cache de respostas
+    """
+
+    def __init__(self, rotas: Iterable[str]):
+        self.rotas: Dict[str, _Rota] = {rota.rstrip("/") or "/": _Rota() for rota in rotas}
+        self._em_voo: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def aplica(self, scope: Dict[str, Any]) -> bool:
+        return scope["type"] == "http" and scope["method"] == "GET" and self._caminho(scope) in self.rotas
+
+    async def executar(self, app, scope: Dict[str, Any]) -> Mensagens:
+        """
+        Mensagens ASGI da resposta para `scope`, processada uma única vez por chave em andamento
+
+        Raises:
+            Exception: a falha do processamento, repassada a todos os que aguardavam
+        """
+        caminho = self._caminho(scope)
+        chave = (caminho, self._query(scope))
+        metricas = self.rotas[caminho]
+
+        voo = self._em_voo.get(chave)
+        if voo is not None:
+            metricas.coalescidas += 1
+        else:
+            metricas.execucoes += 1
+            metricas.em_andamento += 1
+            voo = asyncio.ensure_future(self._processar(app, scope, metricas))
+            self._em_voo[chave] = voo
+            voo.add_done_callback(lambda _: self._liberar(chave, voo))
+
+        # shield: quem desconecta não derruba o processamento que os outros aguardam
+        return await asyncio.shield(voo)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            rota: {
+                "execucoes": m.execucoes,
+                "coalescidas": m.coalescidas,
+                "falhas": m.falhas,
+                "em_andamento": m.em_andamento
+            }
+            for rota, m in self.rotas.items()
+        }
+
+    @staticmethod
+    async def _processar(app, scope: Dict[str, Any], metricas: _Rota) -> Mensagens:
+        mensagens: Mensagens = []
+
+        async def receive():
+            # GET sem corpo: o processamento não depende da conexão de quem o iniciou
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(mensagem):
+            mensagens.append(mensagem)
+
+        try:
+            await app(scope, receive, send)
+        except Exception:
+            metricas.falhas += 1
+            raise
+        finally:
+            metricas.em_andamento -= 1
+        return mensagens
+
+    def _liberar(self, chave: Tuple[str, str], voo: asyncio.Future):
+        if self._em_voo.get(chave) is voo:
+            del self._em_voo[chave]
+        # Falha já repassada a quem aguardava (ou a ninguém, se todos desconectaram)
+        voo.cancelled() or voo.exception()
+
+    @staticmethod
+    def _caminho(scope: Dict[str, Any]) -> str:
+        return scope["path"].rstrip("/") or "/"
+
+    @staticmethod
+    def _query(scope: Dict[str, Any]) -> str:
+        parametros = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        return urlencode(sorted(parametros))
+
+
+class CoalescedorMiddleware:
+    """Middleware ASGI que encaminha os GETs das rotas configuradas ao Coalescedor compartilhado"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        coalescedor = get_coalescedor()
+        if not coalescedor.aplica(scope):
+            await self.app(scope, receive, send)
+            return
+
+        for mensagem in await coalescedor.executar(self.app, scope):
+            await send(mensagem)
+
+
+_coalescedor: Optional[Coalescedor] = None
+_coalescedor_lock = threading.Lock()
+
+
+def get_coalescedor() -> Coalescedor:
+    global _coalescedor
+    if _coalescedor is None:
+        with _coalescedor_lock:
+            if _coalescedor is None:
+                settings = get_settings()
+                rotas = [r.strip() for r in settings.COALESCER_ROTAS.split(",") if r.strip()] if settings.COALESCER_ATIVO else []
+                _coalescedor = Coalescedor(rotas)
+    return _coalescedor
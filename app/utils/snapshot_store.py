@@ -0,0 +1,154 @@
+# app/utils/snapshot_store.py
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from fastapi.encoders import jsonable_encoder
+from app.config import get_settings
+from app.utils.local_store import conectar
+
+logger = logging.getLogger(__name__)
+
+_BANCO = "snapshots"
+
+# Poda de registros antigos no máximo uma vez por hora
+_PODA_INTERVALO_SECONDS = 3600
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class SnapshotStore:
+    """
+    Histórico persistido (SQLite) dos resultados das análises.
+
+    - Cada linha guarda análise, instante do cálculo, entradas usadas, fingerprint das
+      entradas e o resultado em JSON
+    - Resultado repetido (mesmo conteúdo da última linha da análise) não é gravado de
+      novo: o histórico só cresce quando o resultado mudou. O fingerprint não decide
+      sozinho porque não cobre todas as entradas (ex.: leituras externas sem timestamp)
+    - Índice por (analise, calculado_em) para consultas por intervalo de tempo
+    - Linhas mais antigas que retencao_dias são removidas periodicamente
+    """
+
+    def __init__(self, nome: str = _BANCO, retencao_dias: int = 365):
+        self.nome = nome
+        self.retencao_dias = retencao_dias
+        self._lock = threading.Lock()
+        self._ultima_poda = 0.0
+        with conectar(self.nome) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, analise TEXT NOT NULL, calculado_em REAL NOT NULL, "
+                "fingerprint TEXT NOT NULL, hash_valor TEXT NOT NULL, entradas TEXT NOT NULL, valor TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_snapshots_analise_tempo ON snapshots (analise, calculado_em)"
+            )
+
+    def gravar(self, analise: str, valor: Any, calculado_em: float,
+               entradas: Dict[str, Any], fingerprint: str) -> bool:
+        """
+        Registra um resultado da análise
+
+        Returns:
+            True se gravou, False se o resultado era igual ao do último registro
+        """
+        valor_json = json.dumps(jsonable_encoder(valor), ensure_ascii=False, default=str)
+        hash_valor = hashlib.sha256(valor_json.encode("utf-8")).hexdigest()
+
+        with self._lock, conectar(self.nome) as conn:
+            ultimo = conn.execute(
+                "SELECT hash_valor FROM snapshots WHERE analise = ? "
+                "ORDER BY calculado_em DESC LIMIT 1", (analise,)
+            ).fetchone()
+            if ultimo is not None and ultimo[0] == hash_valor:
+                return False
+
+            conn.execute(
+                "INSERT INTO snapshots (analise, calculado_em, fingerprint, hash_valor, entradas, valor) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (analise, calculado_em, fingerprint, hash_valor,
+                 json.dumps(jsonable_encoder(entradas), default=str), valor_json)
+            )
+            self._podar(conn)
+        return True
+
+    def consultar(self, analise: str, desde: Optional[float] = None, ate: Optional[float] = None,
+                  limite: int = 500, incluir_valor: bool = True) -> List[Dict[str, Any]]:
+        """
+        Registros da análise no intervalo [desde, ate], do mais antigo ao mais recente
+
+        Args:
+            analise: Nome da análise
+            desde / ate: Limites em epoch UTC (opcionais)
+            limite: Máximo de registros (os mais recentes do intervalo)
+            incluir_valor: False devolve só metadados (instante, fingerprint, entradas)
+        """
+        colunas = "calculado_em, fingerprint, entradas" + (", valor" if incluir_valor else "")
+        filtros, params = ["analise = ?"], [analise]
+        if desde is not None:
+            filtros.append("calculado_em >= ?")
+            params.append(desde)
+        if ate is not None:
+            filtros.append("calculado_em <= ?")
+            params.append(ate)
+
+        with conectar(self.nome) as conn:
+            linhas = conn.execute(
+                f"SELECT {colunas} FROM snapshots WHERE {' AND '.join(filtros)} "
+                f"ORDER BY calculado_em DESC LIMIT ?", (*params, limite)
+            ).fetchall()
+
+        registros = []
+        for linha in reversed(linhas):
+            registro = {
+                "calculado_em": _iso(linha[0]),
+                "fingerprint": linha[1],
+                "entradas": json.loads(linha[2])
+            }
+            if incluir_valor:
+                registro["valor"] = json.loads(linha[3])
+            registros.append(registro)
+        return registros
+
+    def resumo(self) -> List[Dict[str, Any]]:
+        """Análises com histórico: quantidade de registros, primeiro e último"""
+        with conectar(self.nome) as conn:
+            linhas = conn.execute(
+                "SELECT analise, COUNT(*), MIN(calculado_em), MAX(calculado_em) "
+                "FROM snapshots GROUP BY analise ORDER BY analise"
+            ).fetchall()
+        return [
+            {"analise": analise, "registros": total, "primeiro": _iso(primeiro), "ultimo": _iso(ultimo)}
+            for analise, total, primeiro, ultimo in linhas
+        ]
+
+    def _podar(self, conn):
+        agora = time.time()
+        if agora - self._ultima_poda < _PODA_INTERVALO_SECONDS:
+            return
+        self._ultima_poda = agora
+        removidos = conn.execute(
+            "DELETE FROM snapshots WHERE calculado_em < ?", (agora - self.retencao_dias * 86400,)
+        ).rowcount
+        if removidos:
+            logger.info(f"🧹 Histórico de snapshots: {removidos} registro(s) além de {self.retencao_dias} dias removidos")
+
+
+_store: Optional[SnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SnapshotStore(retencao_dias=get_settings().SNAPSHOT_RETENCAO_DIAS)
+    return _store
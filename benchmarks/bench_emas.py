@@ -0,0 +1,55 @@
+# benchmarks/bench_emas.py
+"""
+Micro-benchmark: EMAs via pandas ewm (loop por período) vs kernel vetorizado do ema_utils
+
+Uso:
+    python -m benchmarks.bench_emas
+"""
+
+import timeit
+import numpy as np
+import pandas as pd
+from app.utils.ema_utils import calcular_emas_matriz, calcular_emas_ultimo
+
+PERIODOS = [17, 34, 144, 305, 610]
+TIMEFRAMES = 5
+REPETICOES = 200
+
+
+def _pandas_loop(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação original de calcular_emas (uma coluna por chamada ewm)"""
+    for period in PERIODOS:
+        df[f'EMA_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
+    return df
+
+
+def _medir(nome: str, fn, referencia: float = None) -> float:
+    tempo = min(timeit.repeat(fn, number=REPETICOES, repeat=5)) / REPETICOES
+    ganho = f" ({referencia / tempo:.1f}x)" if referencia else ""
+    print(f"{nome:<55} {tempo * 1e6:>10.1f} µs{ganho}")
+    return tempo
+
+
+def main(n_barras: int = 500):
+    rng = np.random.default_rng(42)
+    closes = 50000 + np.cumsum(rng.normal(0, 100, (TIMEFRAMES, n_barras)), axis=1)
+    frames = [pd.DataFrame({"close": c}) for c in closes]
+
+    # Conferência numérica antes de medir
+    esperado = np.stack([_pandas_loop(f.copy())[[f"EMA_{p}" for p in PERIODOS]].to_numpy() for f in frames])
+    assert np.allclose(calcular_emas_matriz(closes, PERIODOS), esperado, rtol=1e-12)
+    assert np.allclose(calcular_emas_ultimo(closes, PERIODOS), esperado[:, -1], rtol=1e-12)
+
+    print(f"{TIMEFRAMES} timeframes x {n_barras} barras x {len(PERIODOS)} períodos")
+    base = _medir("pandas ewm (loop por período e timeframe)",
+                  lambda: [_pandas_loop(f.copy()) for f in frames])
+    _medir("kernel matricial (loop por timeframe)",
+           lambda: [calcular_emas_matriz(c, PERIODOS) for c in closes], base)
+    _medir("kernel matricial (timeframes empilhados)",
+           lambda: calcular_emas_matriz(closes, PERIODOS), base)
+    _medir("kernel última linha (timeframes empilhados)",
+           lambda: calcular_emas_ultimo(closes, PERIODOS), base)
+
+
+if __name__ == "__main__":
+    main()
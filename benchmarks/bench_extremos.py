@@ -0,0 +1,53 @@
+# benchmarks/bench_extremos.py
+"""
+Micro-benchmark: detecção de extremos locais com loop Python (iloc + max/min)
+vs janelas deslizantes do NumPy (divergence_utils.identificar_pontos_extremos)
+
+Uso:
+    python -m benchmarks.bench_extremos
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from app.utils.divergence_utils import identificar_pontos_extremos
+
+JANELA = 3
+
+
+def _loop_original(serie: pd.Series, janela: int = JANELA) -> pd.Series:
+    """Implementação original de identificar_pontos_extremos"""
+    extremos = pd.Series(0, index=serie.index)
+    for i in range(janela, len(serie) - janela):
+        if serie.iloc[i] == max(serie.iloc[i-janela:i+janela+1]):
+            extremos.iloc[i] = 1
+        elif serie.iloc[i] == min(serie.iloc[i-janela:i+janela+1]):
+            extremos.iloc[i] = -1
+    return extremos
+
+
+def _medir(fn, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    rng = np.random.default_rng(7)
+    for n_barras, repeticoes_loop in [(500, 5), (50_000, 1)]:
+        valores = 50000 + np.cumsum(rng.normal(0, 100, n_barras))
+        valores[:14] = np.nan  # mesmo formato da série de RSI
+        serie = pd.Series(valores, index=pd.date_range("2020-01-01", periods=n_barras, freq="h"))
+
+        assert identificar_pontos_extremos(serie, JANELA).equals(_loop_original(serie, JANELA))
+
+        t_loop = _medir(lambda: _loop_original(serie), repeticoes_loop)
+        t_numpy = _medir(lambda: identificar_pontos_extremos(serie, JANELA), 50)
+        print(f"{n_barras:>7} barras | loop: {t_loop * 1e3:>9.2f} ms | numpy: {t_numpy * 1e3:>7.3f} ms | {t_loop / t_numpy:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
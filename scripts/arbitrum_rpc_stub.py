@@ -0,0 +1,176 @@
+# scripts/arbitrum_rpc_stub.py
+"""
+Nó JSON-RPC falso da Arbitrum para testar o provider multi-RPC sem rede
+
+Responde eth_chainId, eth_blockNumber (avança um bloco por segundo) e eth_call de
+getUserAccountData (posição fixa, derivada do endereço), getReservesList, symbol,
+AaveOracle.getAssetsPrices e Multicall3 (aggregate3, getBlockNumber). Como na Arbitrum,
+getBlockNumber (block.number) devolve o bloco L1, um contador à parte bem menor que o
+bloco L2 de eth_blockNumber. Latência e taxa de falha configuráveis para simular
+endpoints lentos ou instáveis.
+
+Uso:
+    python -m scripts.arbitrum_rpc_stub [--porta 8545] [--latencia-ms 0] [--falhas 0.0]
+
+    ARBITRUM_RPC_URLS=http://127.0.0.1:8545,http://127.0.0.1:8546 uvicorn app.main:app
+"""
+
+import json
+import time
+import random
+import argparse
+from eth_abi import decode, encode
+from web3 import Web3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAIN_ID = 42161
+BLOCO_INICIAL = 250_000_000
+# block.number dentro da Arbitrum: bloco L1 (um a cada 12s no Ethereum)
+BLOCO_L1_INICIAL = 20_000_000
+
+MULTICALL3 = "0xca11bde05977b3631167028862be2a173976ca11"
+
+# Reservas simuladas: (endereço, símbolo, preço USD)
+RESERVAS = [
+    ("0x2f2a2543b76a4166549f7aab2e75bef0aefc5b0f", "WBTC", 65_000),
+    ("0x82af49447d8a07e3bd95bd0d56f35241523fbab1", "WETH", 3_200),
+    ("0xaf88d065e77c8cc2239327c5edb3a432268e5831", "USDC", 1),
+]
+
+# Posição simulada: US$ 100k de colateral, US$ 40k de dívida (base USD com 8 casas)
+POSICAO = [
+    100_000 * 10**8,     # totalCollateralBase
+    40_000 * 10**8,      # totalDebtBase
+    35_000 * 10**8,      # availableBorrowsBase
+    7_800,               # currentLiquidationThreshold (bps)
+    7_500,               # ltv (bps)
+    1_950_000_000_000_000_000,  # healthFactor (1e18)
+]
+
+_inicio = time.time()
+
+
+def _seletor(assinatura: str) -> str:
+    return Web3.keccak(text=assinatura)[:4].hex().removeprefix("0x")
+
+
+def _bloco() -> int:
+    return BLOCO_INICIAL + int(time.time() - _inicio)
+
+
+def _bloco_l1() -> int:
+    return BLOCO_L1_INICIAL + int(time.time() - _inicio) // 12
+
+
+def _posicao(carteira: str):
+    """Posição fixa escalada pelo último byte do endereço (carteiras distintas, valores distintos)"""
+    fator = 1 + int(carteira[-2:], 16) % 4
+    return [v * fator for v in POSICAO[:3]] + POSICAO[3:]
+
+
+def _executar_call(alvo: str, dados: bytes) -> bytes:
+    """Retorno ABI de uma chamada view; levanta ValueError se não suportada"""
+    seletor, args = dados[:4].hex(), dados[4:]
+    if seletor == _seletor("getUserAccountData(address)"):
+        (carteira,) = decode(["address"], args)
+        return encode(["uint256"] * 6, _posicao(carteira))
+    if seletor == _seletor("getReservesList()"):
+        return encode(["address[]"], [[a for a, _, _ in RESERVAS]])
+    if seletor == _seletor("symbol()"):
+        simbolos = {a: s for a, s, _ in RESERVAS}
+        return encode(["string"], [simbolos[alvo]])
+    if seletor == _seletor("getAssetsPrices(address[])"):
+        (ativos,) = decode(["address[]"], args)
+        precos = {a: p for a, _, p in RESERVAS}
+        return encode(["uint256[]"], [[precos[a.lower()] * 10**8 for a in ativos]])
+    if alvo == MULTICALL3 and seletor == _seletor("getBlockNumber()"):
+        return encode(["uint256"], [_bloco_l1()])
+    if alvo == MULTICALL3 and seletor == _seletor("aggregate3((address,bool,bytes)[])"):
+        (chamadas,) = decode(["(address,bool,bytes)[]"], args)
+        resultados = []
+        for destino, permite_falha, calldata in chamadas:
+            try:
+                resultados.append((True, _executar_call(destino.lower(), calldata)))
+            except Exception:
+                if not permite_falha:
+                    raise
+                resultados.append((False, b""))
+        return encode(["(bool,bytes)[]"], [resultados])
+    raise ValueError(f"eth_call não suportado: 0x{seletor}")
+
+
+def responder(metodo: str, params: list):
+    """Resultado JSON-RPC do método, ou levanta KeyError se não suportado"""
+    if metodo == "eth_chainId":
+        return hex(CHAIN_ID)
+    if metodo == "eth_blockNumber":
+        return hex(_bloco())
+    if metodo == "net_version":
+        return str(CHAIN_ID)
+    if metodo == "eth_call":
+        # Bloco ainda não visto por este nó: mesmo erro dos nós reais
+        if len(params) > 1 and str(params[1]).startswith("0x") and int(params[1], 16) > _bloco():
+            raise ValueError("header not found")
+        dados = params[0].get("data") or params[0].get("input") or "0x"
+        alvo = (params[0].get("to") or "").lower()
+        return "0x" + _executar_call(alvo, bytes.fromhex(dados[2:])).hex()
+    raise KeyError(metodo)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latencia = 0.0
+    falhas = 0.0
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.latencia:
+            time.sleep(self.latencia)
+        if random.random() < self.falhas:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        lote = corpo if isinstance(corpo, list) else [corpo]
+        respostas = [self._processar(req) for req in lote]
+        payload = json.dumps(respostas if isinstance(corpo, list) else respostas[0]).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except BrokenPipeError:
+            # Cliente cancelou (perdeu a corrida do hedge)
+            pass
+
+    @staticmethod
+    def _processar(req):
+        base = {"jsonrpc": "2.0", "id": req.get("id")}
+        try:
+            return {**base, "result": responder(req.get("method"), req.get("params") or [])}
+        except KeyError:
+            return {**base, "error": {"code": -32601, "message": f"Método não suportado: {req.get('method')}"}}
+        except Exception as e:
+            return {**base, "error": {"code": -32000, "message": str(e)}}
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub JSON-RPC da Arbitrum")
+    parser.add_argument("--porta", type=int, default=8545)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Atraso fixo de cada resposta")
+    parser.add_argument("--falhas", type=float, default=0.0, help="Fração de requisições respondidas com HTTP 503")
+    args = parser.parse_args()
+
+    _Handler.latencia = args.latencia_ms / 1000
+    _Handler.falhas = args.falhas
+    servidor = ThreadingHTTPServer(("127.0.0.1", args.porta), _Handler)
+    print(f"Stub RPC em http://127.0.0.1:{args.porta} (latência {args.latencia_ms}ms, falhas {args.falhas:.0%})")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
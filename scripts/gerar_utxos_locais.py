@@ -0,0 +1,60 @@
+# scripts/gerar_utxos_locais.py
+"""
+Gera um dataset sintético de UTXOs (outputs.csv / inputs.csv) no formato das tabelas
+crypto_bitcoin do BigQuery, para rodar o Realized Price offline (REALIZED_PRICE_FONTE=local)
+
+Uso:
+    python -m scripts.gerar_utxos_locais [diretorio] [dias]
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+SAIDAS_POR_DIA = 400
+FRACAO_GASTA_POR_DIA = 0.02
+
+
+def gerar(diretorio: str, dias: int = 500, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    hoje = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    inicio = hoje - timedelta(days=dias)
+
+    outputs, inputs = [], []
+    nao_gastas = []  # (hash, index, value)
+
+    for d in range(dias + 1):
+        dia = inicio + timedelta(days=d)
+
+        # Gastos do dia: amostra dos UTXOs existentes
+        n_gastos = int(len(nao_gastas) * FRACAO_GASTA_POR_DIA)
+        if n_gastos:
+            escolhidos = set(rng.choice(len(nao_gastas), n_gastos, replace=False).tolist())
+            for i in sorted(escolhidos):
+                tx, idx, valor = nao_gastas[i]
+                ts = dia + timedelta(seconds=int(rng.integers(0, 86400)))
+                inputs.append((tx, idx, ts.isoformat(), valor))
+            nao_gastas = [u for i, u in enumerate(nao_gastas) if i not in escolhidos]
+
+        # Saídas criadas no dia
+        for n in range(SAIDAS_POR_DIA):
+            tx = f"{d:05d}{n // 2:05d}"
+            valor = int(rng.lognormal(17, 2))
+            ts = dia + timedelta(seconds=int(rng.integers(0, 86400)))
+            outputs.append((tx, n % 2, ts.isoformat(), valor))
+            nao_gastas.append((tx, n % 2, valor))
+
+    os.makedirs(diretorio, exist_ok=True)
+    pd.DataFrame(outputs, columns=["transaction_hash", "output_index", "block_timestamp", "value"]) \
+        .to_csv(os.path.join(diretorio, "outputs.csv"), index=False)
+    pd.DataFrame(inputs, columns=["spent_transaction_hash", "spent_output_index", "block_timestamp", "value"]) \
+        .to_csv(os.path.join(diretorio, "inputs.csv"), index=False)
+    print(f"{len(outputs)} outputs e {len(inputs)} inputs gravados em {diretorio}")
+
+
+if __name__ == "__main__":
+    destino = sys.argv[1] if len(sys.argv) > 1 else "data/utxos_local"
+    total_dias = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    gerar(destino, total_dias)